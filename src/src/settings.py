@@ -12,6 +12,11 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 import os
 from pathlib import Path
 
+
+def env_bool(name: str, default: bool) -> bool:
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes")
+
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,6 +52,8 @@ PROJECT_APPS = ["task"]
 INSTALLED_APPS += PROJECT_APPS
 
 MIDDLEWARE = [
+    # first, so timings of the API include all other middleware
+    "task.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -80,18 +87,80 @@ WSGI_APPLICATION = "src.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are reused between requests for DB_CONN_MAX_AGE seconds (0 closes them after every
+# request) and checked at the start of every request. DB_ENGINE=task.backends.postgresql_pool takes
+# connections from an in-process pool of DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections instead,
+# use it with DB_CONN_MAX_AGE=0 so connections go back to the pool after every request.
+# Behind PgBouncer in transaction pooling mode set DB_DISABLE_SERVER_SIDE_CURSORS=true
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": os.environ.get("DB_ENGINE", "django.db.backends.postgresql"),
         "NAME": os.environ.get("DB_NAME", "task_1"),
         "USER": os.environ.get("DB_USER", "postgres"),
         "PASSWORD": os.environ.get("DB_PASSWORD", "task_1"),
         "HOST": os.environ.get("DB_HOST", "localhost"),
         "PORT": os.environ.get("DB_PORT", 5432),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": env_bool("DB_CONN_HEALTH_CHECKS", True),
+        # seconds a persistent connection is idle before a request checks it
+        "CONN_HEALTH_CHECK_IDLE": int(os.environ.get("DB_CONN_HEALTH_CHECK_IDLE", 10)),
+        "DISABLE_SERVER_SIDE_CURSORS": env_bool(
+            "DB_DISABLE_SERVER_SIDE_CURSORS", False
+        ),
+        "POOL_MIN_SIZE": int(os.environ.get("DB_POOL_MIN_SIZE", 1)),
+        "POOL_MAX_SIZE": int(os.environ.get("DB_POOL_MAX_SIZE", 20)),
+        "POOL_TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+    },
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Local memory cache by default, any backend (e.g. django.core.cache.backends.redis.RedisCache,
+# django.core.cache.backends.memcached.PyMemcacheCache) can be plugged in via environment
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
     },
 }
 
 
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/authentication/
+# API accepts session cookies and stateless "Authorization: Bearer <token>" tokens
+# of POST /api/token/, requests with a token don't query the session table
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework.authentication.SessionAuthentication",
+        "task.authentication.TokenAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+}
+
+# Lifetimes of API tokens in seconds, access tokens are refreshed by POST /api/token/refresh/
+ACCESS_TOKEN_LIFETIME = int(os.environ.get("ACCESS_TOKEN_LIFETIME", 5 * 60))
+
+REFRESH_TOKEN_LIFETIME = int(os.environ.get("REFRESH_TOKEN_LIFETIME", 7 * 24 * 60 * 60))
+
+
+# Users are cached by primary key for authentication and serialization of transaction owners,
+# in every process (USER_CACHE_SIZE users) and, if USER_CACHE_ALIAS is set, in that shared cache.
+# Changes are visible in other processes after USER_CACHE_TTL seconds at most
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 30))
+
+USER_CACHE_ALIAS = os.environ.get("USER_CACHE_ALIAS", "")
+
+AUTHENTICATION_BACKENDS = ["task.authentication.CachedModelBackend"]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -103,7 +172,7 @@ AUTH_PASSWORD_VALIDATORS = [
         "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
     },
     {
-        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+        "NAME": "task.password_validation.CommonPasswordValidator",
     },
     {
         "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
@@ -111,6 +180,57 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+# New passwords are hashed by PASSWORD_HASHER (scrypt, argon2 or pbkdf2), the others are kept to
+# verify old hashes, which are rehashed with PASSWORD_HASHER at the next successful login, as are
+# hashes made with other cost parameters. argon2 needs argon2-cffi (poetry install -E argon2)
+
+_PASSWORD_HASHERS = {
+    "scrypt": "task.hashers.ScryptPasswordHasher",
+    "argon2": "task.hashers.Argon2PasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "scrypt")
+
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
+# scrypt takes 128 * WORK_FACTOR * BLOCK_SIZE bytes of memory, 16MB by default
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get("PASSWORD_SCRYPT_WORK_FACTOR", 2**14))
+
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.environ.get("PASSWORD_SCRYPT_BLOCK_SIZE", 8))
+
+PASSWORD_SCRYPT_PARALLELISM = int(os.environ.get("PASSWORD_SCRYPT_PARALLELISM", 1))
+
+# argon2id memory cost is in KiB, 64MB by default
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get("PASSWORD_ARGON2_TIME_COST", 2))
+
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get("PASSWORD_ARGON2_MEMORY_COST", 65536))
+
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get("PASSWORD_ARGON2_PARALLELISM", 2))
+
+
+# Processes hashing passwords of bulk user creation in web workers. 1 hashes in the
+# request thread: every prefork web worker would start its own pool, N workers x cores
+# processes competing with the requests
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS", 1))
+
+# Processes hashing passwords in python manage.py import_users, all cores by default
+IMPORT_PASSWORD_HASHING_WORKERS = (
+    int(os.environ.get("IMPORT_PASSWORD_HASHING_WORKERS", 0)) or os.cpu_count()
+)
+
+# Max number of users in one request of the bulk user creation API. Passwords are hashed
+# in the request (~65ms each with default scrypt cost), 50 users take ~3s. Bigger batches
+# go through python manage.py import_users, which hashes on all cores
+USER_BULK_MAX_SIZE = int(os.environ.get("USER_BULK_MAX_SIZE", 50))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -134,3 +254,94 @@ STATIC_URL = "/static/"
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+
+# Transactions
+# Keyset pagination page size and the upper bound clients can request via ?page_size=
+
+TRANSACTION_PAGE_SIZE = int(os.environ.get("TRANSACTION_PAGE_SIZE", 100))
+
+TRANSACTION_MAX_PAGE_SIZE = int(os.environ.get("TRANSACTION_MAX_PAGE_SIZE", 1000))
+
+# Rows fetched per round trip by the server-side cursor of the export endpoint
+TRANSACTION_EXPORT_CHUNK_SIZE = int(
+    os.environ.get("TRANSACTION_EXPORT_CHUNK_SIZE", 2000)
+)
+
+# Max number of transactions in one request of the bulk create/update/delete API
+TRANSACTION_BULK_MAX_SIZE = int(os.environ.get("TRANSACTION_BULK_MAX_SIZE", 1000))
+
+# Cache used for transaction lists and sums, entries are invalidated by a per user
+# version counter, the timeout only limits how long unused entries take memory.
+# The counters also make ETags of the API, so with several server processes the cache
+# has to be shared by all of them (Redis, Memcached). A LocMemCache of every process
+# serves stale reads and 304 responses until TRANSACTION_CACHE_TIMEOUT, check task.W001
+TRANSACTION_CACHE_ALIAS = os.environ.get("TRANSACTION_CACHE_ALIAS", "default")
+
+TRANSACTION_CACHE_TIMEOUT = int(os.environ.get("TRANSACTION_CACHE_TIMEOUT", 300))
+
+# Currency of transactions created without explicit currency code
+DEFAULT_CURRENCY = os.environ.get("DEFAULT_CURRENCY", "USD")
+
+# Async views (task/urls.py, api/async/...) run their database work in a thread pool of
+# this size, every thread keeps one connection, so it bounds connections used by them
+ASYNC_DB_POOL_SIZE = int(os.environ.get("ASYNC_DB_POOL_SIZE", 10))
+
+
+# Instrumentation of API requests, see task.middleware.ServerTimingMiddleware
+INSTRUMENTATION_PATH_PREFIX = os.environ.get("INSTRUMENTATION_PATH_PREFIX", "/api/")
+
+# Send query count, database, serialization, render and total time in Server-Timing header
+SERVER_TIMING_HEADER = env_bool("SERVER_TIMING_HEADER", DEBUG)
+
+# Requests slower than this are logged with their SQL (up to SLOW_REQUEST_MAX_QUERIES queries)
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get("SLOW_REQUEST_THRESHOLD_MS", 500))
+
+SLOW_REQUEST_MAX_QUERIES = int(os.environ.get("SLOW_REQUEST_MAX_QUERIES", 50))
+
+# Request counts, latency histograms and cache hit rates served by GET /api/metrics/ in Prometheus
+# format to staff users or with "Authorization: Bearer METRICS_TOKEN". With prefork servers
+# (gunicorn, uwsgi) set METRICS_DIR to a directory shared by workers and cleaned on restart,
+# every worker writes its numbers there every METRICS_FLUSH_INTERVAL seconds
+METRICS_ENABLED = env_bool("METRICS_ENABLED", True)
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+
+# Staff users can profile single API requests with "X-Profile: cprofile|sampling" header or
+# ?profile= query parameter, profiles are stored to PROFILER_DIR, see task.profiling
+PROFILER_ENABLED = env_bool("PROFILER_ENABLED", True)
+
+PROFILER_DIR = os.environ.get("PROFILER_DIR", str(BASE_DIR / "profiles"))
+
+PROFILER_MAX_PER_MINUTE = int(os.environ.get("PROFILER_MAX_PER_MINUTE", 6))
+
+PROFILER_SAMPLE_INTERVAL = float(os.environ.get("PROFILER_SAMPLE_INTERVAL", 0.005))
+
+# OpenAPI schema served by /api/schema.json is read from this file, written at deploy by
+# python manage.py generate_schema, or generated on the first request if the file is missing
+OPENAPI_SCHEMA_PATH = os.environ.get("OPENAPI_SCHEMA_PATH", "")
+
+# browsers reuse the schema for this many seconds, then revalidate it by ETag
+OPENAPI_SCHEMA_MAX_AGE = int(os.environ.get("OPENAPI_SCHEMA_MAX_AGE", 24 * 60 * 60))
+
+# Swagger UI and ReDoc pages load the cached schema instead of generating it
+SWAGGER_SETTINGS = {"SPEC_URL": "api:schema-json"}
+
+REDOC_SETTINGS = {"SPEC_URL": "api:schema-json"}
+
+
+# Fibonacci
+# Max index accepted by the fibonacci API, F(100000) has ~21000 digits
+FIBONACCI_MAX_N = int(os.environ.get("FIBONACCI_MAX_N", 100000))
+
+# Max total size of Fibonacci numbers memoized in every process
+FIBONACCI_CACHE_MAX_BYTES = int(
+    os.environ.get("FIBONACCI_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+)
+
+# Max number of values returned by one request of the fibonacci batch API
+FIBONACCI_BATCH_MAX_SIZE = int(os.environ.get("FIBONACCI_BATCH_MAX_SIZE", 1000))
@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class TaskConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "task"
+
+    def ready(self):
+        from django.contrib.auth.password_validation import (
+            get_default_password_validators,
+        )
+
+        from django.db.backends.signals import connection_created
+
+        from task import checks  # noqa: F401 register system checks
+        from task import signals  # noqa: F401 connect model signals
+        from task.instrumentation import install_execute_wrapper
+
+        connection_created.connect(install_execute_wrapper)
+
+        # load the common password list now, not in the first signup request
+        get_default_password_validators()
@@ -0,0 +1,63 @@
+"""
+ASGI handler of src/asgi.py. Django 3.2 iterates streaming responses inside the event loop,
+where generators running ORM queries lazily (transaction export) raise SynchronousOnlyOperation
+"""
+
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """
+    ASGIHandler which reads streaming responses in the thread of sync views,
+    one part at a time. Parts are produced in the thread which built the response,
+    so server-side cursors keep using the database connection they were opened on
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": self.get_response_headers(response),
+            }
+        )
+        # `__iter__` and not `streaming_content`, in case a subclass overrides it
+        parts = await sync_to_async(iter, thread_sensitive=True)(response)
+        next_part = sync_to_async(next, thread_sensitive=True)
+        while True:
+            part = await next_part(parts, None)
+            if part is None:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    @staticmethod
+    def get_response_headers(response) -> list:
+        """Headers and cookies of the response, encoded as ASGIHandler does it"""
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode("ascii")
+            if isinstance(value, str):
+                value = value.encode("latin1")
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            headers.append(
+                (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+            )
+        return headers
+
+
+def get_asgi_application() -> ASGIHandler:
+    """Same as django.core.asgi.get_asgi_application with the handler above"""
+    django.setup(set_prefix=False)
+    return ASGIHandler()
@@ -0,0 +1,43 @@
+from django.contrib.auth.backends import ModelBackend
+from rest_framework import authentication, exceptions
+
+from task.services.tokens import ACCESS, get_token_user
+from task.services.user_cache import get_cached_user
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend which takes users of sessions from the user cache instead of a query per request"""
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+class TokenAuthentication(authentication.BaseAuthentication):
+    """
+    Stateless authentication by "Authorization: Bearer <access token>" header,
+    see task.services.tokens. Requests with a token don't touch the session table,
+    the user is taken from the user cache and kept on the request by DRF
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header")
+
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token header")
+
+        user = get_token_user(token, ACCESS)
+        if user is None:
+            raise exceptions.AuthenticationFailed("Invalid or expired token")
+        return user, token
+
+    def authenticate_header(self, request):
+        return f'{self.keyword} realm="api"'
@@ -0,0 +1,128 @@
+"""
+PostgreSQL backend which takes connections from an in-process pool
+instead of opening a new one (TCP + auth + backend process start) for every request.
+Enabled with DB_ENGINE=task.backends.postgresql_pool, pool is sized by
+POOL_MIN_SIZE/POOL_MAX_SIZE of the database settings, a request waits up to
+POOL_TIMEOUT seconds for a free connection
+"""
+
+import threading
+from typing import Dict, List, Tuple
+
+import psycopg2
+import psycopg2.extras
+from django.db import OperationalError
+from django.db.backends.postgresql import base
+from django.db.utils import NO_DB_ALIAS
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class ConnectionPool:
+    """
+    ThreadedConnectionPool which waits for a free connection instead of raising
+    when it's exhausted, and counts checked out connections for metrics
+    """
+
+    def __init__(self, min_size: int, max_size: int, conn_params: dict):
+        self.connections = ThreadedConnectionPool(min_size, max_size, **conn_params)
+        self.max_size = max_size
+        self.name = f"{conn_params.get('host', '')}/{conn_params.get('database', '')}"
+        self.in_use = 0
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    def getconn(self, timeout: float, check_health: bool = False):
+        if not self._slots.acquire(timeout=timeout):
+            raise OperationalError(
+                "Timed out waiting for a database connection from the pool"
+            )
+        try:
+            connection = self.connections.getconn()
+            if check_health and not _is_usable(connection):
+                # e.g. database was restarted while connection waited in the pool
+                self.connections.putconn(connection, close=True)
+                connection = self.connections.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+        return connection
+
+    def putconn(self, connection, close: bool = False) -> None:
+        try:
+            self.connections.putconn(connection, close=close)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _get_pool(self, conn_params: dict) -> ConnectionPool:
+        # test runner switches NAME to the test database, so pools are kept per connection params
+        key = repr(sorted(conn_params.items()))
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(
+                    self.settings_dict.get("POOL_MIN_SIZE", 1),
+                    self.settings_dict.get("POOL_MAX_SIZE", 20),
+                    conn_params,
+                )
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        if self.alias == NO_DB_ALIAS:
+            # connections to "postgres" database (create/drop test database) aren't kept
+            return super().get_new_connection(conn_params)
+
+        connection_pool = self._get_pool(conn_params)
+        connection = connection_pool.getconn(
+            self.settings_dict.get("POOL_TIMEOUT", 10),
+            check_health=self.settings_dict.get("CONN_HEALTH_CHECKS", False),
+        )
+        self._pool_params = conn_params
+
+        # same connection state as the parent backend sets up on a fresh connection
+        options = self.settings_dict["OPTIONS"]
+        self.isolation_level = options.get(
+            "isolation_level", connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.alias == NO_DB_ALIAS:
+            return super()._close()
+
+        connection_pool = self._get_pool(self._pool_params)
+        with self.wrap_database_errors:
+            # pool rolls back unfinished transaction, a connection which raised
+            # errors and wasn't found usable by Django is dropped instead of reused
+            connection_pool.putconn(self.connection, close=self.errors_occurred)
+
+
+def _is_usable(connection) -> bool:
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connection.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+
+
+def get_pool_usage() -> List[Tuple[str, int, int]]:
+    """(host/database, connections in use, max connections) of every pool of this process"""
+    with _pools_lock:
+        return [(pool.name, pool.in_use, pool.max_size) for pool in _pools.values()]
@@ -0,0 +1,28 @@
+"""System checks of deployment settings, run by manage.py commands and runserver"""
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# backends which keep entries in the memory of every process
+PROCESS_LOCAL_CACHES = ("django.core.cache.backends.locmem.LocMemCache",)
+
+
+@register(Tags.caches)
+def check_transaction_cache_is_shared(app_configs, **kwargs):
+    """
+    Version counters invalidating cached transaction reads and their ETags are kept in
+    TRANSACTION_CACHE_ALIAS. In a cache of every process a change made in one worker
+    isn't seen by the others, they serve stale lists, sums and 304 responses
+    """
+    alias = settings.TRANSACTION_CACHE_ALIAS
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f"TRANSACTION_CACHE_ALIAS cache '{alias}' ({backend}) isn't shared between processes",
+            hint="Run a single server process or set CACHE_BACKEND/CACHE_LOCATION "
+            "to a shared cache such as Redis or Memcached",
+            id="task.W001",
+        )
+    ]
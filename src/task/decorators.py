@@ -0,0 +1,87 @@
+import hashlib
+import time
+from functools import wraps
+from typing import Callable
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from task.services.async_db import run_in_db_pool
+from task.services.cache import get_last_modified, get_version
+
+
+def conditional_on_version(kind: str) -> Callable:
+    """
+    Add ETag and Last-Modified to responses of a viewset method and answer
+    If-None-Match / If-Modified-Since with 304 before the view runs.
+    Both are derived from the per user version counter of `kind` data,
+    so checking them costs no queries and no serialization. The counter is read
+    from TRANSACTION_CACHE_ALIAS on every request, which has to be shared by
+    all server processes (task.W001), otherwise they answer 304 for changed data.
+    Permission and existence checks of a single object have to run before it
+    """
+
+    def decorator(view_method: Callable) -> Callable:
+        @wraps(view_method)
+        def wrapper(self, request: Request, *args, **kwargs) -> Response:
+            user_id = request.user.pk
+            version = get_version(kind, user_id)
+            # Last-Modified has whole seconds, another change in the second of the last one
+            # would get the same value. It's sent only once that second is over,
+            # until then clients revalidate by ETag
+            last_modified = int(get_last_modified(kind, user_id)) + 1
+            if time.time() < last_modified:
+                last_modified = None
+
+            key = ":".join(
+                (kind, str(user_id), str(version), request.get_full_path())
+                + (request.META.get("HTTP_ACCEPT", ""),)
+            )
+            etag = f'W/"{hashlib.md5(key.encode()).hexdigest()}"'
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+            # responses differ per user, clients have to revalidate every time
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ("Authorization", "Cookie"))
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def async_view(view: Callable) -> Callable:
+    """
+    Turn a synchronous (DRF) view into a coroutine view for the ASGI application.
+    The view runs in the database thread pool and its response is rendered there too,
+    so the event loop never blocks and slow queries of one request don't hold others
+    """
+
+    def render_view(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, "render") and callable(response.render):
+            response = response.render()
+        return response
+
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return await run_in_db_pool(render_view, request, *args, **kwargs)
+
+    return wrapper
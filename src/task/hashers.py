@@ -0,0 +1,162 @@
+"""
+Password hashers tuned by settings, see PASSWORD_HASHER in src/settings.py.
+New passwords are hashed with the first of PASSWORD_HASHERS, a hash made by another hasher
+or with other parameters is replaced at the next successful login (must_update)
+"""
+
+import base64
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+class ScryptPasswordHasher(hashers.BasePasswordHasher):
+    """
+    Memory hard scrypt hasher of the standard library, same hash format as the one of Django 4.0,
+    so hashes stay valid after upgrade. Cost is n * r * 128 bytes of memory and time per hash
+    """
+
+    algorithm = "scrypt"
+
+    @property
+    def work_factor(self) -> int:
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self) -> int:
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self) -> int:
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and "$" not in salt
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=n,
+            r=r,
+            p=p,
+            # default limit of OpenSSL is 32MB, hashing needs 128 * n * r bytes
+            maxmem=2 * 128 * n * r * p,
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode("ascii").strip()
+        return "%s$%d$%s$%d$%d$%s" % (self.algorithm, n, salt, r, p, hash_)
+
+    def decode(self, encoded):
+        algorithm, work_factor, salt, block_size, parallelism, hash_ = encoded.split(
+            "$", 6
+        )
+        assert algorithm == self.algorithm
+        return {
+            "algorithm": algorithm,
+            "work_factor": int(work_factor),
+            "salt": salt,
+            "block_size": int(block_size),
+            "parallelism": int(parallelism),
+            "hash": hash_,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password,
+            decoded["salt"],
+            decoded["work_factor"],
+            decoded["block_size"],
+            decoded["parallelism"],
+        )
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            _("algorithm"): decoded["algorithm"],
+            _("work factor"): decoded["work_factor"],
+            _("block size"): decoded["block_size"],
+            _("parallelism"): decoded["parallelism"],
+            _("salt"): hashers.mask_hash(decoded["salt"]),
+            _("hash"): hashers.mask_hash(decoded["hash"]),
+        }
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (
+            decoded["work_factor"] != self.work_factor
+            or decoded["block_size"] != self.block_size
+            or decoded["parallelism"] != self.parallelism
+        )
+
+    def harden_runtime(self, password, encoded):
+        # parameters are part of the hash, verification of an outdated hash
+        # can't be made as slow as of the current one
+        pass
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id hasher with costs from settings, needs argon2-cffi package"""
+
+    @property
+    def time_cost(self) -> int:
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self) -> int:
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self) -> int:
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool of `workers` processes, replaced when another size is asked.
+    Workers are spawned, not forked from a process running threads of its own
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None and _executor_workers != workers:
+            _executor.shutdown()
+            _executor = None
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _executor_workers = workers
+    return _executor
+
+
+def make_passwords(passwords: List[str], workers: Optional[int] = None) -> List[str]:
+    """
+    Hashes of many passwords by the default hasher. Hashing is CPU bound by design,
+    so it's spread over a pool of `workers` processes (PASSWORD_HASHING_WORKERS
+    by default, 1 hashes in this process). This module doesn't import models,
+    spawned workers only need DJANGO_SETTINGS_MODULE
+    """
+    workers = workers or settings.PASSWORD_HASHING_WORKERS
+    if len(passwords) < 2 or workers == 1:
+        return [hashers.make_password(password) for password in passwords]
+
+    executor = get_hashing_executor(workers)
+    # a few chunks per worker, big enough to make pickling overhead negligible
+    chunk_size = max(1, len(passwords) // (workers * 4))
+    return list(executor.map(hashers.make_password, passwords, chunksize=chunk_size))
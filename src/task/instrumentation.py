@@ -0,0 +1,117 @@
+"""
+Per-request timings of the API, collected by task.middleware.ServerTimingMiddleware:
+database time and query count (execute wrapper of every connection), serialization time
+(TimedSerializerMixin), render time and total time of every request.
+Metrics of the current request are kept in a context variable, so they follow the request
+to whatever thread runs its queries (sync_to_async, the database pool of async views)
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_current: "contextvars.ContextVar[Optional[RequestMetrics]]" = contextvars.ContextVar(
+    "request_metrics", default=None
+)
+
+
+class RequestMetrics:
+    """Timings of one request, in seconds"""
+
+    def __init__(self, max_queries: int):
+        self.view: Optional[str] = None
+        self.action: Optional[str] = None
+        self.queries = 0
+        self.db = 0.0
+        self.total = 0.0
+        self.timings: Dict[str, float] = {}
+        # (sql, duration) of the first `max_queries` queries, logged for slow requests
+        self.statements: List[Tuple[str, float]] = []
+        self._max_queries = max_queries
+        self._active = set()
+
+    def execute(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook timing every query"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db += duration
+            if len(self.statements) < self._max_queries:
+                self.statements.append((sql, duration))
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        # nested calls (e.g. nested serializers) are counted once
+        if name in self._active:
+            yield
+            return
+        self._active.add(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._active.discard(name)
+            self.timings[name] = (
+                self.timings.get(name, 0.0) + time.perf_counter() - started
+            )
+
+    def server_timing(self) -> str:
+        """Value of Server-Timing header, durations are in milliseconds"""
+        metrics = [f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"']
+        metrics.extend(
+            f"{name};dur={duration * 1000:.2f}"
+            for name, duration in self.timings.items()
+        )
+        metrics.append(f"total;dur={self.total * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+def get_request_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the request being handled, None outside of instrumented requests"""
+    return _current.get()
+
+
+def start_request_metrics(metrics: RequestMetrics) -> contextvars.Token:
+    return _current.set(metrics)
+
+
+def stop_request_metrics(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def execute_with_metrics(execute, sql, params, many, context):
+    """Execute wrapper of every connection, times queries of instrumented requests"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.execute(execute, sql, params, many, context)
+
+
+def install_execute_wrapper(sender, connection, **kwargs) -> None:
+    """connection_created receiver, connections are thread local so it runs in every thread"""
+    if execute_with_metrics not in connection.execute_wrappers:
+        # first, connection.execute_wrapper() blocks pop the last wrapper on exit
+        connection.execute_wrappers.insert(0, execute_with_metrics)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Add time spent in the block to `name` timing of the current request"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+    else:
+        with metrics.timed(name):
+            yield
+
+
+class TimedSerializerMixin:
+    """Serializer mixin adding time of to_representation to "serialize" timing of the request"""
+
+    def to_representation(self, instance):
+        with timed("serialize"):
+            return super().to_representation(instance)
@@ -0,0 +1,386 @@
+import datetime
+import json
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from task.models import CustomUser, Transaction
+from task.services.dataset import EMAIL_DOMAIN
+from task.services.tokens import ACCESS, make_token
+
+# (name, HTTP method, LoadTestContext method preparing path, body and user of a request),
+# every endpoint of TransactionViewSet and UserViewSet
+ENDPOINTS = (
+    ("transaction-list", "get", "list_transactions"),
+    ("transaction-list-compact", "get", "list_transactions_compact"),
+    ("transaction-retrieve", "get", "retrieve_transaction"),
+    ("transaction-create", "post", "create_transaction"),
+    ("transaction-partial-update", "patch", "update_transaction"),
+    ("transaction-destroy", "delete", "destroy_transaction"),
+    ("transaction-bulk-create", "post", "bulk_create_transactions"),
+    ("transaction-bulk-update", "patch", "bulk_update_transactions"),
+    ("transaction-bulk-delete", "delete", "bulk_delete_transactions"),
+    ("transaction-sort-by-date", "post", "sort_transactions_by_date"),
+    ("transaction-sum-by-date", "post", "sum_transactions_by_date"),
+    ("transaction-export", "get", "export_transactions"),
+    ("user-create", "post", "create_user"),
+    ("user-current", "get", "get_current_user"),
+    ("user-partial-update", "patch", "update_user"),
+    ("user-destroy", "delete", "destroy_user"),
+    ("user-bulk-create", "post", "bulk_create_users"),
+)
+
+# metrics compared with the baseline, higher requests/s and lower latency are better
+HIGHER_IS_BETTER = ("requests_per_second",)
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms")
+
+
+class LoadTestContext:
+    """
+    Users of the dataset with their tokens and transactions. Preparing a request
+    (e.g. creating the transaction a DELETE removes) isn't a part of its latency
+    """
+
+    def __init__(self, users: List[CustomUser], admin: CustomUser, seed: Optional[int]):
+        self.users = users
+        self.admin = admin
+        self.tokens = {user.pk: make_token(user, ACCESS) for user in [*users, admin]}
+        self.transaction_ids = {
+            user.pk: list(
+                Transaction.objects.filter(user=user)
+                .order_by("id")
+                .values_list("id", flat=True)[:50]
+            )
+            for user in users
+        }
+        self.password_hash = make_password("loadtest-password")
+        self._seed = seed
+        self._local = threading.local()
+
+    @property
+    def rng(self) -> random.Random:
+        if not hasattr(self._local, "rng"):
+            self._local.rng = random.Random(
+                None if self._seed is None else (self._seed, threading.get_ident())
+            )
+        return self._local.rng
+
+    def token(self, user: CustomUser) -> str:
+        if user.pk not in self.tokens:
+            self.tokens[user.pk] = make_token(user, ACCESS)
+        return self.tokens[user.pk]
+
+    def _user_with_transactions(self) -> CustomUser:
+        users = [user for user in self.users if self.transaction_ids[user.pk]]
+        if not users:
+            raise CommandError("Dataset users don't have transactions")
+        return self.rng.choice(users)
+
+    def _amount(self) -> str:
+        # whole amounts are valid in every currency
+        return str(self.rng.randint(1, 10000))
+
+    def _new_transactions(self, user: CustomUser, count: int) -> List[int]:
+        return [
+            Transaction.objects.create(user=user, amount=int(self._amount()) * 100).pk
+            for _ in range(count)
+        ]
+
+    def _new_user_data(self) -> dict:
+        return {
+            "email": f"new.{uuid.uuid4().hex}@{EMAIL_DOMAIN}",
+            # random passwords may be found too similar to random emails
+            "password": "Vb7#qLm2!xZr9",
+            "first_name": "Load",
+            "last_name": "Test",
+        }
+
+    def list_transactions(self):
+        return "transaction/", None, self.rng.choice(self.users)
+
+    def list_transactions_compact(self):
+        return "transaction/?compact=true", None, self.rng.choice(self.users)
+
+    def retrieve_transaction(self):
+        user = self._user_with_transactions()
+        pk = self.rng.choice(self.transaction_ids[user.pk])
+        return f"transaction/{pk}/", None, user
+
+    def create_transaction(self):
+        return "transaction/", {"amount": self._amount()}, self.rng.choice(self.users)
+
+    def update_transaction(self):
+        user = self._user_with_transactions()
+        pk = self.rng.choice(self.transaction_ids[user.pk])
+        return f"transaction/{pk}/", {"amount": self._amount()}, user
+
+    def destroy_transaction(self):
+        user = self.rng.choice(self.users)
+        return f"transaction/{self._new_transactions(user, 1)[0]}/", None, user
+
+    def bulk_create_transactions(self):
+        items = [{"amount": self._amount()} for _ in range(100)]
+        return "transaction/bulk/", items, self.rng.choice(self.users)
+
+    def bulk_update_transactions(self):
+        user = self._user_with_transactions()
+        ids = self.rng.sample(
+            self.transaction_ids[user.pk], min(20, len(self.transaction_ids[user.pk]))
+        )
+        items = [{"id": pk, "amount": self._amount()} for pk in ids]
+        return "transaction/bulk/", items, user
+
+    def bulk_delete_transactions(self):
+        user = self.rng.choice(self.users)
+        return "transaction/bulk/", {"ids": self._new_transactions(user, 20)}, user
+
+    def sort_transactions_by_date(self):
+        end = datetime.date.today() - datetime.timedelta(days=self.rng.randrange(300))
+        data = {
+            "start_date": str(end - datetime.timedelta(days=30)),
+            "end_date": str(end),
+        }
+        return (
+            "transaction/sort_transactions_by_date/",
+            data,
+            self.rng.choice(self.users),
+        )
+
+    def sum_transactions_by_date(self):
+        end = datetime.date.today() - datetime.timedelta(days=self.rng.randrange(300))
+        data = {
+            "start_date": str(end - datetime.timedelta(days=90)),
+            "end_date": str(end),
+        }
+        return (
+            "transaction/view_sum_of_transactions_by_date/",
+            data,
+            self.rng.choice(self.users),
+        )
+
+    def export_transactions(self):
+        start = datetime.date.today() - datetime.timedelta(days=30)
+        return (
+            f"transaction/export/?export_format=csv&start_date={start}",
+            None,
+            self.rng.choice(self.users),
+        )
+
+    def create_user(self):
+        return "user/", self._new_user_data(), None
+
+    def get_current_user(self):
+        return "user/get_current_user/", None, self.rng.choice(self.users)
+
+    def update_user(self):
+        user = self.rng.choice(self.users)
+        return (
+            f"user/{user.pk}/",
+            {"first_name": f"Name{self.rng.randrange(10000)}"},
+            user,
+        )
+
+    def destroy_user(self):
+        user = CustomUser.objects.create(
+            email=f"delete.{uuid.uuid4().hex}@{EMAIL_DOMAIN}",
+            password=self.password_hash,
+        )
+        return f"user/{user.pk}/", None, user
+
+    def bulk_create_users(self):
+        return "user/bulk/", [self._new_user_data() for _ in range(10)], self.admin
+
+
+class Command(BaseCommand):
+    help = """
+    Command to load test every endpoint of TransactionViewSet and UserViewSet
+    Usage: python manage.py bench_api [--requests N] [--concurrency N] [--endpoints name ...]
+           [--save-baseline path] [--baseline path] [--threshold 0.2]
+    Requests are sent in-process through the WSGI handler from --concurrency threads as
+    random users of the dataset (python manage.py generate_dataset), authenticated by tokens.
+    Endpoints which write create their own rows, so run it against a disposable database.
+    With --baseline results are compared with stored ones and the command fails if
+    requests/s or p50/p95/p99 latency of any endpoint is more than --threshold worse
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Number of dataset users to send requests as",
+        )
+        parser.add_argument(
+            "--endpoints",
+            nargs="+",
+            choices=[name for name, _, _ in ENDPOINTS],
+            help="Endpoints to load, all by default",
+        )
+        parser.add_argument("--save-baseline", help="Write results to this JSON file")
+        parser.add_argument("--baseline", help="Compare results with this JSON file")
+        parser.add_argument("--threshold", type=float, default=0.2)
+        parser.add_argument("--seed", type=int, help="Seed of the random generator")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2 or options["concurrency"] < 1:
+            raise CommandError(
+                "--requests must be at least 2 and --concurrency positive"
+            )
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"]) as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Can't read baseline {options['baseline']}: {e}")
+
+        user_ids = list(
+            CustomUser.objects.filter(
+                email__endswith=f"@{EMAIL_DOMAIN}",
+                email__startswith="user",
+                is_staff=False,
+            ).values_list("id", flat=True)
+        )
+        if not user_ids:
+            raise CommandError(
+                "No dataset users, run python manage.py generate_dataset first"
+            )
+        rng = random.Random(options["seed"])
+        users = list(
+            CustomUser.objects.filter(
+                pk__in=rng.sample(user_ids, min(options["users"], len(user_ids)))
+            )
+        )
+        admin = CustomUser.objects.create(
+            email=f"admin.{uuid.uuid4().hex}@{EMAIL_DOMAIN}", is_staff=True
+        )
+
+        selected = options["endpoints"] or [name for name, _, _ in ENDPOINTS]
+        results = {}
+        # tokens have to outlive the benchmark, test clients send requests to "testserver" host
+        with override_settings(
+            ACCESS_TOKEN_LIFETIME=24 * 60 * 60,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        ):
+            context = LoadTestContext(users, admin, options["seed"])
+            for name, method, prepare in ENDPOINTS:
+                if name not in selected:
+                    continue
+                elapsed, latencies = self.bench(
+                    context,
+                    method,
+                    prepare,
+                    options["requests"],
+                    options["concurrency"],
+                )
+                results[name] = summarize(elapsed, latencies)
+                self.report(name, results[name])
+
+        if options["save_baseline"]:
+            with open(options["save_baseline"], "w") as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(f"Baseline saved to {options['save_baseline']}")
+
+        if baseline is not None:
+            regressions = compare_with_baseline(results, baseline, options["threshold"])
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} metrics regressed by more than {options['threshold']:.0%}"
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    @staticmethod
+    def bench(
+        context: LoadTestContext,
+        method: str,
+        prepare: str,
+        requests: int,
+        concurrency: int,
+    ) -> Tuple[float, List[float]]:
+        local = threading.local()
+
+        def send(_) -> float:
+            if not hasattr(local, "client"):
+                local.client = Client()
+            path, data, user = getattr(context, prepare)()
+            headers = (
+                {"HTTP_AUTHORIZATION": f"Bearer {context.token(user)}"} if user else {}
+            )
+
+            started = time.perf_counter()
+            response = local.client.generic(
+                method.upper(),
+                f"/api/{path}",
+                json.dumps(data) if data is not None else "",
+                content_type="application/json",
+                **headers,
+            )
+            if response.streaming:
+                b"".join(response.streaming_content)
+            latency = time.perf_counter() - started
+
+            if response.status_code >= 400:
+                raise CommandError(
+                    f"{method.upper()} /api/{path} returned {response.status_code}: "
+                    f"{response.content[:200]!r}"
+                )
+            return latency
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            started = time.perf_counter()
+            latencies = list(executor.map(send, range(requests)))
+            return time.perf_counter() - started, latencies
+
+    def report(self, name: str, result: Dict[str, float]):
+        self.stdout.write(
+            f"{name}: {result['requests_per_second']:.0f} requests/s, "
+            f"p50 {result['p50_ms']:.1f}ms, p95 {result['p95_ms']:.1f}ms, "
+            f"p99 {result['p99_ms']:.1f}ms"
+        )
+
+
+def summarize(elapsed: float, latencies: List[float]) -> Dict[str, float]:
+    # requests/s includes time spent preparing requests, latencies don't
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentiles[49] * 1000,
+        "p95_ms": percentiles[94] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+    }
+
+
+def compare_with_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """Description of every metric more than `threshold` (a fraction) worse than in the baseline"""
+    regressions = []
+    for name, result in results.items():
+        for metric, expected in baseline.get(name, {}).items():
+            actual = result.get(metric)
+            if actual is None:
+                continue
+            if metric in HIGHER_IS_BETTER and actual < expected * (1 - threshold):
+                regressions.append(
+                    f"{name} {metric}: {actual:.1f}, baseline {expected:.1f}"
+                )
+            elif metric in LOWER_IS_BETTER and actual > expected * (1 + threshold):
+                regressions.append(
+                    f"{name} {metric}: {actual:.1f}, baseline {expected:.1f}"
+                )
+    return regressions
@@ -0,0 +1,63 @@
+import statistics
+import time
+from typing import Callable, List
+
+from django.core.management import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = """
+    Command to measure how much database connection setup adds to a request
+    Usage: python manage.py bench_db_connections [--queries N] [--database ALIAS]
+    Runs SELECT 1 on a new connection every time (CONN_MAX_AGE=0 behaviour, or a
+    checkout from the pool with task.backends.postgresql_pool) and on one reused
+    connection (CONN_MAX_AGE > 0), the difference is connection setup cost
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options["queries"] < 2:
+            raise CommandError("--queries must be at least 2")
+        connection = connections[options["database"]]
+
+        def select_one():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+
+        def select_one_on_new_connection():
+            connection.close()
+            select_one()
+
+        new = self.measure(select_one_on_new_connection, options["queries"])
+        connection.ensure_connection()
+        reused = self.measure(select_one, options["queries"])
+
+        self.report("new connection", new)
+        self.report("reused connection", reused)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Connection setup costs "
+                f"{(statistics.mean(new) - statistics.mean(reused)) * 1000:.2f}ms per request"
+            )
+        )
+
+    @staticmethod
+    def measure(func: Callable, times: int) -> List[float]:
+        latencies = []
+        for _ in range(times):
+            started = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    def report(self, name: str, latencies: List[float]):
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{name}: mean {statistics.mean(latencies) * 1000:.2f}ms, "
+            f"p50 {percentiles[49] * 1000:.2f}ms, p99 {percentiles[98] * 1000:.2f}ms"
+        )
@@ -0,0 +1,73 @@
+import time
+from typing import Callable, List
+
+from django.core.management import BaseCommand, CommandError
+
+from task.services.fibonacci import (
+    fibonacci,
+    fibonacci_iterative,
+    fibonacci_matrix,
+    get_fibonacci_cache,
+    iter_decimal_digits,
+)
+
+METHODS = {
+    "iterative": fibonacci_iterative,
+    "matrix": fibonacci_matrix,
+    "fast doubling": fibonacci,
+}
+
+
+class Command(BaseCommand):
+    help = """
+    Command to compare Fibonacci algorithms and output conversions across n
+    Usage: python manage.py bench_fibo [--n N ...] [--repeat R] [--max-iterative-n N]
+    Best of --repeat runs is reported, memo cache is cleared before every run.
+    Iterative method is O(n) big int additions, so it's skipped for n above --max-iterative-n
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--n", type=int, nargs="+", default=[1000, 10000, 100000, 1000000]
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--max-iterative-n", type=int, default=100000)
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1 or any(n < 0 for n in options["n"]):
+            raise CommandError("--repeat must be positive and --n non negative")
+
+        for n in options["n"]:
+            for name, method in METHODS.items():
+                if name == "iterative" and n > options["max_iterative_n"]:
+                    continue
+                self.report(n, name, self.measure(method, n, options["repeat"]))
+
+            value = fibonacci(n)
+            self.report(
+                n,
+                "decimal output",
+                self.measure(
+                    lambda v: sum(map(len, iter_decimal_digits(v))),
+                    value,
+                    options["repeat"],
+                ),
+            )
+            self.report(
+                n,
+                "hex output",
+                self.measure(lambda v: format(v, "x"), value, options["repeat"]),
+            )
+
+    @staticmethod
+    def measure(func: Callable, argument: int, repeat: int) -> float:
+        timings: List[float] = []
+        for _ in range(repeat):
+            get_fibonacci_cache().clear()
+            started = time.perf_counter()
+            func(argument)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def report(self, n: int, name: str, seconds: float):
+        self.stdout.write(f"n={n} {name}: {seconds * 1000:.3f}ms")
@@ -0,0 +1,132 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+from task.models import CustomUser
+
+# (method, path) of the read endpoints available both as sync and async views
+ENDPOINTS = (
+    ("get", "transaction/"),
+    ("get", "transaction/?compact=true"),
+    ("post", "transaction/view_sum_of_transactions_by_date/"),
+    ("get", "user/get_current_user/"),
+)
+
+
+class Command(BaseCommand):
+    help = """
+    Command to compare requests/second and latency of sync (WSGI) and async (ASGI) read endpoints
+    Usage: python manage.py bench_read_path [user_id] [--requests N] [--concurrency N]
+    Requests are sent in-process through Django WSGI and ASGI handlers as the given user:
+    WSGI requests from a pool of --concurrency threads, ASGI requests as --concurrency
+    coroutines on one event loop. Run it against a copy of production-like data
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_id", type=int)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--mode", choices=("wsgi", "asgi", "both"), default="both")
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(pk=options["user_id"])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"User {options['user_id']} does not exist")
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive")
+
+        modes = ("wsgi", "asgi") if options["mode"] == "both" else (options["mode"],)
+        # test clients send requests to "testserver" host
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for method, path in ENDPOINTS:
+                for mode in modes:
+                    bench = self.bench_wsgi if mode == "wsgi" else self.bench_asgi
+                    prefix = "/api/" if mode == "wsgi" else "/api/async/"
+                    elapsed, latencies = bench(
+                        user,
+                        method,
+                        prefix + path,
+                        options["requests"],
+                        options["concurrency"],
+                    )
+                    self.report(mode, method, path, elapsed, latencies)
+
+    @staticmethod
+    def bench_wsgi(
+        user: CustomUser, method: str, path: str, requests: int, concurrency: int
+    ) -> Tuple[float, List[float]]:
+        login_client = Client()
+        login_client.force_login(user)
+        local = threading.local()
+
+        def send(_) -> float:
+            if not hasattr(local, "client"):
+                # one client per thread, all of them share the session
+                local.client = Client()
+                local.client.cookies = login_client.cookies
+            started = time.perf_counter()
+            response = getattr(local.client, method)(
+                path, {}, content_type="application/json"
+            )
+            _check(response)
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            started = time.perf_counter()
+            latencies = list(executor.map(send, range(requests)))
+            return time.perf_counter() - started, latencies
+
+    @staticmethod
+    def bench_asgi(
+        user: CustomUser, method: str, path: str, requests: int, concurrency: int
+    ) -> Tuple[float, List[float]]:
+        client = AsyncClient()
+        client.force_login(user)
+
+        async def run() -> Tuple[float, List[float]]:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def send() -> float:
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await getattr(client, method)(
+                        path, {}, content_type="application/json"
+                    )
+                    _check(response)
+                    return time.perf_counter() - started
+
+            started = time.perf_counter()
+            latencies = await asyncio.gather(*(send() for _ in range(requests)))
+            return time.perf_counter() - started, latencies
+
+        return asyncio.run(run())
+
+    def report(
+        self, mode: str, method: str, path: str, elapsed: float, latencies: List[float]
+    ):
+        percentiles = (
+            statistics.quantiles(latencies, n=100)
+            if len(latencies) > 1
+            else latencies * 99
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{mode} {method.upper()} {path}: {len(latencies) / elapsed:.0f} requests/s, "
+                f"p50 {percentiles[49] * 1000:.1f}ms, p99 {percentiles[98] * 1000:.1f}ms"
+            )
+        )
+
+
+def _check(response) -> None:
+    if response.status_code != 200:
+        raise CommandError(
+            f"{response.request['PATH_INFO']} returned {response.status_code}"
+        )
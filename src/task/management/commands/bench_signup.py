@@ -0,0 +1,85 @@
+import statistics
+import time
+import uuid
+from typing import List
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers_by_algorithm
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+
+
+class Command(BaseCommand):
+    help = """
+    Command to compare signup latency with every password hasher of PASSWORD_HASHERS
+    Usage: python manage.py bench_signup [--requests N] [--hashers scrypt argon2 ...]
+    Sends POST /api/user/ in-process, created users are rolled back.
+    Hashers which need a missing library (argon2-cffi, bcrypt) are skipped
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument("--hashers", nargs="+")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("--requests must be at least 2")
+        hashers = get_hashers_by_algorithm()
+        algorithms = options["hashers"] or list(hashers)
+        unknown = set(algorithms) - set(hashers)
+        if unknown:
+            raise CommandError(
+                f"Unknown hashers {', '.join(sorted(unknown))}, PASSWORD_HASHERS has {', '.join(hashers)}"
+            )
+
+        for algorithm in algorithms:
+            hasher = hashers[algorithm]
+            if getattr(hasher, "library", None):
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    self.stderr.write(f"{algorithm}: skipped, library is not installed")
+                    continue
+
+            path = f"{type(hasher).__module__}.{type(hasher).__name__}"
+            # test client sends requests to "testserver" host
+            with override_settings(
+                PASSWORD_HASHERS=[path],
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                self.report(algorithm, self.measure(options["requests"]))
+
+    @staticmethod
+    def measure(requests: int) -> List[float]:
+        client = Client()
+        latencies = []
+        with transaction.atomic():
+            for i in range(requests):
+                started = time.perf_counter()
+                response = client.post(
+                    "/api/user/",
+                    {
+                        "email": f"bench-signup-{i}@example.com",
+                        "password": uuid.uuid4().hex,
+                        "first_name": "Bench",
+                        "last_name": "Signup",
+                    },
+                    content_type="application/json",
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(
+                        f"Signup returned {response.status_code}: {response.content!r}"
+                    )
+            transaction.set_rollback(True)
+        return latencies
+
+    def report(self, name: str, latencies: List[float]):
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: mean {statistics.mean(latencies) * 1000:.1f}ms, "
+                f"p50 {percentiles[49] * 1000:.1f}ms, p99 {percentiles[98] * 1000:.1f}ms"
+            )
+        )
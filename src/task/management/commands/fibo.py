@@ -2,31 +2,41 @@ import sys
 
 from django.core.management import BaseCommand
 
+from task.services.fibonacci import fibonacci, iter_decimal_digits
+
 
 class Command(BaseCommand):
     help = """
-    Command to calculate n'th number of fibonacci sequence
-    Usage: python manage.py fibo [number]
-    Function works very fast because it save cached numbers
+    Command to calculate n'th number of fibonacci sequence, F(0) = 0, F(1) = 1
+    Usage: python manage.py fibo [number] [--modulo M] [--output-format decimal|hex|binary]
+    Function works very fast because it uses fast doubling, O(log n) multiplications,
+    with --modulo numbers stay small, so even huge n take microseconds.
+    Decimal output is streamed in chunks, hex and binary outputs are the fastest for huge n
     """
 
     def add_arguments(self, parser):
         parser.add_argument('number', type=int)
+        parser.add_argument('--modulo', type=int)
+        parser.add_argument('--output-format', choices=('decimal', 'hex', 'binary'), default='decimal')
 
     def handle(self, *args, **options):
         number: int = options['number']
 
-        if number < 0:
+        if number < 0 or (options['modulo'] is not None and options['modulo'] < 1):
             self.stderr.write(
                 self.style.ERROR("Invalid number please enter positive int number")
             )
             sys.exit(-1)
 
-        nums = [0] * number
-        nums[0], nums[1] = 0, 1
-
-        for i in range(2, number):
-            nums[i] = nums[i - 1] + nums[i - 2]
+        value = fibonacci(number, options['modulo'])
         self.stdout.write(
-            self.style.SUCCESS(f"Successfully calculated {number}'th number of fibonacci sequence:\n{nums[number - 1]}")
+            self.style.SUCCESS(f"Successfully calculated {number}'th number of fibonacci sequence:")
         )
+        if options['output_format'] == 'decimal':
+            chunks = iter_decimal_digits(value)
+        else:
+            # conversion to power of 2 base is linear and has no digits limit
+            chunks = [format(value, '#x' if options['output_format'] == 'hex' else '#b')]
+        for chunk in chunks:
+            self.stdout.write(chunk, ending='')
+        self.stdout.write('')
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+
+from task.services.dataset import generate_dataset
+
+
+class Command(BaseCommand):
+    help = """
+    Command to fill the database with a synthetic dataset for load tests
+    Usage: python manage.py generate_dataset [--users N] [--transactions N] [--days N] [--seed N]
+    Users share --password (hashed once), transactions get random owners, amounts,
+    currencies and dates and are inserted in bulk, see task.services.dataset.
+    Run it against a disposable database, e.g. before python manage.py bench_api
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5000)
+        parser.add_argument("--transactions", type=int, default=2000000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--password", default="loadtest-password")
+        parser.add_argument("--seed", type=int, help="Seed of the random generator")
+        parser.add_argument("--chunk-size", type=int, default=50000)
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["days"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--users, --days and --chunk-size must be positive")
+        if options["transactions"] < 0:
+            raise CommandError("--transactions can't be negative")
+
+        started = time.monotonic()
+        user_ids = generate_dataset(
+            options["users"],
+            options["transactions"],
+            days=options["days"],
+            password=options["password"],
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+        )
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully created {len(user_ids)} users (ids {user_ids[0]}-{user_ids[-1]}) "
+                f"and {options['transactions']} transactions in {elapsed:.1f}s"
+            )
+        )
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from task.schema import generate_schema
+
+
+class Command(BaseCommand):
+    help = """
+    Command to write OpenAPI schema of the API to a static JSON file, run it at deploy
+    Usage: python manage.py generate_schema [path]
+    By default the file is written to OPENAPI_SCHEMA_PATH, which /api/schema.json serves,
+    so API processes don't have to introspect every endpoint to generate it
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default=settings.OPENAPI_SCHEMA_PATH)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not path:
+            raise CommandError("Pass a path or set OPENAPI_SCHEMA_PATH")
+
+        content = generate_schema()
+        with open(path, "wb") as file:
+            file.write(content)
+        self.stdout.write(
+            self.style.SUCCESS(f"Schema written to {path} ({len(content)} bytes)")
+        )
@@ -0,0 +1,111 @@
+import os
+import time
+from itertools import islice
+
+from django.core.management import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+
+from task.models import TransactionImportProgress
+from task.services.aggregates import rebuild_daily_aggregates
+from task.services.cache import bump_transactions_version
+from task.services.transaction import (
+    IMPORT_FORMATS,
+    insert_transaction_rows,
+    iter_import_rows,
+    parse_import_row,
+)
+
+
+class Command(BaseCommand):
+    help = """
+    Command to import transactions from CSV (user_id,amount,currency,date header) or NDJSON file.
+    Amounts are decimals, currency column is optional and defaults to DEFAULT_CURRENCY
+    Usage: python manage.py import_transactions [path] [--resume]
+    File is read in chunks, every chunk is committed separately together with the number
+    of committed rows (TransactionImportProgress), so a failed import can be resumed.
+    Daily rollups of imported users are rebuilt once at the end
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            dest="file_format",
+            help="File format, by default taken from file extension",
+        )
+        parser.add_argument("--chunk-size", type=int, default=10000)
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip rows committed by a previous run of the import",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["file_format"] or (
+            "csv" if path.endswith(".csv") else "ndjson"
+        )
+        chunk_size = options["chunk_size"]
+
+        progress, _ = TransactionImportProgress.objects.get_or_create(
+            path=os.path.abspath(path)
+        )
+        if not options["resume"]:
+            progress.rows, progress.user_ids = 0, []
+        committed, user_ids = progress.rows, set(progress.user_ids)
+
+        imported = 0
+        started = time.monotonic()
+
+        with open(path, newline="") as file:
+            rows = enumerate(iter_import_rows(file, file_format), start=1)
+            rows = islice(rows, committed, None)
+
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+
+                parsed = []
+                for line_number, row in chunk:
+                    try:
+                        parsed.append(parse_import_row(row))
+                    except (ValueError, TypeError) as e:
+                        raise CommandError(f"Invalid row {line_number}: {e}")
+
+                chunk_user_ids = user_ids | {row[0] for row in parsed}
+                progress.rows = committed + len(parsed)
+                progress.user_ids = sorted(chunk_user_ids)
+                try:
+                    # rows and the checkpoint are committed together, a crash leaves
+                    # either both or none of them
+                    with transaction.atomic():
+                        insert_transaction_rows(parsed)
+                        progress.save(update_fields=["rows", "user_ids"])
+                except DatabaseError as e:
+                    raise CommandError(
+                        f"Failed to import rows {chunk[0][0]}-{chunk[-1][0]}: {e}"
+                    )
+
+                committed += len(parsed)
+                imported += len(parsed)
+                user_ids = chunk_user_ids
+
+                elapsed = max(time.monotonic() - started, 1e-9)
+                self.stdout.write(
+                    f"{committed} rows imported, {imported / elapsed:.0f} rows/s"
+                )
+
+        # rollups are rebuilt once for every imported user instead of per row
+        rebuild_daily_aggregates(user_ids)
+        bump_transactions_version(user_ids)
+        progress.delete()
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully imported {imported} transactions in {elapsed:.1f}s "
+                f"({imported / elapsed:.0f} rows/s)"
+            )
+        )
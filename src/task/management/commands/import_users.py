@@ -0,0 +1,112 @@
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from task.serializers.user_serializers import BulkCreateUserSerializer
+from task.services.transaction import IMPORT_FORMATS, iter_import_rows
+from task.services.user import bulk_create_users, validate_users_data
+
+
+class Command(BaseCommand):
+    help = """
+    Command to create users from CSV (email,password,first_name,last_name header) or NDJSON file
+    Usage: python manage.py import_users [path] [--chunk-size N] [--workers N]
+    Every chunk is validated with one query, passwords are hashed in a pool of --workers
+    processes (IMPORT_PASSWORD_HASHING_WORKERS, all cores by default) and valid users
+    are inserted with bulk_create.
+    Invalid rows are reported and skipped, the rest is imported
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            dest="file_format",
+            help="File format, by default taken from file extension",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Processes hashing passwords, IMPORT_PASSWORD_HASHING_WORKERS by default",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers must be positive")
+        self.workers = options["workers"] or settings.IMPORT_PASSWORD_HASHING_WORKERS
+        path = options["path"]
+        file_format = options["file_format"] or (
+            "csv" if path.endswith(".csv") else "ndjson"
+        )
+        imported, failed = 0, 0
+        started = time.monotonic()
+
+        with open(path, newline="") as file:
+            rows = enumerate(iter_import_rows(file, file_format), start=1)
+            while True:
+                chunk = list(islice(rows, options["chunk_size"]))
+                if not chunk:
+                    break
+
+                valid = []
+                for line_number, row in chunk:
+                    serializer = BulkCreateUserSerializer(data=row)
+                    if serializer.is_valid():
+                        valid.append((line_number, serializer.validated_data))
+                    else:
+                        self.report_failure(line_number, serializer.errors)
+                        failed += 1
+
+                created, invalid = self.create_users(valid)
+                for line_number, errors in invalid:
+                    self.report_failure(line_number, errors)
+                imported += created
+                failed += len(invalid)
+
+                elapsed = max(time.monotonic() - started, 1e-9)
+                self.stdout.write(
+                    f"{imported} users imported, {failed} rows failed, {imported / elapsed:.0f} users/s"
+                )
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully imported {imported} users in {elapsed:.1f}s, {failed} rows failed"
+            )
+        )
+
+    def create_users(self, rows: list) -> tuple:
+        """Insert valid rows, (number of created users, [(line number, errors)])"""
+        invalid = []
+        # emails can be taken by signups running concurrently with the import,
+        # then the chunk is validated once more
+        for attempt in range(2):
+            errors = validate_users_data([item for _, item in rows])
+            invalid.extend(
+                (line_number, item_errors)
+                for (line_number, _), item_errors in zip(rows, errors)
+                if item_errors
+            )
+            rows = [row for row, item_errors in zip(rows, errors) if not item_errors]
+            if not rows:
+                return 0, invalid
+            try:
+                users = bulk_create_users(
+                    [item for _, item in rows], hashing_workers=self.workers
+                )
+                return len(users), invalid
+            except IntegrityError:
+                if attempt:
+                    raise
+
+    def report_failure(self, line_number: int, errors: dict):
+        messages = "; ".join(
+            f"{field}: {' '.join(map(str, field_errors))}"
+            for field, field_errors in errors.items()
+        )
+        self.stderr.write(f"Row {line_number}: {messages}")
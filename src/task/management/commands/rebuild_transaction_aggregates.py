@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management import BaseCommand
+
+from task.models import CustomUser
+from task.services.aggregates import rebuild_daily_aggregates, verify_daily_aggregates
+from task.services.cache import bump_transactions_version
+
+
+class Command(BaseCommand):
+    help = """
+    Command to rebuild (backfill) daily transaction rollups from raw transactions
+    Usage: python manage.py rebuild_transaction_aggregates [--user ID ...] [--verify]
+    With --verify rollups are only compared with raw transactions
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", dest="user_ids",
+            help="Rebuild rollups only of this user, can be repeated",
+        )
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Don't rebuild, only report rollups which differ from raw transactions",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options["user_ids"]
+
+        if options["verify"]:
+            mismatches = verify_daily_aggregates(user_ids)
+            for mismatch in mismatches:
+                self.stderr.write(self.style.ERROR(mismatch))
+            if mismatches:
+                sys.exit(1)
+            self.stdout.write(self.style.SUCCESS("Daily transaction rollups are consistent"))
+            return
+
+        written = rebuild_daily_aggregates(user_ids)
+        bump_transactions_version(
+            user_ids or CustomUser.objects.values_list("pk", flat=True).iterator()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully rebuilt {written} daily transaction rollups")
+        )
@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Tuple
+
+from django.conf import settings
+
+from task.instrumentation import (
+    RequestMetrics,
+    start_request_metrics,
+    stop_request_metrics,
+)
+from task.services.metrics import record_request
+
+logger = logging.getLogger("task.performance")
+
+
+def get_view_action(view_func, method: str) -> Tuple[str, str]:
+    """View and its method handling the request, e.g. (TransactionViewSet, list)"""
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return getattr(view_func, "__name__", "unknown"), method.lower()
+    actions = getattr(view_func, "actions", None) or {}
+    return cls.__name__, actions.get(method.lower(), method.lower())
+
+
+class ServerTimingMiddleware:
+    """
+    Measures requests of the API (INSTRUMENTATION_PATH_PREFIX): query count and database time,
+    serialization, render and total time. They are sent in Server-Timing header
+    (if SERVER_TIMING_HEADER is on) and requests slower than SLOW_REQUEST_THRESHOLD_MS
+    are logged to "task.performance" logger with their SQL. Every request is counted
+    in the metrics registry (task.services.metrics) per view action and status.
+    Works in both WSGI and ASGI chains, so async views aren't run through the one
+    thread of sync middleware. Rows of streamed responses are fetched after the
+    response leaves the middleware and aren't counted
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # the handler awaits the middleware, same as django.utils.deprecation.MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            # a sync hook would be run in the shared sync thread for every request
+            self.process_template_response = self.process_template_response_async
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not request.path.startswith(settings.INSTRUMENTATION_PATH_PREFIX):
+            return self.get_response(request)
+
+        metrics, started, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_request_metrics(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        if not request.path.startswith(settings.INSTRUMENTATION_PATH_PREFIX):
+            return await self.get_response(request)
+
+        metrics, started, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_request_metrics(token)
+        return self.finish(request, response, metrics, started)
+
+    @staticmethod
+    def start(request) -> Tuple[RequestMetrics, float, contextvars.Token]:
+        # queries are timed by the execute wrapper of every connection
+        # (task.instrumentation.install_execute_wrapper) in whichever thread runs them
+        metrics = RequestMetrics(max_queries=settings.SLOW_REQUEST_MAX_QUERIES)
+        request.metrics = metrics
+        return metrics, time.perf_counter(), start_request_metrics(metrics)
+
+    def finish(self, request, response, metrics: RequestMetrics, started: float):
+        metrics.total = time.perf_counter() - started
+        resolver_match = getattr(request, "resolver_match", None)
+        if resolver_match is not None:
+            metrics.view, metrics.action = get_view_action(
+                resolver_match.func, request.method
+            )
+
+        record_request(
+            metrics.view or "",
+            metrics.action or "",
+            response.status_code,
+            metrics.total,
+        )
+
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = metrics.server_timing()
+        if metrics.total * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            self.log_slow_request(request, response, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook
+        metrics = getattr(request, "metrics", None)
+        if metrics is not None:
+            started = time.perf_counter()
+
+            def record_render_time(rendered):
+                metrics.timings["render"] = time.perf_counter() - started
+
+            response.add_post_render_callback(record_render_time)
+        return response
+
+    async def process_template_response_async(self, request, response):
+        return ServerTimingMiddleware.process_template_response(self, request, response)
+
+    @staticmethod
+    def log_slow_request(request, response, metrics: RequestMetrics):
+        statements = "\n".join(
+            f"  {duration * 1000:.2f}ms {sql}" for sql, duration in metrics.statements
+        )
+        logger.warning(
+            "Slow request %s %s (%s.%s) %s: %.1fms, %d queries in %.1fms\n%s",
+            request.method,
+            request.get_full_path(),
+            metrics.view,
+            metrics.action,
+            response.status_code,
+            metrics.total * 1000,
+            metrics.queries,
+            metrics.db * 1000,
+            statements,
+        )
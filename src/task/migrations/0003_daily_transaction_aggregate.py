@@ -0,0 +1,68 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_daily_aggregates(apps, schema_editor):
+    Transaction = apps.get_model("task", "Transaction")
+    DailyTransactionAggregate = apps.get_model("task", "DailyTransactionAggregate")
+
+    rows = (
+        Transaction.objects.values("user_id", "date")
+        .annotate(
+            sum=models.Sum("amount"),
+            count=models.Count("id"),
+            min=models.Min("amount"),
+            max=models.Max("amount"),
+        )
+        .order_by()
+    )
+    DailyTransactionAggregate.objects.bulk_create(
+        (DailyTransactionAggregate(**row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("task", "0002_transaction"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyTransactionAggregate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("sum", models.FloatField()),
+                ("count", models.PositiveIntegerField()),
+                ("min", models.FloatField()),
+                ("max", models.FloatField()),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="dailytransactionaggregate",
+            constraint=models.UniqueConstraint(
+                fields=("user", "date"), name="daily_transaction_aggregate_user_date"
+            ),
+        ),
+        migrations.RunPython(backfill_daily_aggregates, migrations.RunPython.noop),
+    ]
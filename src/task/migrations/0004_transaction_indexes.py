@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("task", "0003_daily_transaction_aggregate"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dailytransactionaggregate",
+            index=models.Index(
+                fields=["user", "date"],
+                include=("sum",),
+                name="daily_aggr_user_date_sum_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "date", "id"],
+                include=("amount",),
+                name="transaction_user_date_id_idx",
+            ),
+        ),
+        # drop the single column FK index only after the composite one exists
+        migrations.AlterField(
+            model_name="transaction",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,152 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Cast, Round
+
+import task.services.money
+
+
+def convert_amounts_to_minor_units(apps, schema_editor):
+    # existing float amounts got DEFAULT_CURRENCY by the field added before,
+    # its exponent gives the factor (100 for USD, 1 for JPY, 1000 for KWD)
+    Transaction = apps.get_model("task", "Transaction")
+    currencies = Transaction.objects.values_list("currency", flat=True).distinct()
+    for currency in list(currencies):
+        factor = 10 ** task.services.money.get_currency_exponent(currency)
+        Transaction.objects.filter(currency=currency).update(
+            amount_minor=Cast(
+                Round(models.F("amount") * factor), models.BigIntegerField()
+            )
+        )
+
+
+def delete_daily_aggregates(apps, schema_editor):
+    apps.get_model("task", "DailyTransactionAggregate").objects.all().delete()
+
+
+def backfill_daily_aggregates(apps, schema_editor):
+    Transaction = apps.get_model("task", "Transaction")
+    DailyTransactionAggregate = apps.get_model("task", "DailyTransactionAggregate")
+
+    rows = (
+        Transaction.objects.values("user_id", "currency", "date")
+        .annotate(
+            sum=models.Sum("amount"),
+            count=models.Count("id"),
+            min=models.Min("amount"),
+            max=models.Max("amount"),
+        )
+        .order_by()
+    )
+    DailyTransactionAggregate.objects.bulk_create(
+        (DailyTransactionAggregate(**row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("task", "0004_transaction_indexes"),
+    ]
+
+    operations = [
+        # transaction amount: float -> integer minor units with currency code
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="transaction_user_date_id_idx",
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="currency",
+            field=models.CharField(
+                default=task.services.money.get_default_currency, max_length=3
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="amount_minor",
+            field=models.BigIntegerField(null=True),
+        ),
+        # irreversible: the float column is dropped below, a no-op reverse would lose amounts.
+        # Daily rollups are derived data, their steps are reversed as no-ops
+        migrations.RunPython(convert_amounts_to_minor_units),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="amount",
+        ),
+        migrations.RenameField(
+            model_name="transaction",
+            old_name="amount_minor",
+            new_name="amount",
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="amount",
+            field=models.BigIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "date", "id"],
+                include=("amount",),
+                name="transaction_user_date_id_idx",
+            ),
+        ),
+        # daily rollups are keyed by currency too and rebuilt from converted amounts
+        migrations.RemoveIndex(
+            model_name="dailytransactionaggregate",
+            name="daily_aggr_user_date_sum_idx",
+        ),
+        migrations.RemoveConstraint(
+            model_name="dailytransactionaggregate",
+            name="daily_transaction_aggregate_user_date",
+        ),
+        migrations.RunPython(delete_daily_aggregates, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="dailytransactionaggregate",
+            name="currency",
+            field=models.CharField(max_length=3),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name="dailytransactionaggregate",
+            name="sum",
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="dailytransactionaggregate",
+            name="min",
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="dailytransactionaggregate",
+            name="max",
+            field=models.BigIntegerField(),
+        ),
+        migrations.AddConstraint(
+            model_name="dailytransactionaggregate",
+            constraint=models.UniqueConstraint(
+                fields=("user", "currency", "date"),
+                name="daily_transaction_aggregate_user_currency_date",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dailytransactionaggregate",
+            index=models.Index(
+                fields=["user", "currency", "date"],
+                include=("sum",),
+                name="daily_aggr_user_cur_date_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="dailytransactionaggregate",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(backfill_daily_aggregates, migrations.RunPython.noop),
+    ]
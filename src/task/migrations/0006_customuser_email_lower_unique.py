@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("task", "0005_transaction_amount_minor_units"),
+    ]
+
+    # Django 3.2 can't declare a unique constraint on an expression,
+    # the index is supported by both PostgreSQL and SQLite
+    operations = [
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX customuser_email_lower_uniq ON task_customuser (LOWER(email));",
+            reverse_sql="DROP INDEX customuser_email_lower_uniq;",
+        ),
+    ]
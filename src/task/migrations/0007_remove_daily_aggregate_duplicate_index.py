@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("task", "0006_customuser_email_lower_unique"),
+    ]
+
+    # the unique constraint on the same columns already has an index serving the lookups
+    operations = [
+        migrations.RemoveIndex(
+            model_name="dailytransactionaggregate",
+            name="daily_aggr_user_cur_date_idx",
+        ),
+    ]
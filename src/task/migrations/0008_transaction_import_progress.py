@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("task", "0007_remove_daily_aggregate_duplicate_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransactionImportProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("path", models.TextField(unique=True)),
+                ("rows", models.PositiveBigIntegerField(default=0)),
+                ("user_ids", models.JSONField(default=list)),
+            ],
+        ),
+    ]
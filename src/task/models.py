@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 
 from task.managers import CustomUserManager
+from task.services.money import get_default_currency
 
 
 class CustomUser(AbstractUser):
@@ -14,6 +15,7 @@ class CustomUser(AbstractUser):
 
     first_name = models.CharField(verbose_name="name", max_length=150, blank=True)
     last_name = models.CharField(verbose_name="surname", max_length=150, blank=True)
+    # also unique regardless of case, by customuser_email_lower_uniq index of migration 0006
     email = models.EmailField(verbose_name="email", unique=True)
 
     USERNAME_FIELD = "email"
@@ -26,7 +28,67 @@ class CustomUser(AbstractUser):
 
 class Transaction(models.Model):
     """Transaction model"""
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    amount = models.FloatField()
+    # user_id is the first column of the composite index below, separate one isn't needed
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)
+    # exact integer amount in minor units of currency (cents for USD),
+    # API presents it as decimal string, see task.services.money
+    amount = models.BigIntegerField()
+    currency = models.CharField(max_length=3, default=get_default_currency)
     date = models.DateField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # serves user + date filters and keyset pagination ordered by (date, id),
+            # on PostgreSQL amount is included so sums are index only scans
+            models.Index(
+                fields=["user", "date", "id"],
+                include=["amount"],
+                name="transaction_user_date_id_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember stored values, daily aggregates need them to apply changes
+        instance._loaded_values = {
+            field: getattr(instance, field)
+            for field in ("user_id", "amount", "currency", "date")
+            if field in instance.__dict__
+        }
+        return instance
+
+
+class DailyTransactionAggregate(models.Model):
+    """
+    Per user, per currency and per day rollup of transactions (amounts in minor units).
+    Kept up to date by transaction signals, rebuilt by
+    `python manage.py rebuild_transaction_aggregates`
+    """
+    # user lookups and date range sums are served by the index of the unique constraint
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)
+    currency = models.CharField(max_length=3)
+    date = models.DateField()
+    sum = models.BigIntegerField()
+    count = models.PositiveIntegerField()
+    min = models.BigIntegerField()
+    max = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "currency", "date"],
+                name="daily_transaction_aggregate_user_currency_date",
+            ),
+        ]
+
+
+class TransactionImportProgress(models.Model):
+    """
+    Checkpoint of `python manage.py import_transactions`, updated in the transaction
+    which commits a chunk, so --resume never imports a committed chunk again
+    """
+    path = models.TextField(unique=True)  # absolute path of the imported file
+    rows = models.PositiveBigIntegerField(default=0)  # committed rows from the file start
+    # owners of committed rows, their rollups are rebuilt when the import finishes
+    user_ids = models.JSONField(default=list)
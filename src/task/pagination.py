@@ -0,0 +1,93 @@
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import date as Date
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TransactionCursorPagination(CursorPagination):
+    """
+    Keyset pagination for transactions ordered by (date, id).
+    Cursor holds the last seen (date, id) pair, so every page is fetched
+    with the same index range scan instead of OFFSET.
+    """
+
+    ordering = ("date", "id")
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.page_size = settings.TRANSACTION_PAGE_SIZE
+        self.max_page_size = settings.TRANSACTION_MAX_PAGE_SIZE
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view=None
+    ) -> list:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if self.position is not None:
+            position_date, position_id = self.position
+            # date__gte keeps the lookup a range scan on (user, date, id)
+            queryset = queryset.filter(date__gte=position_date).filter(
+                Q(date__gt=position_date) | Q(id__gt=position_id)
+            )
+
+        # fetch one extra row to know if there is a next page
+        results = list(queryset[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor((last.date, last.pk))
+        )
+
+    def get_previous_link(self) -> None:
+        return None
+
+    def decode_cursor(self, request: Request) -> Optional[Tuple[Date, int]]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            position_date, position_id = (
+                urlsafe_b64decode(encoded.encode("ascii")).decode("ascii").split("|")
+            )
+            return Date.fromisoformat(position_date), int(position_id)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position: Tuple[Date, int]) -> str:
+        position_date, position_id = position
+        cursor = f"{position_date.isoformat()}|{position_id}"
+        return urlsafe_b64encode(cursor.encode("ascii")).decode("ascii")
+
+    def get_paginated_response(self, data: list) -> Response:
+        return Response(
+            OrderedDict([("next", self.get_next_link()), ("results", data)])
+        )
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,30 @@
+import functools
+import gzip
+from typing import FrozenSet
+
+from django.contrib.auth import password_validation
+
+
+@functools.lru_cache(maxsize=None)
+def load_password_list(path: str) -> FrozenSet[str]:
+    """Lowercased passwords of a (gzipped) list, read once per process"""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return frozenset(x.strip() for x in f)
+    except OSError:
+        with open(path) as f:
+            return frozenset(x.strip() for x in f)
+
+
+class CommonPasswordValidator(password_validation.CommonPasswordValidator):
+    """
+    CommonPasswordValidator which shares one frozenset of the list between instances,
+    validators are created and the list is read at startup (TaskConfig.ready)
+    instead of during the first signup request
+    """
+
+    def __init__(
+        self,
+        password_list_path=password_validation.CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH,
+    ):
+        self.passwords = load_password_list(str(password_list_path))
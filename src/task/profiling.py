@@ -0,0 +1,193 @@
+"""
+Opt-in profiling of single API requests in production. A staff user sends
+"X-Profile: cprofile" (or "sampling") header or ?profile=cprofile query parameter and the
+request runs under the profiler, the result is stored to PROFILER_DIR and its file name
+is returned in X-Profile-Id header:
+- cprofile: deterministic, [name].pstats for python -m pstats or snakeviz
+- sampling: stack of the request thread every PROFILER_SAMPLE_INTERVAL seconds,
+  [name].collapsed in the format of flamegraph.pl / speedscope, less overhead
+At most PROFILER_MAX_PER_MINUTE requests per process and one at a time are profiled
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from typing import Optional
+
+from django.conf import settings
+
+PROFILERS = ("cprofile", "sampling")
+
+
+class CProfileProfiler:
+    extension = "pstats"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def save(self, path: str) -> None:
+        self._profile.dump_stats(path)
+
+
+class SamplingProfiler:
+    """Samples stack of the thread which started it from a background thread"""
+
+    extension = "collapsed"
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._sampler = threading.Thread(
+            target=self._sample, name="sampling-profiler", daemon=True
+        )
+        self._sampler.start()
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class RateLimiter:
+    """At most `per_minute` acquisitions in any 60 seconds and one at a time"""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._started = deque()
+        self._active = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._started and self._started[0] <= now - 60:
+                self._started.popleft()
+            if self._active or len(self._started) >= self.per_minute:
+                return False
+            self._started.append(now)
+            self._active = True
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._active = False
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(settings.PROFILER_MAX_PER_MINUTE)
+    return _rate_limiter
+
+
+class RequestProfile:
+    """Profiler of one request, stopped and saved once the view returns or raises"""
+
+    def __init__(self, kind: str, name: str):
+        self.profiler = (
+            CProfileProfiler()
+            if kind == "cprofile"
+            else SamplingProfiler(settings.PROFILER_SAMPLE_INTERVAL)
+        )
+        self.file_name = f"{name}.{self.profiler.extension}"
+        try:
+            self.profiler.start()
+        except Exception:
+            get_rate_limiter().release()
+            raise
+
+    def finish(self) -> None:
+        try:
+            self.profiler.stop()
+            os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+            self.profiler.save(os.path.join(settings.PROFILER_DIR, self.file_name))
+        finally:
+            get_rate_limiter().release()
+
+
+class ProfiledViewMixin:
+    """
+    Viewset mixin running requests which ask for it under a profiler, see the module docstring.
+    Profiling starts after authentication, so only staff users can enable it
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._profile = None
+        self._profile_skipped = False
+
+        kind = request.META.get("HTTP_X_PROFILE") or request.query_params.get("profile")
+        if (
+            kind not in PROFILERS
+            or not settings.PROFILER_ENABLED
+            or not request.user.is_staff
+        ):
+            return
+        if not get_rate_limiter().acquire():
+            self._profile_skipped = True
+            return
+        name = "-".join(
+            (
+                time.strftime("%Y%m%dT%H%M%S"),
+                type(self).__name__,
+                str(getattr(self, "action", None) or request.method.lower()),
+                uuid.uuid4().hex[:8],
+            )
+        )
+        self._profile = RequestProfile(kind, name)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "_profile_skipped", False):
+            response["X-Profile-Skipped"] = "rate limit"
+        profile = getattr(self, "_profile", None)
+        if profile is not None:
+            response["X-Profile-Id"] = profile.file_name
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        # finalize_response isn't called if the view raises, the profiler has to be
+        # stopped and the limiter released anyway. Rendering happens after dispatch,
+        # JSON rendering is cheap next to serialization, so it isn't profiled
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            profile = getattr(self, "_profile", None)
+            if profile is not None:
+                self._profile = None
+                profile.finish()
@@ -0,0 +1,88 @@
+"""
+OpenAPI schema of the API. drf_yasg introspects every endpoint to build it, so the schema
+is built once (python manage.py generate_schema at deploy, or on the first request of
+a process) and served as static JSON with an ETag. Imports drf_yasg generators and views,
+so the module is imported only when docs are requested
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.generators import EndpointEnumerator, OpenAPISchemaGenerator
+from drf_yasg.renderers import ReDocRenderer, SwaggerUIRenderer
+from drf_yasg.views import get_schema_view
+from rest_framework.permissions import IsAuthenticated
+
+INFO = openapi.Info(title="Snippets API", default_version="v1")
+
+UI_RENDERERS = {"swagger": SwaggerUIRenderer, "redoc": ReDocRenderer}
+
+
+class SyncEndpointEnumerator(EndpointEnumerator):
+    def should_include_endpoint(self, path, callback, *args, **kwargs):
+        # async variants of endpoints have the same operations as documented sync ones
+        if asyncio.iscoroutinefunction(callback):
+            return False
+        return super().should_include_endpoint(path, callback, *args, **kwargs)
+
+
+class CustomSchemaGenerator(OpenAPISchemaGenerator):
+    endpoint_enumerator_class = SyncEndpointEnumerator
+
+    def get_schema(self, request=None, public=False):
+        schema = super().get_schema(request, public)
+        schema.schemes = ["https", "http"]
+        return schema
+
+
+def generate_schema() -> bytes:
+    """
+    Schema of all endpoints as JSON. It's generated without a request,
+    so it doesn't depend on the host or the user and can be shared by everyone
+    """
+    schema = CustomSchemaGenerator(INFO).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+_schema: Optional[Tuple[bytes, str]] = None
+_schema_lock = threading.Lock()
+
+
+def get_schema() -> Tuple[bytes, str]:
+    """
+    (JSON, ETag) of the schema, read from OPENAPI_SCHEMA_PATH if it was generated
+    there, otherwise generated once per process
+    """
+    global _schema
+    with _schema_lock:
+        if _schema is None:
+            path = settings.OPENAPI_SCHEMA_PATH
+            if path and os.path.exists(path):
+                with open(path, "rb") as file:
+                    content = file.read()
+            else:
+                content = generate_schema()
+            _schema = (content, f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+        return _schema
+
+
+@lru_cache(maxsize=None)
+def get_ui_view(ui: str) -> Callable:
+    """
+    Swagger UI or ReDoc page. Its view has no JSON renderers, the page loads
+    the cached schema from SPEC_URL of SWAGGER_SETTINGS / REDOC_SETTINGS
+    """
+    schema_view = get_schema_view(
+        INFO,
+        public=True,
+        generator_class=CustomSchemaGenerator,
+        permission_classes=(IsAuthenticated,),
+    )
+    return schema_view.as_view(renderer_classes=(UI_RENDERERS[ui],))
@@ -0,0 +1,77 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from task.instrumentation import TimedSerializerMixin
+
+
+class FibonacciQuerySerializer(serializers.Serializer):
+    """Query params of fibonacci API, huge indices are allowed only modulo some number"""
+
+    modulo = serializers.IntegerField(min_value=1, required=False)
+
+    def check_index(self, n: int) -> int:
+        if "modulo" not in self.initial_data and n > settings.FIBONACCI_MAX_N:
+            raise serializers.ValidationError(
+                f"n can't be bigger than {settings.FIBONACCI_MAX_N} without modulo"
+            )
+        return n
+
+    def parse_index(self, n: str) -> int:
+        """Index given as a string of digits, checked by check_index"""
+        try:
+            return self.check_index(int(n))
+        except ValueError:  # longer than sys.get_int_max_str_digits()
+            raise serializers.ValidationError("n has too many digits")
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+    class Meta:
+        fields = ("modulo",)
+
+
+class FibonacciBatchSerializer(FibonacciQuerySerializer):
+    """Either inclusive range of indices (start, end) or comma separated indices"""
+
+    start = serializers.IntegerField(min_value=0, required=False)
+    end = serializers.IntegerField(min_value=0, required=False)
+    indices = serializers.RegexField(r"^\d+(,\d+)*$", required=False)
+
+    def validate(self, attrs):
+        if "indices" in attrs:
+            indices = attrs["indices"].split(",")
+        elif "start" in attrs and "end" in attrs and attrs["start"] <= attrs["end"]:
+            indices = range(attrs["start"], attrs["end"] + 1)
+        else:
+            raise serializers.ValidationError(
+                "Pass either indices or start and end, start <= end"
+            )
+
+        if len(indices) > settings.FIBONACCI_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Batch can't contain more than {settings.FIBONACCI_BATCH_MAX_SIZE} numbers"
+            )
+        attrs["indices"] = [self.parse_index(str(n)) for n in indices]
+        return attrs
+
+    class Meta:
+        fields = FibonacciQuerySerializer.Meta.fields + ("start", "end", "indices")
+
+
+class FibonacciOutputSerializer(TimedSerializerMixin, serializers.Serializer):
+    """n'th Fibonacci number, value is a decimal string because it doesn't fit in JSON number"""
+
+    n = serializers.IntegerField()
+    value = serializers.CharField()
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+    class Meta:
+        fields = ("n", "value")
@@ -0,0 +1,47 @@
+from rest_framework import serializers
+
+from task.instrumentation import TimedSerializerMixin
+
+
+class TokenObtainSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(trim_whitespace=False)
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+    class Meta:
+        fields = ("email", "password")
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+    class Meta:
+        fields = ("refresh",)
+
+
+class TokenOutputSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Access token is sent as "Authorization: Bearer <access>", expires_in is in seconds"""
+
+    access = serializers.CharField()
+    refresh = serializers.CharField()
+    expires_in = serializers.IntegerField()
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+    class Meta:
+        fields = ("access", "refresh", "expires_in")
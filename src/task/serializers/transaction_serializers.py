@@ -1,27 +1,109 @@
 from rest_framework import serializers
 
+from task.instrumentation import TimedSerializerMixin
 from task.models import Transaction
 from task.serializers.user_serializers import UserSerializer
+from task.services.money import from_minor_units, get_default_currency, to_minor_units
+from task.services.transaction import EXPORT_FORMATS
+from task.services.user_cache import get_cached_user
+
+
+class AmountField(serializers.DecimalField):
+    """Transaction amount as decimal string, stored as integer minor units of transaction currency"""
+
+    def __init__(self, **kwargs):
+        super().__init__(max_digits=None, decimal_places=None, **kwargs)
+
+    def get_attribute(self, instance):
+        return from_minor_units(instance.amount, instance.currency)
+
+
+class CachedUserSerializer(UserSerializer):
+    """
+    Owner of a transaction without a join or a query: already loaded owner,
+    the user of the request for own transactions, otherwise the user cache
+    """
+
+    def get_attribute(self, instance):
+        if Transaction.user.is_cached(instance):
+            return instance.user
+        request = self.context.get('request')
+        if request is not None and request.user.pk == instance.user_id:
+            return request.user
+        return get_cached_user(instance.user_id)
 
 
 class TransactionSerializer(serializers.ModelSerializer):
+    amount = AmountField()
+    currency = serializers.RegexField(r'^[A-Z]{3}$', required=False)
+
+    def validate(self, attrs):
+        currency = attrs.get('currency') or getattr(self.instance, 'currency', None) or get_default_currency()
+        if 'amount' in attrs:
+            try:
+                attrs['amount'] = to_minor_units(attrs['amount'], currency)
+            except ValueError as e:
+                raise serializers.ValidationError({'amount': [str(e)]})
+        return attrs
+
     class Meta:
         model = Transaction
-        fields = ('amount',)
+        fields = ('amount', 'currency')
 
 
-class TransactionOutputSerializer(serializers.ModelSerializer):
+class TransactionOutputSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for transaction model"""
-    user = UserSerializer(read_only=True)
+    user = CachedUserSerializer(read_only=True)
+    amount = AmountField()
+
+    class Meta:
+        model = Transaction
+        fields = ('id', 'user', 'amount', 'currency', 'date')
+
+
+class TransactionCompactOutputSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for transaction model without owner, used when owner is sent once per response"""
+    amount = AmountField()
 
     class Meta:
         model = Transaction
-        fields = ('id', 'user', 'amount', 'date')
+        fields = ('id', 'amount', 'currency', 'date')
+
+
+class TransactionBulkUpdateSerializer(serializers.Serializer):
+    """
+    Serializer for one item of bulk transaction update,
+    amount is converted to minor units once currency of the transaction is known
+    """
+    id = serializers.IntegerField()
+    amount = AmountField()
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+    class Meta:
+        fields = ('id', 'amount')
+
+
+class TransactionBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+    class Meta:
+        fields = ('ids',)
 
 
 class TransactionSortByDateSerializer(serializers.Serializer):
-    start_date = serializers.DateField()
-    end_date = serializers.DateField()
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
 
     def update(self, instance, validated_data):
         pass
@@ -35,8 +117,32 @@ class TransactionSortByDateSerializer(serializers.Serializer):
         )
 
 
-class TransactionSortByDateOutputSerializer(TransactionSortByDateSerializer):
-    sum = serializers.FloatField()
+class TransactionSumByDateSerializer(TransactionSortByDateSerializer):
+    currency = serializers.RegexField(r'^[A-Z]{3}$', required=False)
+
+    class Meta:
+        fields = TransactionSortByDateSerializer.Meta.fields + ('currency',)
+
+
+class TransactionExportSerializer(serializers.Serializer):
+    """Query parameters of transaction export"""
+    export_format = serializers.ChoiceField(choices=list(EXPORT_FORMATS), default='ndjson')
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+    class Meta:
+        fields = ('export_format', 'start_date', 'end_date')
+
+
+class TransactionSortByDateOutputSerializer(TimedSerializerMixin, TransactionSortByDateSerializer):
+    sum = serializers.DecimalField(max_digits=None, decimal_places=None, allow_null=True)
+    currency = serializers.CharField()
 
     class Meta:
-        fields = TransactionSortByDateSerializer.Meta.fields + ('sum',)
+        fields = TransactionSortByDateSerializer.Meta.fields + ('sum', 'currency')
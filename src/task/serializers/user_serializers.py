@@ -1,9 +1,11 @@
 from rest_framework import serializers
 
+from task.instrumentation import TimedSerializerMixin
+
 from task.models import CustomUser
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for user instance to update, read and patch"""
 
     email = serializers.EmailField(read_only=True)
@@ -20,3 +22,21 @@ class CreateUserSerializer(UserSerializer):
 
     class Meta(UserSerializer.Meta):
         fields = UserSerializer.Meta.fields + ("password",)
+
+
+class BulkCreateUserSerializer(serializers.Serializer):
+    """Serializer for one item of bulk user creation"""
+
+    email = serializers.EmailField(max_length=254)
+    password = serializers.CharField(max_length=128, trim_whitespace=False)
+    first_name = serializers.CharField(max_length=150, allow_blank=True, default="")
+    last_name = serializers.CharField(max_length=150, allow_blank=True, default="")
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+    class Meta:
+        fields = ("email", "password", "first_name", "last_name")
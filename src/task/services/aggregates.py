@@ -0,0 +1,172 @@
+from datetime import date as Date
+from typing import Iterable, List, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, QuerySet, Sum, Value
+from django.db.models.functions import Greatest, Least
+
+from task.models import DailyTransactionAggregate, Transaction
+
+
+def add_to_daily_aggregate(user_id: int, currency: str, day: Date, amount: int) -> None:
+    """Add one transaction amount to the rollup of its day"""
+    updated = DailyTransactionAggregate.objects.filter(
+        user_id=user_id, currency=currency, date=day
+    ).update(
+        sum=F("sum") + amount,
+        count=F("count") + 1,
+        min=Least("min", Value(amount)),
+        max=Greatest("max", Value(amount)),
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            DailyTransactionAggregate.objects.create(
+                user_id=user_id,
+                currency=currency,
+                date=day,
+                sum=amount,
+                count=1,
+                min=amount,
+                max=amount,
+            )
+    except IntegrityError:
+        # rollup row was created by a concurrent request, add to it instead
+        add_to_daily_aggregate(user_id, currency, day, amount)
+
+
+def remove_from_daily_aggregate(
+    user_id: int, currency: str, day: Date, amount: int
+) -> None:
+    """Remove one transaction amount from the rollup of its day"""
+    # min and max can be decremented only if the amount is not one of them
+    updated = DailyTransactionAggregate.objects.filter(
+        user_id=user_id, currency=currency, date=day, min__lt=amount, max__gt=amount
+    ).update(sum=F("sum") - amount, count=F("count") - 1)
+
+    if not updated:
+        rebuild_daily_aggregate(user_id, currency, day)
+
+
+def replace_in_daily_aggregate(
+    user_id: int, currency: str, day: Date, old_amount: int, new_amount: int
+) -> None:
+    """Change one transaction amount inside the rollup of its day"""
+    updated = DailyTransactionAggregate.objects.filter(
+        user_id=user_id,
+        currency=currency,
+        date=day,
+        min__lt=old_amount,
+        max__gt=old_amount,
+    ).update(
+        sum=F("sum") + (new_amount - old_amount),
+        min=Least("min", Value(new_amount)),
+        max=Greatest("max", Value(new_amount)),
+    )
+
+    if not updated:
+        rebuild_daily_aggregate(user_id, currency, day)
+
+
+def rebuild_daily_aggregate(user_id: int, currency: str, day: Date) -> None:
+    """Recalculate rollup of one day from raw transactions"""
+    bucket = {"user_id": user_id, "currency": currency, "date": day}
+    with transaction.atomic():
+        values = Transaction.objects.filter(**bucket).aggregate(
+            sum=Sum("amount"), count=Count("id"), min=Min("amount"), max=Max("amount")
+        )
+        if values["count"]:
+            DailyTransactionAggregate.objects.update_or_create(
+                **bucket, defaults=values
+            )
+        else:
+            DailyTransactionAggregate.objects.filter(**bucket).delete()
+
+
+def refresh_daily_aggregates(user_id: int, days: Iterable[Date]) -> None:
+    """Recalculate rollups of several days of one user, used after bulk changes"""
+    days = set(days)
+    with transaction.atomic():
+        DailyTransactionAggregate.objects.filter(
+            user_id=user_id, date__in=days
+        ).delete()
+        DailyTransactionAggregate.objects.bulk_create(
+            DailyTransactionAggregate(**row)
+            for row in _raw_daily_aggregates([user_id]).filter(date__in=days)
+        )
+
+
+def _raw_daily_aggregates(user_ids: Optional[Iterable[int]] = None) -> QuerySet:
+    transactions = Transaction.objects.all()
+    if user_ids is not None:
+        transactions = transactions.filter(user_id__in=user_ids)
+    return (
+        transactions.values("user_id", "currency", "date")
+        .annotate(
+            sum=Sum("amount"), count=Count("id"), min=Min("amount"), max=Max("amount")
+        )
+        .order_by("user_id", "currency", "date")
+    )
+
+
+def rebuild_daily_aggregates(
+    user_ids: Optional[Iterable[int]] = None, batch_size: int = 1000
+) -> int:
+    """
+    Recalculate rollups of given users (or of all users) from raw transactions.
+    Returns number of rollup rows written
+    """
+    user_ids = list(user_ids) if user_ids is not None else None
+    written = 0
+
+    with transaction.atomic():
+        aggregates = DailyTransactionAggregate.objects.all()
+        if user_ids is not None:
+            aggregates = aggregates.filter(user_id__in=user_ids)
+        aggregates.delete()
+
+        batch = []
+        for row in _raw_daily_aggregates(user_ids).iterator():
+            batch.append(DailyTransactionAggregate(**row))
+            if len(batch) == batch_size:
+                DailyTransactionAggregate.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        DailyTransactionAggregate.objects.bulk_create(batch)
+        written += len(batch)
+
+    return written
+
+
+def verify_daily_aggregates(user_ids: Optional[Iterable[int]] = None) -> List[str]:
+    """Compare rollups with raw transactions, returns description of every mismatch"""
+    user_ids = list(user_ids) if user_ids is not None else None
+    aggregates = DailyTransactionAggregate.objects.all()
+    if user_ids is not None:
+        aggregates = aggregates.filter(user_id__in=user_ids)
+
+    fields = ("user_id", "currency", "date", "sum", "count", "min", "max")
+    stored = {
+        (row["user_id"], row["currency"], row["date"]): row
+        for row in aggregates.values(*fields)
+    }
+    mismatches = []
+
+    # amounts are integers, so rollups have to match exactly
+    for row in _raw_daily_aggregates(user_ids).iterator():
+        key = (row["user_id"], row["currency"], row["date"])
+        aggregate = stored.pop(key, None)
+        if aggregate is None:
+            mismatches.append("user {}, {} {}: rollup is missing".format(*key))
+        elif aggregate != row:
+            mismatches.append(
+                "user {}, {} {}: ".format(*key)
+                + f"rollup {aggregate} != transactions {row}"
+            )
+
+    for key in stored:
+        mismatches.append("user {}, {} {}: rollup has no transactions".format(*key))
+
+    return mismatches
@@ -0,0 +1,54 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool which runs blocking database work of async views.
+    Every worker thread keeps its own database connection,
+    so ASYNC_DB_POOL_SIZE is the max number of connections async views open
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_DB_POOL_SIZE, thread_name_prefix="async-db"
+            )
+    return _executor
+
+
+def _call_with_connection_cleanup(func: Callable, *args, **kwargs) -> Any:
+    # worker threads live outside of the request cycle, so request_started/finished
+    # never close their stale connections, it's done here around every call
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_db_pool(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run blocking (ORM, cache, authentication) function in the database thread pool.
+    Unlike sync_to_async(thread_sensitive=True) calls don't queue up on one thread,
+    up to ASYNC_DB_POOL_SIZE of them run in parallel and the rest wait for a free connection
+    """
+    loop = asyncio.get_running_loop()
+    # run_in_executor doesn't copy context variables, request metrics need them
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_db_executor(),
+        functools.partial(
+            context.run, _call_with_connection_cleanup, func, *args, **kwargs
+        ),
+    )
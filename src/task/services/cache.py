@@ -0,0 +1,94 @@
+import hashlib
+import time
+from typing import Any, Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+
+from task.services.metrics import record_cache_lookup
+
+# kinds of per user data with their own version counter
+TRANSACTIONS = "transactions"
+USER = "user"
+
+
+def get_transactions_cache() -> BaseCache:
+    return caches[settings.TRANSACTION_CACHE_ALIAS]
+
+
+def _version_key(kind: str, user_id: int) -> str:
+    return f"{kind}:version:{user_id}"
+
+
+def _modified_key(kind: str, user_id: int) -> str:
+    return f"{kind}:modified:{user_id}"
+
+
+def get_version(kind: str, user_id: int) -> int:
+    """Current version of user data, every cached read is keyed by it"""
+    cache = get_transactions_cache()
+    version = cache.get(_version_key(kind, user_id))
+    if version is None:
+        # version was never set or was evicted, a timestamp can't match
+        # any version used before, so no stale entry can be read
+        cache.add(_version_key(kind, user_id), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(kind, user_id))
+    return version
+
+
+def get_last_modified(kind: str, user_id: int) -> float:
+    """Timestamp of the last change of user data, current time if it is unknown"""
+    cache = get_transactions_cache()
+    cache.add(_modified_key(kind, user_id), time.time(), timeout=None)
+    return cache.get(_modified_key(kind, user_id))
+
+
+def _bump_version(kind: str, user_id: int) -> None:
+    cache = get_transactions_cache()
+    try:
+        cache.incr(_version_key(kind, user_id))
+    except ValueError:  # key is missing
+        cache.set(_version_key(kind, user_id), time.time_ns(), timeout=None)
+    cache.set(_modified_key(kind, user_id), time.time(), timeout=None)
+
+
+def bump_version(kind: str, user_ids: Iterable[int]) -> None:
+    """
+    Invalidate cached reads of user data.
+    Version is bumped right away and once more after commit, so entries cached
+    by other requests before the change became visible are dropped too
+    """
+    user_ids = set(user_ids)
+    for user_id in user_ids:
+        _bump_version(kind, user_id)
+
+    def bump_after_commit():
+        for user_id in user_ids:
+            _bump_version(kind, user_id)
+
+    transaction.on_commit(bump_after_commit)
+
+
+def get_transactions_version(user_id: int) -> int:
+    return get_version(TRANSACTIONS, user_id)
+
+
+def bump_transactions_version(user_ids: Iterable[int]) -> None:
+    bump_version(TRANSACTIONS, user_ids)
+
+
+def get_or_set_transactions_data(
+    user_id: int, key_parts: tuple, get_data: Callable[[], Any]
+) -> Any:
+    """Return cached response data of user transactions or calculate and cache it"""
+    cache = get_transactions_cache()
+    digest = hashlib.md5(repr(key_parts).encode()).hexdigest()
+    key = f"transactions:{user_id}:{get_transactions_version(user_id)}:{digest}"
+
+    data = cache.get(key)
+    record_cache_lookup("transactions", data is not None)
+    if data is None:
+        data = get_data()
+        cache.set(key, data, timeout=settings.TRANSACTION_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,116 @@
+"""
+Synthetic datasets for load tests: users and transactions are inserted in bulk,
+millions of transactions take minutes instead of hours of per row factories
+"""
+
+import datetime
+import random
+import uuid
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from task.models import CustomUser
+from task.services.aggregates import rebuild_daily_aggregates
+from task.services.cache import bump_transactions_version
+from task.services.transaction import insert_transaction_rows
+
+EMAIL_DOMAIN = "loadtest.example.com"
+
+# (currency, share of transactions), the rest are in DEFAULT_CURRENCY
+OTHER_CURRENCIES = (("EUR", 0.1), ("JPY", 0.05), ("KWD", 0.01))
+
+# user_id__in lists are kept below the SQLite limit of query parameters
+_USER_IDS_BATCH = 500
+
+
+def create_dataset_users(
+    count: int, password: str, rng: random.Random, batch_size: int = 1000
+) -> List[int]:
+    """
+    Insert `count` users with the same password, hashed once, returns their ids.
+    Emails are unique per call, so datasets can be added to an existing database
+    """
+    run = uuid.uuid4().hex[:8]
+    password = make_password(password)
+    users = (
+        CustomUser(
+            email=f"user{i}.{run}@{EMAIL_DOMAIN}",
+            password=password,
+            first_name=f"Name{rng.randrange(10000)}",
+            last_name=f"Surname{rng.randrange(10000)}",
+        )
+        for i in range(count)
+    )
+    with transaction.atomic():
+        CustomUser.objects.bulk_create(users, batch_size=batch_size)
+    # bulk_create doesn't return primary keys on every database
+    return list(
+        CustomUser.objects.filter(email__endswith=f".{run}@{EMAIL_DOMAIN}")
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def iter_transaction_rows(
+    user_ids: List[int], count: int, days: int, rng: random.Random
+) -> Iterator[Tuple[int, int, str, datetime.date]]:
+    """
+    `count` random (user_id, amount, currency, date) rows. Activity of users follows
+    a Pareto distribution (few users make most transactions), amounts are log-normal
+    (median ~30 major units) and dates are uniform over the last `days` days
+    """
+    weights = [rng.paretovariate(1.16) for _ in user_ids]
+    currencies = [currency for currency, _ in OTHER_CURRENCIES]
+    currencies.append(settings.DEFAULT_CURRENCY)
+    currency_weights = [share for _, share in OTHER_CURRENCIES]
+    currency_weights.append(1 - sum(currency_weights))
+    today = datetime.date.today()
+
+    while count > 0:
+        batch = min(count, 10000)
+        count -= batch
+        for user_id, currency in zip(
+            rng.choices(user_ids, weights, k=batch),
+            rng.choices(currencies, currency_weights, k=batch),
+        ):
+            yield (
+                user_id,
+                int(rng.lognormvariate(8, 1.5)) + 1,
+                currency,
+                today - datetime.timedelta(days=rng.randrange(days)),
+            )
+
+
+def generate_dataset(
+    users: int,
+    transactions: int,
+    days: int = 365,
+    password: str = "loadtest-password",
+    seed: Optional[int] = None,
+    chunk_size: int = 50000,
+) -> List[int]:
+    """
+    Insert `users` users and `transactions` transactions between them and rebuild
+    their daily rollups, returns ids of the users. Transactions are inserted in
+    committed chunks of `chunk_size` rows with COPY on PostgreSQL
+    """
+    rng = random.Random(seed)
+    user_ids = create_dataset_users(users, password, rng)
+
+    rows = iter_transaction_rows(user_ids, transactions, days, rng)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        with transaction.atomic():
+            insert_transaction_rows(chunk)
+
+    # rollups are rebuilt once at the end instead of per row, as import does
+    for i in range(0, len(user_ids), _USER_IDS_BATCH):
+        rebuild_daily_aggregates(user_ids[i : i + _USER_IDS_BATCH])
+    bump_transactions_version(user_ids)
+    return user_ids
@@ -0,0 +1,319 @@
+import decimal
+import sys
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+# ints with up to this many bits are converted to str directly, ~900 decimal digits,
+# far below the default sys.get_int_max_str_digits() limit of 4300 digits
+_DIRECT_STR_BITS = 3000
+
+# ints with up to this many bits are converted to Decimal directly
+_DIRECT_DECIMAL_BITS = 128
+
+# indices closer than this are reached by additions in batches, farther ones by addition formula
+_MAX_WALK_STEPS = 64
+
+
+class BoundedLRUCache:
+    """
+    Least recently used cache of tuples of big ints, bounded by total size of cached ints
+    in bytes instead of number of entries, F(n) takes ~n * 0.087 bytes
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, ...], int]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[int, ...]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: Hashable, values: Tuple[int, ...]) -> None:
+        size = sum(sys.getsizeof(value) for value in values)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= old[1]
+            while self._entries and self.size_bytes + size > self.max_bytes:
+                self.size_bytes -= self._entries.popitem(last=False)[1][1]
+            self._entries[key] = (values, size)
+            self.size_bytes += size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache: Optional[BoundedLRUCache] = None
+
+
+def get_fibonacci_cache() -> BoundedLRUCache:
+    """Process wide memo of computed numbers, FIBONACCI_CACHE_MAX_BYTES big"""
+    global _cache
+    if _cache is None:
+        _cache = BoundedLRUCache(settings.FIBONACCI_CACHE_MAX_BYTES)
+    return _cache
+
+
+def _check_index(n: int) -> None:
+    if n < 0:
+        raise ValueError(f"Fibonacci number index must be >= 0, got {n}")
+
+
+def _check_modulus(modulus: Optional[int]) -> None:
+    if modulus is not None and modulus < 1:
+        raise ValueError(f"Modulus must be >= 1, got {modulus}")
+
+
+def _double(a: int, b: int) -> Tuple[int, int]:
+    """
+    (F(2k), F(2k + 1)) from (F(k), F(k + 1)):
+    F(2k) = 2 * F(k) * F(k + 1) - F(k) ** 2 = F(k + 1) ** 2 - (F(k + 1) - F(k)) ** 2,
+    F(2k + 1) = F(k) ** 2 + F(k + 1) ** 2. Squaring is cheaper than multiplying two ints
+    """
+    a2, b2, c = a * a, b * b, b - a
+    return b2 - c * c, a2 + b2
+
+
+def fibonacci_pair(n: int, modulus: Optional[int] = None) -> Tuple[int, int]:
+    """
+    (F(n), F(n + 1)), optionally modulo `modulus`, by fast doubling, O(log n) big int squarings.
+    Bits of n are read from the most significant one, so only two numbers are kept.
+    Doubling starts from the longest prefix of n bits found in the cache,
+    e.g. pair of n reuses cached pair of n // 2
+    """
+    _check_index(n)
+    _check_modulus(modulus)
+    cache = get_fibonacci_cache()
+
+    a, b = 0, 1  # F(0), F(1)
+    shift = n.bit_length()
+    for prefix_shift in range(n.bit_length() + 1):
+        cached = cache.get(("pair", n >> prefix_shift, modulus))
+        if cached is not None:
+            (a, b), shift = cached, prefix_shift
+            break
+
+    for i in range(shift - 1, -1, -1):
+        a, b = _double(a, b)
+        if (n >> i) & 1:
+            a, b = b, a + b
+        if modulus is not None:
+            a, b = a % modulus, b % modulus
+
+    if shift:
+        cache.set(("pair", n, modulus), (a, b))
+    return a, b
+
+
+def fibonacci(n: int, modulus: Optional[int] = None) -> int:
+    """n'th Fibonacci number, F(0) = 0, F(1) = 1, optionally modulo `modulus`"""
+    if modulus is not None:
+        return fibonacci_pair(n, modulus)[0]
+
+    _check_index(n)
+    cache = get_fibonacci_cache()
+    cached = cache.get(("value", n))
+    if cached is not None:
+        return cached[0]
+
+    a, b = fibonacci_pair(n >> 1)
+    # numbers double in size every step, so the last one costs as much as all
+    # the previous together, only the needed half of it is calculated
+    value = a * a + b * b if n & 1 else a * (2 * b - a)
+    cache.set(("value", n), (value,))
+    return value
+
+
+def _advance(
+    pair: Tuple[int, int], steps: int, modulus: Optional[int]
+) -> Tuple[int, int]:
+    """(F(n + steps), F(n + steps + 1)) from (F(n), F(n + 1))"""
+    a, b = pair
+    if steps <= _MAX_WALK_STEPS:
+        for _ in range(steps):
+            a, b = b, a + b
+            if modulus is not None:
+                b %= modulus
+        return a, b
+
+    # F(n + d) = F(n) * (F(d + 1) - F(d)) + F(n + 1) * F(d),
+    # F(n + d + 1) = F(n) * F(d) + F(n + 1) * F(d + 1)
+    c, d = fibonacci_pair(steps, modulus)
+    a, b = a * (d - c) + b * c, a * c + b * d
+    if modulus is not None:
+        a, b = a % modulus, b % modulus
+    return a, b
+
+
+def fibonacci_many(indices: Iterable[int], modulus: Optional[int] = None) -> List[int]:
+    """
+    F(n) of every index, optionally modulo `modulus`, in order of `indices`.
+    Indices are visited in ascending order in one pass, every number is derived from the
+    previous one: by additions if indices are close and by addition formula otherwise
+    """
+    indices = list(indices)
+    for n in indices:
+        _check_index(n)
+    _check_modulus(modulus)
+
+    values = {}
+    previous, pair = None, None
+    for n in sorted(set(indices)):
+        if pair is None:
+            pair = fibonacci_pair(n, modulus)
+        else:
+            pair = _advance(pair, n - previous, modulus)
+        values[n], previous = pair[0], n
+    return [values[n] for n in indices]
+
+
+def fibonacci_range(start: int, end: int, modulus: Optional[int] = None) -> List[int]:
+    """F(start), F(start + 1), ..., F(end), optionally modulo `modulus`"""
+    return fibonacci_many(range(start, end + 1), modulus)
+
+
+def fibonacci_iterative(n: int) -> int:
+    """F(n) by n additions, reference implementation for tests and benchmarks"""
+    _check_index(n)
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def fibonacci_matrix(n: int) -> int:
+    """
+    F(n) as element of [[1, 1], [1, 0]] ** n computed by squaring,
+    does ~4x more multiplications than fast doubling, kept for benchmarks
+    """
+    _check_index(n)
+    # [[a, b], [b, c]] is symmetric, so 3 numbers describe the matrix
+    result = (1, 0, 1)  # identity
+    power = (1, 1, 0)
+    while n:
+        if n & 1:
+            result = _multiply_matrices(result, power)
+        power = _multiply_matrices(power, power)
+        n >>= 1
+    return result[1]
+
+
+def _multiply_matrices(
+    x: Tuple[int, int, int], y: Tuple[int, int, int]
+) -> Tuple[int, int, int]:
+    return (
+        x[0] * y[0] + x[1] * y[1],
+        x[0] * y[1] + x[1] * y[2],
+        x[1] * y[1] + x[2] * y[2],
+    )
+
+
+def _exact_context() -> decimal.Context:
+    """Decimal context of unlimited precision which raises instead of rounding"""
+    context = decimal.Context(
+        prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN
+    )
+    context.traps[decimal.Inexact] = True
+    return context
+
+
+def _int_to_decimal(value: int) -> decimal.Decimal:
+    """
+    Exact Decimal of a non negative int by divide and conquer: value = high * 2 ** k + low.
+    Decimal multiplication of libmpdec is subquadratic for big numbers, unlike
+    int -> str conversion of CPython, and powers of 2 are computed once per exponent
+    """
+    powers_of_two = {}
+
+    def power_of_two(exponent: int) -> decimal.Decimal:
+        power = powers_of_two.get(exponent)
+        if power is None:
+            if exponent <= _DIRECT_DECIMAL_BITS:
+                power = decimal.Decimal(2) ** exponent
+            else:
+                half = exponent >> 1
+                power = power_of_two(half) * power_of_two(exponent - half)
+            powers_of_two[exponent] = power
+        return power
+
+    def convert(number: int, bits: int) -> decimal.Decimal:
+        if bits <= _DIRECT_DECIMAL_BITS:
+            return decimal.Decimal(number)
+        half = bits >> 1
+        high = number >> half
+        low = number - (high << half)
+        return convert(low, half) + convert(high, bits - half) * power_of_two(half)
+
+    with decimal.localcontext(_exact_context()):
+        return convert(value, value.bit_length())
+
+
+def _iter_decimal_chunks(
+    number: decimal.Decimal, width: int, chunk_size: int, context: decimal.Context
+) -> Iterator[str]:
+    """
+    Digits of an integral Decimal below 10 ** width, zero padded to `width`.
+    The number is split as high * 10 ** k + low, the leading part is yielded
+    before the rest is split, so only chunks of `chunk_size` digits become strings
+    """
+    if width <= chunk_size:
+        yield str(number).zfill(width)
+        return
+    # high part is a whole number of chunks, so all of them but the last are full
+    high_width = (width // chunk_size + 1) // 2 * chunk_size
+    low_width = width - high_width
+    # shifting by a power of 10 only moves the exponent of a Decimal, it's linear
+    high = number.scaleb(-low_width, context).to_integral_value(
+        decimal.ROUND_DOWN, context
+    )
+    low = context.subtract(number, high.scaleb(low_width, context))
+    del number
+    yield from _iter_decimal_chunks(high, high_width, chunk_size, context)
+    del high
+    yield from _iter_decimal_chunks(low, low_width, chunk_size, context)
+
+
+def iter_decimal_digits(value: int, chunk_size: int = 65536) -> Iterator[str]:
+    """
+    Decimal representation of an int of any size, yielded in chunks of `chunk_size` digits.
+    str() refuses ints longer than sys.get_int_max_str_digits() and is quadratic,
+    so big numbers are converted to Decimal and its digits are streamed without building
+    the whole string, a million digits take ~0.5s
+    """
+    if value < 0:
+        yield "-"
+        value = -value
+    if value.bit_length() <= _DIRECT_STR_BITS:
+        yield str(value)
+        return
+
+    number = _int_to_decimal(value)
+    # the context is passed explicitly, the thread's context is not changed between chunks
+    chunks = _iter_decimal_chunks(
+        number, number.adjusted() + 1, chunk_size, _exact_context()
+    )
+    del number
+    yield from chunks
+
+
+def to_decimal_string(value: int) -> str:
+    """Decimal representation of an int of any size"""
+    return "".join(iter_decimal_digits(value))
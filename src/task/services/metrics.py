@@ -0,0 +1,249 @@
+"""
+In-process metrics registry rendered in Prometheus text format by GET /api/metrics/.
+With prefork servers every worker process has its own registry, so with METRICS_DIR set
+every process periodically (METRICS_FLUSH_INTERVAL) writes a snapshot of it to its own file
+there and the endpoint sums snapshots of all processes, including finished ones.
+Gauges are current values, so only those of running processes are reported.
+Clean the directory when the server is restarted
+"""
+
+import atexit
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# upper bounds of latency histogram buckets in seconds, +Inf bucket is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = "api_requests_total"
+REQUEST_DURATION = "api_request_duration_seconds"
+CACHE_REQUESTS = "cache_requests_total"
+
+_HELP = {
+    REQUESTS: ("counter", "API requests by view action and response status"),
+    REQUEST_DURATION: ("histogram", "API request latency by view action"),
+    CACHE_REQUESTS: ("counter", "Cache lookups by cache and result (hit or miss)"),
+    "cache_hit_ratio": ("gauge", "Share of cache lookups which were hits"),
+    "db_pool_connections_in_use": ("gauge", "Checked out connections of the pool"),
+    "db_pool_max_connections": ("gauge", "Max number of connections of the pool"),
+}
+
+
+class MetricsRegistry:
+    """Counters and fixed bucket histograms, keyed by name and sorted label pairs"""
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], list] = {}
+        # callbacks returning [(name, labels, value)] of gauges, sampled on flush
+        self.gauge_callbacks: List[
+            Callable[[], Iterable[Tuple[str, Labels, float]]]
+        ] = []
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        # pid can be reused by a later worker, file of a finished one is kept
+        self._file_name = f"{os.getpid()}-{uuid.uuid4().hex}.json"
+
+    def inc(self, name: str, labels: Labels, amount: float = 1) -> None:
+        with self._lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                # counts of every bucket and +Inf, sum, count
+                histogram = self.histograms[(name, labels)] = [
+                    [0] * (len(LATENCY_BUCKETS) + 1),
+                    0.0,
+                    0,
+                ]
+            histogram[0][bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self) -> dict:
+        gauges = [
+            [name, list(labels) + [("pid", str(os.getpid()))], value]
+            for callback in self.gauge_callbacks
+            for name, labels, value in callback()
+        ]
+        with self._lock:
+            return {
+                "counters": [[n, list(ls), v] for (n, ls), v in self.counters.items()],
+                "histograms": [
+                    [n, list(ls), list(h[0]), h[1], h[2]]
+                    for (n, ls), h in self.histograms.items()
+                ],
+                "gauges": gauges,
+            }
+
+    def maybe_flush(self) -> None:
+        if settings.METRICS_DIR and (
+            time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write snapshot to the file of this process in METRICS_DIR"""
+        if not settings.METRICS_DIR:
+            return
+        self._last_flush = time.monotonic()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = os.path.join(settings.METRICS_DIR, self._file_name)
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(self.snapshot(), file)
+        os.replace(f"{path}.tmp", path)  # readers never see a partial file
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> MetricsRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+            _registry.gauge_callbacks.append(_db_pool_gauges)
+            atexit.register(_registry.flush)
+    return _registry
+
+
+def _db_pool_gauges() -> Iterable[Tuple[str, Labels, float]]:
+    # the pool backend imports psycopg2, so it's inspected only if it's in use
+    backend = sys.modules.get("task.backends.postgresql_pool.base")
+    if backend is None:
+        return
+    for database, in_use, max_size in backend.get_pool_usage():
+        yield "db_pool_connections_in_use", (("database", database),), in_use
+        yield "db_pool_max_connections", (("database", database),), max_size
+
+
+def record_request(view: str, action: str, status: int, duration: float) -> None:
+    """Count API request and add its duration to the latency histogram"""
+    if not settings.METRICS_ENABLED:
+        return
+    registry = get_registry()
+    labels = (("view", view), ("action", action))
+    registry.inc(REQUESTS, labels + (("status", str(status)),))
+    registry.observe(REQUEST_DURATION, labels, duration)
+    registry.maybe_flush()
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    if settings.METRICS_ENABLED:
+        get_registry().inc(
+            CACHE_REQUESTS, (("cache", cache), ("result", "hit" if hit else "miss"))
+        )
+
+
+def collect_snapshots() -> List[dict]:
+    """Snapshots of all processes, or only of this one without METRICS_DIR"""
+    registry = get_registry()
+    if not settings.METRICS_DIR:
+        return [registry.snapshot()]
+
+    registry.flush()
+    snapshots = []
+    for file_name in os.listdir(settings.METRICS_DIR):
+        if file_name.endswith(".json"):
+            try:
+                with open(os.path.join(settings.METRICS_DIR, file_name)) as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):  # removed meanwhile
+                continue
+            # counters of a finished process stay in the totals, its gauges are stale
+            if not _is_running(int(file_name.split("-", 1)[0])):
+                snapshot["gauges"] = []
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)  # only checks that the process exists
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, but belongs to another user
+        return True
+    return True
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in labels
+    )
+    pairs = ",".join(f'{name}="{value}"' for name, value in escaped)
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def render_prometheus(snapshots: List[dict]) -> str:
+    """Sum counters and histograms of all snapshots, in Prometheus text exposition format"""
+    counters: Dict[Tuple[str, Labels], float] = {}
+    histograms: Dict[Tuple[str, Labels], list] = {}
+    gauges: Dict[Tuple[str, Labels], float] = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            summed = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            summed[0] = [a + b for a, b in zip(summed[0], buckets)]
+            summed[1] += total
+            summed[2] += count
+        for name, labels, value in snapshot["gauges"]:
+            gauges[(name, tuple(map(tuple, labels)))] = value
+
+    # hit ratio of every cache over all processes
+    lookups: Dict[str, Dict[str, float]] = {}
+    for (name, labels), value in counters.items():
+        if name == CACHE_REQUESTS:
+            labels = dict(labels)
+            lookups.setdefault(labels["cache"], {})[labels["result"]] = value
+    for cache, results in lookups.items():
+        gauges[("cache_hit_ratio", (("cache", cache),))] = results.get("hit", 0) / sum(
+            results.values()
+        )
+
+    lines = []
+    for metrics in (counters, gauges):
+        for name in sorted({name for name, _ in metrics}):
+            lines.extend(_header(name))
+            for (metric_name, labels), value in sorted(metrics.items()):
+                if metric_name == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+    for name in sorted({name for name, _ in histograms}):
+        lines.extend(_header(name))
+        for (metric_name, labels), (buckets, total, count) in sorted(
+            histograms.items()
+        ):
+            if metric_name != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                cumulative += bucket_count
+                bucket_labels = labels + (("le", str(bound)),)
+                lines.append(
+                    f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def _header(name: str) -> List[str]:
+    metric_type, help_text = _HELP.get(name, ("untyped", name))
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
@@ -0,0 +1,58 @@
+from decimal import Decimal, InvalidOperation
+from typing import Union
+
+from django.conf import settings
+
+# ISO 4217 currencies whose minor unit isn't 1/100, every other currency has 2 decimals
+CURRENCY_EXPONENTS = {
+    "BHD": 3,
+    "BIF": 0,
+    "CLP": 0,
+    "IQD": 3,
+    "ISK": 0,
+    "JOD": 3,
+    "JPY": 0,
+    "KMF": 0,
+    "KRW": 0,
+    "KWD": 3,
+    "LYD": 3,
+    "OMR": 3,
+    "PYG": 0,
+    "TND": 3,
+    "UGX": 0,
+    "VND": 0,
+    "XAF": 0,
+    "XOF": 0,
+}
+
+# amounts are stored in BigIntegerField
+MAX_MINOR_UNITS = 2**63 - 1
+
+
+def get_default_currency() -> str:
+    return settings.DEFAULT_CURRENCY
+
+
+def get_currency_exponent(currency: str) -> int:
+    return CURRENCY_EXPONENTS.get(currency, 2)
+
+
+def to_minor_units(amount: Union[Decimal, str, int], currency: str) -> int:
+    """Convert decimal amount to integer minor units, e.g. Decimal('12.5') USD -> 1250"""
+    try:
+        minor = Decimal(amount).scaleb(get_currency_exponent(currency))
+    except InvalidOperation:
+        raise ValueError(f"{amount} is not a number")
+    if not minor.is_finite() or minor != minor.to_integral_value():
+        raise ValueError(
+            f"{currency} amount can't have more than "
+            f"{get_currency_exponent(currency)} decimal places"
+        )
+    if abs(minor) > MAX_MINOR_UNITS:
+        raise ValueError(f"{amount} is too big")
+    return int(minor)
+
+
+def from_minor_units(amount: int, currency: str) -> Decimal:
+    """Convert integer minor units to decimal amount, e.g. 1250 USD -> Decimal('12.50')"""
+    return Decimal(amount).scaleb(-get_currency_exponent(currency))
@@ -0,0 +1,64 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+
+from task.models import CustomUser
+from task.services.user_cache import get_cached_user
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+_SALT = "task.services.tokens"
+
+
+def _password_fingerprint(user: CustomUser) -> str:
+    # tokens stop working once the password is changed, as sessions do
+    return user.get_session_auth_hash()[:16]
+
+
+def make_token(user: CustomUser, kind: str) -> str:
+    """
+    Signed (HMAC of SECRET_KEY) token of the user, the signing time is part of it,
+    so the expiry is checked without any storage
+    """
+    return signing.dumps(
+        {"user_id": user.pk, "kind": kind, "password": _password_fingerprint(user)},
+        salt=_SALT,
+    )
+
+
+def issue_tokens(user: CustomUser) -> dict:
+    """Short lived access token for API requests and long lived one to refresh it"""
+    return {
+        "access": make_token(user, ACCESS),
+        "refresh": make_token(user, REFRESH),
+        "expires_in": settings.ACCESS_TOKEN_LIFETIME,
+    }
+
+
+def get_token_user(token: str, kind: str) -> Optional[CustomUser]:
+    """Active user of a valid not expired token of the given kind, else None"""
+    max_age = (
+        settings.ACCESS_TOKEN_LIFETIME
+        if kind == ACCESS
+        else settings.REFRESH_TOKEN_LIFETIME
+    )
+    try:
+        payload = signing.loads(token, salt=_SALT, max_age=max_age)
+    except signing.BadSignature:  # SignatureExpired is a subclass
+        return None
+    if payload.get("kind") != kind:
+        return None
+
+    user = get_cached_user(payload.get("user_id"))
+    if (
+        user is None
+        or not user.is_active
+        or not constant_time_compare(
+            payload.get("password", ""), _password_fingerprint(user)
+        )
+    ):
+        return None
+    return user
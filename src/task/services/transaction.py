@@ -0,0 +1,249 @@
+import csv
+import datetime
+import io
+import json
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Q, QuerySet
+
+from task.models import CustomUser, DailyTransactionAggregate, Transaction
+from task.services.aggregates import refresh_daily_aggregates
+from task.services.cache import bump_transactions_version
+from task.services.money import from_minor_units, get_default_currency, to_minor_units
+
+EXPORT_FIELDS = ("id", "user_id", "amount", "currency", "date")
+
+
+def filter_by_date(
+    queryset: QuerySet, start_date: Optional[str] = None, end_date: Optional[str] = None
+) -> QuerySet:
+    """Filter transactions (or their daily rollups) by date range"""
+    if start_date and end_date:
+        return queryset.filter(date__range=[start_date, end_date])
+    elif start_date and not end_date:
+        return queryset.filter(date__gte=start_date)
+    elif not start_date and end_date:
+        return queryset.filter(date__lte=end_date)
+    return queryset
+
+
+class Echo:
+    """Pseudo buffer for csv.writer which returns written row instead of storing it"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_transaction_rows(transactions: QuerySet) -> Iterator[list]:
+    """
+    Read transactions with a server-side cursor and yield them in chunks,
+    so memory usage doesn't depend on history size.
+    Amounts are converted from minor units to decimal strings
+    """
+    chunk_size = settings.TRANSACTION_EXPORT_CHUNK_SIZE
+    rows = transactions.order_by("date", "id").values_list(*EXPORT_FIELDS)
+    if connections[transactions.db].settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+        # without server-side cursors (PgBouncer transaction pooling) iterator()
+        # would fetch the whole result at once, rows are read page by page instead
+        rows = _iter_rows_by_keyset(rows, chunk_size)
+    else:
+        rows = rows.iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for id_, user_id, amount, currency, day in rows:
+        chunk.append(
+            (id_, user_id, str(from_minor_units(amount, currency)), currency, day)
+        )
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_rows_by_keyset(rows: QuerySet, page_size: int) -> Iterator[tuple]:
+    """Read EXPORT_FIELDS rows ordered by (date, id) with one query per page"""
+    page = list(rows[:page_size])
+    while page:
+        yield from page
+        last_id, last_date = page[-1][0], page[-1][-1]
+        page = list(
+            rows.filter(date__gte=last_date).filter(
+                Q(date__gt=last_date) | Q(id__gt=last_id)
+            )[:page_size]
+        )
+
+
+def stream_transactions_ndjson(transactions: QuerySet) -> Iterator[str]:
+    """Yield transactions as newline delimited JSON, one chunk of rows at a time"""
+    for chunk in iter_transaction_rows(transactions):
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str) + "\n"
+            for row in chunk
+        )
+
+
+def stream_transactions_csv(transactions: QuerySet) -> Iterator[str]:
+    """Yield transactions as CSV with a header row, one chunk of rows at a time"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+
+    for chunk in iter_transaction_rows(transactions):
+        yield "".join(writer.writerow(row) for row in chunk)
+
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", stream_transactions_ndjson),
+    "csv": ("text/csv", stream_transactions_csv),
+}
+
+
+def bulk_create_transactions(user: CustomUser, items: List[dict]) -> List[Transaction]:
+    """
+    Insert validated transactions with one INSERT per database batch, primary keys
+    are set on the returned instances on every database
+    """
+    with transaction.atomic():
+        transactions = Transaction.objects.bulk_create(
+            Transaction(user=user, **item) for item in items
+        )
+        if transactions and not connection.features.can_return_rows_from_bulk_insert:
+            # bulk_create sets primary keys only where the database returns inserted
+            # rows. The new rows are the last ones of the user: on SQLite the write
+            # lock taken by the INSERT keeps other writers out until commit
+            ids = Transaction.objects.filter(user=user).order_by("-id")
+            ids = ids.values_list("id", flat=True)[: len(transactions)]
+            for instance, pk in zip(transactions, reversed(ids)):
+                instance.pk = pk
+        refresh_daily_aggregates(user.pk, {t.date for t in transactions})
+        bump_transactions_version([user.pk])
+    return transactions
+
+
+def bulk_update_transactions(
+    user: CustomUser, transactions: List[Transaction], items: List[dict]
+) -> List[Transaction]:
+    """
+    Apply validated changes to transactions loaded by `in_bulk`,
+    all of them are written with one UPDATE per database batch
+    """
+    today = datetime.date.today()  # same value DateField(auto_now=True) writes on save
+    days = {t.date for t in transactions} | {today}
+
+    for instance, item in zip(transactions, items):
+        instance.amount = item["amount"]
+        instance.date = today
+
+    with transaction.atomic():
+        Transaction.objects.bulk_update(transactions, ["amount", "date"])
+        refresh_daily_aggregates(user.pk, days)
+        bump_transactions_version([user.pk])
+    return transactions
+
+
+def _delete_transactions_where(column: str, values: List[int]) -> int:
+    """
+    DELETE ... WHERE column IN (values), number of deleted rows. QuerySet.delete() would
+    load every row to send post_delete, which updates the rollup of each row,
+    callers recalculate or delete rollups of the touched days once instead
+    """
+    quote_name = connection.ops.quote_name
+    table = quote_name(Transaction._meta.db_table)
+    placeholders = ", ".join(["%s"] * len(values))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE {quote_name(column)} IN ({placeholders})",
+            values,
+        )
+        return cursor.rowcount
+
+
+def bulk_delete_transactions(user: CustomUser, ids: Iterable[int]) -> int:
+    """Delete user transactions with a single DELETE ... WHERE id IN statement"""
+    with transaction.atomic():
+        rows = list(
+            Transaction.objects.filter(user=user, id__in=ids).values_list("id", "date")
+        )
+        if not rows:
+            return 0
+        deleted = _delete_transactions_where("id", [pk for pk, _ in rows])
+        refresh_daily_aggregates(user.pk, {day for _, day in rows})
+        bump_transactions_version([user.pk])
+    return deleted
+
+
+def delete_user_transactions(user_id: int) -> int:
+    """
+    Delete all transactions and daily rollups of the user with one statement each,
+    before the user is deleted. Cascade delete of the user would load every transaction
+    and update rollups row by row in post_delete receivers
+    """
+    with transaction.atomic():
+        DailyTransactionAggregate.objects.filter(user_id=user_id).delete()
+        deleted = _delete_transactions_where(
+            Transaction._meta.get_field("user").column, [user_id]
+        )
+        bump_transactions_version([user_id])
+    return deleted
+
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def iter_import_rows(file: IO[str], file_format: str) -> Iterator[dict]:
+    """Read transactions file line by line, CSV must have a header row"""
+    if file_format == "csv":
+        yield from csv.DictReader(file)
+        return
+
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def parse_import_row(row: dict) -> Tuple[int, int, str, datetime.date]:
+    """
+    Convert one imported row to (user_id, amount in minor units, currency, date),
+    raises ValueError if row is invalid
+    """
+    try:
+        currency = row.get("currency") or get_default_currency()
+        # str() keeps decimal amounts of NDJSON exact, Decimal(12.1) != Decimal("12.1")
+        amount = to_minor_units(str(row["amount"]), currency)
+        day = row.get("date")
+        return (
+            int(row["user_id"]),
+            amount,
+            currency,
+            datetime.date.fromisoformat(day) if day else datetime.date.today(),
+        )
+    except KeyError as e:
+        raise ValueError(f"{e.args[0]} is missing")
+
+
+def insert_transaction_rows(rows: List[Tuple[int, int, str, datetime.date]]) -> None:
+    """
+    Insert (user_id, amount, currency, date) rows as they are, with COPY FROM STDIN on PostgreSQL
+    and executemany elsewhere. bulk_create isn't used because auto_now would replace dates
+    """
+    quote_name = connection.ops.quote_name
+    table = quote_name(Transaction._meta.db_table)
+    columns = ", ".join(
+        quote_name(Transaction._meta.get_field(field).column)
+        for field in ("user", "amount", "currency", "date")
+    )
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {table} ({columns}) VALUES (%s, %s, %s, %s)", rows
+            )
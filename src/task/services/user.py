@@ -1,20 +1,41 @@
+from typing import List, Optional
+
 from django.contrib.auth import password_validation
-from django.contrib.auth.password_validation import UserAttributeSimilarityValidator
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models.functions import Lower
 
+from task.hashers import make_passwords
 from task.models import CustomUser
+from task.services.transaction import delete_user_transactions
 
+EMAIL_TAKEN_MESSAGE = "Email has already been taken"
 
-def validate_create_user_data(data: dict) -> list:
-    """Email and password validation"""
-    error_messages = []
 
-    if CustomUser.objects.filter(email=data.get("email")).exists():
-        error_messages.append("Email has already been taken")
+def validate_create_user_data(data: dict) -> list:
+    """
+    Password validation, uniqueness of email is checked by the database on insert,
+    see create_user
+    """
+    return validate_password(data)
 
-    error_messages.extend(validate_password(data))
 
-    return error_messages
+def create_user(data: dict) -> Optional[CustomUser]:
+    """
+    Create user with one INSERT, None if the email is already taken (in any case).
+    A check before the insert would cost a query and still let concurrent signups
+    with the same email through
+    """
+    try:
+        with transaction.atomic():
+            return CustomUser.objects.create_user(
+                data.get("email"),
+                data.get("password"),
+                first_name=data.get("first_name") or "",
+                last_name=data.get("last_name") or "",
+            )
+    except IntegrityError:
+        return None
 
 
 def validate_password(sign_up_data: dict) -> list:
@@ -22,13 +43,11 @@ def validate_password(sign_up_data: dict) -> list:
     error_messages = []
 
     try:
-        password = sign_up_data.get("password")
-        password_validation.validate_password(password=password)
-
         # We create a temporary user, which we do not write to database,
         # in order to check the password with UserAttributeSimilarityValidator
-        UserAttributeSimilarityValidator().validate(
-            password, CustomUser(email=sign_up_data.get("email"))
+        password_validation.validate_password(
+            password=sign_up_data.get("password"),
+            user=CustomUser(email=sign_up_data.get("email")),
         )
 
     except ValidationError as e:
@@ -36,3 +55,73 @@ def validate_password(sign_up_data: dict) -> list:
             error_messages.extend(password_error.messages)
 
     return error_messages
+
+
+def validate_users_data(items: List[dict]) -> List[dict]:
+    """
+    Errors of every item of bulk signup data validated by BulkCreateUserSerializer,
+    an empty dict for a valid item. Taken emails are found with one query
+    """
+    emails = [item["email"].lower() for item in items]
+    taken = set(
+        CustomUser.objects.annotate(email_lower=Lower("email"))
+        .filter(email_lower__in=emails)
+        .values_list("email_lower", flat=True)
+    )
+
+    errors, seen = [], set()
+    for item, email in zip(items, emails):
+        item_errors = {}
+        if email in taken:
+            item_errors["email"] = [EMAIL_TAKEN_MESSAGE]
+        elif email in seen:
+            item_errors["email"] = ["Email is repeated in the batch"]
+        seen.add(email)
+
+        password_errors = validate_password(item)
+        if password_errors:
+            item_errors["password"] = password_errors
+        errors.append(item_errors)
+    return errors
+
+
+def bulk_create_users(
+    items: List[dict], hashing_workers: Optional[int] = None
+) -> List[CustomUser]:
+    """
+    Insert users validated by validate_users_data with one INSERT per database batch,
+    passwords are hashed by make_passwords in `hashing_workers` processes.
+    Primary keys are set on the returned users. Raises IntegrityError if an email was taken after validation
+    """
+    passwords = make_passwords(
+        [item["password"] for item in items], workers=hashing_workers
+    )
+    users = [
+        CustomUser(
+            email=CustomUser.objects.normalize_email(item["email"]),
+            password=password,
+            first_name=item.get("first_name", ""),
+            last_name=item.get("last_name", ""),
+        )
+        for item, password in zip(items, passwords)
+    ]
+    with transaction.atomic():
+        users = CustomUser.objects.bulk_create(users)
+        if users and not connection.features.can_return_rows_from_bulk_insert:
+            # bulk_create sets primary keys only where the database returns
+            # inserted rows, elsewhere they are selected by the unique emails
+            ids = dict(
+                CustomUser.objects.filter(
+                    email__in=[user.email for user in users]
+                ).values_list("email", "id")
+            )
+            for user in users:
+                user.pk = ids[user.email]
+    return users
+
+
+def delete_user(user: CustomUser) -> None:
+    """Delete the user, their transactions and rollups are deleted set-based first"""
+    with transaction.atomic():
+        delete_user_transactions(user.pk)
+        user.delete()
@@ -0,0 +1,112 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+
+from task.models import CustomUser
+from task.services.metrics import record_cache_lookup
+
+
+class TTLCache:
+    """Least recently used cache of at most `max_size` entries, each kept up to `ttl` seconds"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            while self._entries and len(self._entries) >= self.max_size:
+                self._entries.popitem(last=False)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_local_cache: Optional[TTLCache] = None
+
+
+def get_local_user_cache() -> TTLCache:
+    """Users cached in this process, USER_CACHE_SIZE entries for USER_CACHE_TTL seconds"""
+    global _local_cache
+    if _local_cache is None:
+        _local_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+    return _local_cache
+
+
+def _get_shared_cache() -> Optional[BaseCache]:
+    return caches[settings.USER_CACHE_ALIAS] if settings.USER_CACHE_ALIAS else None
+
+
+def _shared_key(pk: int) -> str:
+    return f"user:{pk}"
+
+
+def get_cached_user(pk: int) -> Optional[CustomUser]:
+    """
+    User by primary key, read through the process local cache and the shared one
+    (USER_CACHE_ALIAS, if set), None if there is no such user. Every caller gets its own copy,
+    so changing or deleting it doesn't affect other requests
+    """
+    local_cache = get_local_user_cache()
+    user = local_cache.get(pk)
+    record_cache_lookup("user", user is not None)
+    if user is None:
+        shared_cache = _get_shared_cache()
+        if shared_cache is not None:
+            user = shared_cache.get(_shared_key(pk))
+            record_cache_lookup("user_shared", user is not None)
+        if user is None:
+            user = CustomUser.objects.filter(pk=pk).first()
+            if user is None:
+                return None
+            if shared_cache is not None:
+                shared_cache.set(_shared_key(pk), user, timeout=settings.USER_CACHE_TTL)
+        local_cache.set(pk, user)
+    return copy.copy(user)
+
+
+def _delete_cached_user(pk: int) -> None:
+    get_local_user_cache().delete(pk)
+    shared_cache = _get_shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(_shared_key(pk))
+
+
+def invalidate_cached_user(pk: int) -> None:
+    """
+    Drop the cached user right away and once more after commit, so a copy cached by
+    another request before the change became visible is dropped too.
+    Local caches of other processes expire after USER_CACHE_TTL seconds
+    """
+    _delete_cached_user(pk)
+    transaction.on_commit(lambda: _delete_cached_user(pk))
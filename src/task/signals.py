@@ -0,0 +1,126 @@
+import time
+
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from task.models import CustomUser, Transaction
+from task.services.aggregates import (
+    add_to_daily_aggregate,
+    remove_from_daily_aggregate,
+    replace_in_daily_aggregate,
+)
+from task.services.cache import (
+    TRANSACTIONS,
+    USER,
+    bump_transactions_version,
+    bump_version,
+)
+from task.services.user_cache import invalidate_cached_user
+
+
+def _amount(instance: Transaction) -> int:
+    # amount can still be a raw request value if it was assigned directly
+    return Transaction._meta.get_field("amount").to_python(instance.amount)
+
+
+@receiver(pre_save, sender=Transaction)
+def load_stored_transaction(sender, instance: Transaction, raw=False, **kwargs):
+    """Fetch stored values of transactions which weren't loaded from database"""
+    if raw or instance._state.adding or hasattr(instance, "_loaded_values"):
+        return
+    instance._loaded_values = (
+        Transaction.objects.filter(pk=instance.pk)
+        .values("user_id", "amount", "currency", "date")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Transaction)
+def update_transaction_summaries_on_save(
+    sender, instance: Transaction, created: bool, raw=False, **kwargs
+):
+    if raw:
+        return
+
+    amount = _amount(instance)
+    bucket = (instance.user_id, instance.currency, instance.date)
+    stored = None if created else getattr(instance, "_loaded_values", None)
+
+    if not stored:
+        add_to_daily_aggregate(*bucket, amount)
+    elif (stored["user_id"], stored["currency"], stored["date"]) == bucket:
+        replace_in_daily_aggregate(*bucket, stored["amount"], amount)
+    else:
+        remove_from_daily_aggregate(
+            stored["user_id"], stored["currency"], stored["date"], stored["amount"]
+        )
+        add_to_daily_aggregate(*bucket, amount)
+
+    bump_transactions_version(
+        {instance.user_id, stored["user_id"]} if stored else {instance.user_id}
+    )
+
+    instance._loaded_values = {
+        "user_id": instance.user_id,
+        "amount": amount,
+        "currency": instance.currency,
+        "date": instance.date,
+    }
+
+
+@receiver(post_delete, sender=Transaction)
+def update_transaction_summaries_on_delete(sender, instance: Transaction, **kwargs):
+    stored = getattr(instance, "_loaded_values", None) or {
+        "user_id": instance.user_id,
+        "amount": _amount(instance),
+        "currency": instance.currency,
+        "date": instance.date,
+    }
+    remove_from_daily_aggregate(
+        stored["user_id"], stored["currency"], stored["date"], stored["amount"]
+    )
+    bump_transactions_version([stored["user_id"]])
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_reads(sender, instance: CustomUser, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_cached_user(instance.pk)
+    bump_version(USER, [instance.pk])
+    # transactions are serialized together with their owner
+    bump_version(TRANSACTIONS, [instance.pk])
+
+
+@receiver(request_started)
+def check_database_connections(**kwargs):
+    """
+    Close persistent connections which stopped working (e.g. database was restarted)
+    before the request uses them, like CONN_HEALTH_CHECKS of newer Django versions.
+    Only connections idle for CONN_HEALTH_CHECK_IDLE seconds are checked, one which
+    served a request a moment ago is almost surely alive, so busy workers
+    don't pay a round trip per request
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        settings_dict = connection.settings_dict
+        if (
+            settings_dict.get("CONN_HEALTH_CHECKS")
+            and connection.connection is not None
+            and now - getattr(connection, "last_request_finished", 0)
+            >= settings_dict.get("CONN_HEALTH_CHECK_IDLE", 0)
+            and not connection.is_usable()
+        ):
+            connection.close()
+
+
+@receiver(request_finished)
+def mark_database_connections_used(**kwargs):
+    # runs after close_old_connections, connections still open are kept for the next request
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.last_request_finished = now
@@ -0,0 +1,135 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.test import AsyncClient, Client
+from rest_framework import status
+
+from task.asgi import ASGIHandler
+from task.services.money import from_minor_units
+from task.tests.factories.transaction_factory import TransactionFactory
+from task.tests.factories.user_factory import UserFactory
+
+
+@pytest.fixture
+def async_client() -> AsyncClient:
+    return AsyncClient()
+
+
+@async_to_sync
+async def request(method, *args, **kwargs):
+    """Send request of AsyncClient from synchronous test"""
+    return await method(*args, **kwargs)
+
+
+# async views query the database from pool threads with their own connections,
+# so test data has to be committed
+@pytest.mark.django_db(transaction=True)
+def test_async_read_endpoints_match_sync(async_client, api_client):
+    user = UserFactory.create()
+    transactions = TransactionFactory.create_batch(3, user=user)
+    TransactionFactory.create()  # transaction of another user
+    async_client.force_login(user)
+    api_client.force_login(user)
+
+    for path in (
+        "transaction/",
+        "transaction/?compact=true&page_size=2",
+        f"transaction/{transactions[0].pk}/",
+        "user/get_current_user/",
+    ):
+        r = request(async_client.get, f"/api/async/{path}")
+        assert r.status_code == status.HTTP_200_OK
+        expected = api_client.get(f"/api/{path}").json()
+        if expected.get("next"):
+            expected["next"] = expected["next"].replace("/api/", "/api/async/")
+        assert r.json() == expected
+
+    r = request(
+        async_client.post,
+        "/api/async/transaction/view_sum_of_transactions_by_date/",
+        {},
+        content_type="application/json",
+    )
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json()["sum"] == str(
+        from_minor_units(sum(t.amount for t in transactions), "USD")
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_read_endpoints_fail(async_client):
+    r = request(async_client.get, "/api/async/transaction/")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    other_transaction = TransactionFactory.create()
+    async_client.force_login(UserFactory.create())
+    r = request(async_client.get, f"/api/async/transaction/{other_transaction.pk}/")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_reads_run_concurrently(async_client):
+    user = UserFactory.create()
+    TransactionFactory.create_batch(3, user=user)
+    async_client.force_login(user)
+
+    @async_to_sync
+    async def get_many():
+        return await asyncio.gather(
+            *(async_client.get("/api/async/transaction/") for _ in range(10))
+        )
+
+    responses = get_many()
+    assert {r.status_code for r in responses} == {status.HTTP_200_OK}
+    assert len({r.content for r in responses}) == 1
+
+
+@async_to_sync
+async def asgi_get(path: str, cookies: dict) -> tuple:
+    """Status, headers and body of GET request sent to the ASGI application"""
+    cookie = "; ".join(f"{name}={value}" for name, value in cookies.items())
+    communicator = ApplicationCommunicator(
+        ASGIHandler(),
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [(b"host", b"testserver"), (b"cookie", cookie.encode())],
+        },
+    )
+    await communicator.send_input({"type": "http.request"})
+    start = await communicator.receive_output(timeout=5)
+    body = b""
+    while True:
+        message = await communicator.receive_output(timeout=5)
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    await communicator.wait()
+    return start["status"], dict(start["headers"]), body
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_under_asgi(settings):
+    settings.TRANSACTION_EXPORT_CHUNK_SIZE = 2
+    user = UserFactory.create()
+    transactions = TransactionFactory.create_batch(5, user=user)
+    TransactionFactory.create()  # transaction of another user
+    client = Client()
+    client.force_login(user)
+    cookies = {name: morsel.value for name, morsel in client.cookies.items()}
+
+    # the export generator queries the database after the headers are sent
+    status_code, headers, body = asgi_get("/api/transaction/export/", cookies)
+    assert status_code == status.HTTP_200_OK
+    assert headers[b"Content-Type"] == b"application/x-ndjson"
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert [row["id"] for row in rows] == [t.pk for t in transactions]
+
+    status_code, _, body = asgi_get("/api/transaction/", cookies)
+    assert status_code == status.HTTP_200_OK
+    assert len(json.loads(body)["results"]) == 5
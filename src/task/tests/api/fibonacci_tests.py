@@ -0,0 +1,83 @@
+import pytest
+from rest_framework import status
+
+from task.tests.factories.user_factory import UserFactory
+
+
+@pytest.mark.django_db
+def test_get_fibonacci_success(api_client):
+    api_client.force_authenticate(user=UserFactory.create())
+
+    r = api_client.get("/api/fibonacci/0/")
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json() == {"n": 0, "value": "0"}
+
+    r = api_client.get("/api/fibonacci/100/")
+    assert r.json() == {"n": 100, "value": "354224848179261915075"}
+
+
+@pytest.mark.django_db
+def test_get_fibonacci_fail(api_client, settings):
+    r = api_client.get("/api/fibonacci/10/")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    settings.FIBONACCI_MAX_N = 10
+    api_client.force_authenticate(user=UserFactory.create())
+    r = api_client.get("/api/fibonacci/11/")
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    r = api_client.get("/api/fibonacci/-1/")
+    assert r.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_get_fibonacci_modulo(api_client, settings):
+    settings.FIBONACCI_MAX_N = 10
+    api_client.force_authenticate(user=UserFactory.create())
+
+    r = api_client.get("/api/fibonacci/100/?modulo=1000")
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json() == {"n": 100, "value": "75"}
+
+    r = api_client.get(f"/api/fibonacci/{10 ** 18}/?modulo=1000000007")
+    assert r.status_code == status.HTTP_200_OK
+
+    # more digits than int() converts
+    for path in (
+        f"/api/fibonacci/{'9' * 5000}/",
+        f"/api/fibonacci/{'9' * 5000}/?modulo=7",
+    ):
+        r = api_client.get(path)
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
+        assert r.json() == ["n has too many digits"]
+
+
+@pytest.mark.django_db
+def test_fibonacci_batch_success(api_client):
+    api_client.force_authenticate(user=UserFactory.create())
+
+    r = api_client.get("/api/fibonacci/batch/?start=8&end=11")
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json() == [
+        {"n": 8, "value": "21"},
+        {"n": 9, "value": "34"},
+        {"n": 10, "value": "55"},
+        {"n": 11, "value": "89"},
+    ]
+
+    r = api_client.get("/api/fibonacci/batch/?indices=100,1,100&modulo=1000")
+    assert [row["value"] for row in r.json()] == ["75", "1", "75"]
+
+
+@pytest.mark.django_db
+def test_fibonacci_batch_fail(api_client, settings):
+    settings.FIBONACCI_BATCH_MAX_SIZE = 3
+    api_client.force_authenticate(user=UserFactory.create())
+
+    for query in ("", "start=5", "start=5&end=4", "indices=1,a", "start=0&end=3"):
+        r = api_client.get(f"/api/fibonacci/batch/?{query}")
+        assert r.status_code == status.HTTP_400_BAD_REQUEST, query
+
+    # more digits than int() converts
+    r = api_client.get(f"/api/fibonacci/batch/?indices=1,{'9' * 5000}&modulo=7")
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    assert r.json() == {"non_field_errors": ["n has too many digits"]}
@@ -0,0 +1,39 @@
+import pytest
+from django.test import override_settings
+from rest_framework import status
+
+from task.tests.factories.user_factory import UserFactory
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(api_client):
+    user = UserFactory.create()
+    api_client.force_login(user)
+    api_client.get("/api/transaction/")
+    api_client.get("/api/transaction/")
+
+    r = api_client.get("/api/metrics/")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    user.is_staff = True
+    user.save()
+    r = api_client.get("/api/metrics/")
+    assert r.status_code == status.HTTP_200_OK
+    assert r["Content-Type"].startswith("text/plain")
+    text = r.content.decode()
+    assert (
+        'api_requests_total{view="TransactionViewSet",action="list",status="200"}'
+        in text
+    )
+    assert 'cache_hit_ratio{cache="transactions"}' in text
+
+
+@pytest.mark.django_db
+@override_settings(METRICS_TOKEN="scraper-token")
+def test_metrics_endpoint_with_token(api_client):
+    r = api_client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer wrong")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    r = api_client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer scraper-token")
+    assert r.status_code == status.HTTP_200_OK
+    assert "# TYPE api_request_duration_seconds histogram" in r.content.decode()
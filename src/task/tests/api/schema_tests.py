@@ -0,0 +1,61 @@
+import pytest
+from rest_framework import status
+
+from task import schema
+from task.tests.factories.user_factory import UserFactory
+
+
+@pytest.fixture(autouse=True)
+def reset_schema():
+    schema._schema = None
+    yield
+    schema._schema = None
+
+
+@pytest.mark.django_db
+def test_schema_success(api_client):
+    api_client.force_authenticate(user=UserFactory.create())
+
+    r = api_client.get("/api/schema.json")
+
+    assert r.status_code == status.HTTP_200_OK
+    assert r["Content-Type"] == "application/json"
+    assert "/transaction/" in r.json()["paths"]
+    assert not any(path.startswith("/async/") for path in r.json()["paths"])
+    assert "max-age=86400" in r["Cache-Control"]
+    assert "private" in r["Cache-Control"]
+
+    r = api_client.get("/api/schema.json", HTTP_IF_NONE_MATCH=r["ETag"])
+    assert r.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not r.content
+
+
+@pytest.mark.django_db
+def test_schema_fail(api_client):
+    r = api_client.get("/api/schema.json")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_schema_from_file(api_client, settings, tmp_path):
+    path = tmp_path / "openapi.json"
+    path.write_text('{"paths": {}}')
+    settings.OPENAPI_SCHEMA_PATH = str(path)
+    api_client.force_authenticate(user=UserFactory.create())
+
+    assert api_client.get("/api/schema.json").json() == {"paths": {}}
+
+
+@pytest.mark.django_db
+def test_docs_pages(api_client):
+    r = api_client.get("/api/swagger/")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=UserFactory.create())
+    for path in ("/api/swagger/", "/api/redoc/"):
+        r = api_client.get(path)
+        assert r.status_code == status.HTTP_200_OK
+        assert r["Content-Type"].startswith("text/html")
+        # the page loads the cached schema, its view has no JSON renderer
+        assert "/api/schema.json" in r.content.decode()
+        assert api_client.get(f"{path}?format=openapi").status_code == 404
@@ -0,0 +1,94 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from task.tests.factories.user_factory import UserFactory
+
+
+@pytest.fixture
+def user():
+    user = UserFactory.create()
+    user.set_password("Secret-Pass")
+    user.save()
+    return user
+
+
+@pytest.mark.django_db
+def test_token_authentication(api_client, user):
+    r = api_client.post(
+        path="/api/token/",
+        data={"email": user.email, "password": "wrong"},
+        format="json",
+    )
+    assert r.status_code == status.HTTP_401_UNAUTHORIZED
+
+    r = api_client.post(
+        path="/api/token/",
+        data={"email": user.email, "password": "Secret-Pass"},
+        format="json",
+    )
+    assert r.status_code == status.HTTP_200_OK
+    tokens = r.json()
+    assert tokens["expires_in"] == 300
+
+    with CaptureQueriesContext(connection) as queries:
+        r = api_client.get(
+            path="/api/user/get_current_user/",
+            HTTP_AUTHORIZATION=f"Bearer {tokens['access']}",
+        )
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json()["email"] == user.email
+    # only the user is loaded by primary key, the session table isn't queried
+    assert len(queries) == 1
+    assert "task_customuser" in queries[0]["sql"]
+
+    # refresh token isn't accepted as access token and vice versa
+    r = api_client.get(
+        path="/api/user/get_current_user/",
+        HTTP_AUTHORIZATION=f"Bearer {tokens['refresh']}",
+    )
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+    r = api_client.post(
+        path="/api/token/refresh/", data={"refresh": tokens["access"]}, format="json"
+    )
+    assert r.status_code == status.HTTP_401_UNAUTHORIZED
+
+    r = api_client.post(
+        path="/api/token/refresh/", data={"refresh": tokens["refresh"]}, format="json"
+    )
+    assert r.status_code == status.HTTP_200_OK
+    r = api_client.get(
+        path="/api/user/get_current_user/",
+        HTTP_AUTHORIZATION=f"Bearer {r.json()['access']}",
+    )
+    assert r.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_token_expiry_and_revocation(api_client, user):
+    tokens = api_client.post(
+        path="/api/token/",
+        data={"email": user.email, "password": "Secret-Pass"},
+        format="json",
+    ).json()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+    with override_settings(ACCESS_TOKEN_LIFETIME=-1):
+        r = api_client.get(path="/api/user/get_current_user/")
+        assert r.status_code == status.HTTP_403_FORBIDDEN
+        assert r.json()["detail"] == "Invalid or expired token"
+
+    r = api_client.get(path="/api/user/get_current_user/")
+    assert r.status_code == status.HTTP_200_OK
+
+    # changing the password revokes all tokens
+    user.set_password("Other-Pass")
+    user.save()
+    r = api_client.get(path="/api/user/get_current_user/")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+    r = api_client.post(
+        path="/api/token/refresh/", data={"refresh": tokens["refresh"]}, format="json"
+    )
+    assert r.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,156 @@
+import factory
+import pytest
+from django.db import connection
+from django.db.models import QuerySet, Sum
+
+from task.models import DailyTransactionAggregate, Transaction
+from task.tests.factories.transaction_factory import TransactionFactory
+from task.tests.factories.user_factory import UserFactory
+
+# tests pinning query plans and number of queries of TransactionViewSet actions
+
+
+def explain(queryset: QuerySet) -> str:
+    if connection.vendor == "postgresql":
+        # tables in tests are tiny, without this planner always prefers seq scan
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+@pytest.fixture
+def user_with_transactions(api_client):
+    user = UserFactory.create()
+    transactions = TransactionFactory.create_batch(
+        3, user=user, amount=factory.Iterator([1000, 2000, 3000])
+    )
+    TransactionFactory.create()  # transaction of another user
+    api_client.force_authenticate(user=user)
+    return user, transactions
+
+
+@pytest.mark.django_db
+def test_transactions_by_user_and_date_use_index():
+    user = UserFactory.create()
+    queryset = Transaction.objects.filter(user=user, date__gte="2021-05-01").order_by(
+        "date", "id"
+    )
+
+    plan = explain(queryset)
+    assert "transaction_user_date_id_idx" in plan
+    assert "TEMP B-TREE" not in plan  # ordering comes from the index, no sort step
+
+
+@pytest.mark.django_db
+def test_sum_of_daily_aggregates_uses_index():
+    user = UserFactory.create()
+    queryset = DailyTransactionAggregate.objects.filter(
+        user=user, currency="USD", date__range=["2021-05-01", "2021-05-31"]
+    ).values("user")
+
+    plan = explain(queryset.annotate(total=Sum("sum")))
+    if connection.vendor == "postgresql":
+        assert "daily_transaction_aggregate_user_currency_date" in plan
+    else:
+        # SQLite names the index of a UNIQUE table constraint by itself
+        assert "sqlite_autoindex_task_dailytransactionaggregate_1" in plan
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "method, path, data, num_queries",
+    [
+        ("get", "/api/transaction/", None, 1),
+        ("get", "/api/transaction/?compact=true", None, 1),
+        (
+            "post",
+            "/api/transaction/sort_transactions_by_date/",
+            {"start_date": "2021-05-01", "end_date": "2100-01-01"},
+            1,
+        ),
+        (
+            "post",
+            "/api/transaction/sort_transactions_by_date/?compact=true",
+            {"start_date": "2021-05-01", "end_date": "2100-01-01"},
+            1,
+        ),
+        (
+            "post",
+            "/api/transaction/view_sum_of_transactions_by_date/",
+            {"start_date": "2021-05-01", "end_date": "2100-01-01"},
+            1,
+        ),
+        ("get", "/api/transaction/export/", None, 1),
+    ],
+)
+def test_list_actions_num_queries(
+    api_client,
+    django_assert_num_queries,
+    user_with_transactions,
+    method,
+    path,
+    data,
+    num_queries,
+):
+    with django_assert_num_queries(num_queries):
+        r = getattr(api_client, method)(path, data, format="json")
+        if hasattr(r, "streaming_content"):
+            b"".join(r.streaming_content)
+
+
+@pytest.mark.django_db
+def test_detail_actions_num_queries(
+    api_client, django_assert_num_queries, user_with_transactions
+):
+    user, transactions = user_with_transactions
+
+    # transaction is loaded once, owner comes from the request
+    with django_assert_num_queries(1):
+        api_client.get(f"/api/transaction/{transactions[0].pk}/")
+
+    with django_assert_num_queries(3):
+        api_client.patch(
+            f"/api/transaction/{transactions[1].pk}/", {"amount": 25}, format="json"
+        )
+
+    with django_assert_num_queries(3):
+        api_client.delete(f"/api/transaction/{transactions[1].pk}/")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("compact", ["false", "true"])
+def test_list_num_queries_does_not_grow_with_rows(
+    api_client, django_assert_num_queries, compact
+):
+    user = UserFactory.create()
+    api_client.force_authenticate(user=user)
+
+    for rows in (1, 20):
+        TransactionFactory.create_batch(rows, user=user)
+        with django_assert_num_queries(1):
+            api_client.get(f"/api/transaction/?compact={compact}&page_size=100")
+
+
+@pytest.mark.django_db
+def test_repeated_reads_are_cached(
+    api_client, django_assert_num_queries, user_with_transactions
+):
+    user, transactions = user_with_transactions
+    sum_path = "/api/transaction/view_sum_of_transactions_by_date/"
+
+    for path in ("/api/transaction/", "/api/transaction/?compact=true"):
+        first = api_client.get(path).json()
+        with django_assert_num_queries(0):
+            assert api_client.get(path).json() == first
+    first = api_client.post(sum_path, {}, format="json").json()
+    with django_assert_num_queries(0):
+        assert api_client.post(sum_path, {}, format="json").json() == first
+
+    # any change of user transactions invalidates cached reads
+    api_client.post("/api/transaction/", {"amount": 40}, format="json")
+    assert len(api_client.get("/api/transaction/").json()["results"]) == 4
+    assert api_client.post(sum_path, {}, format="json").json()["sum"] == "100.00"
+
+    transactions[0].delete()
+    assert len(api_client.get("/api/transaction/").json()["results"]) == 3
+    assert api_client.post(sum_path, {}, format="json").json()["sum"] == "90.00"
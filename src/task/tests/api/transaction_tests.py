@@ -1,44 +1,515 @@
+import csv
+import json
+import time
+from datetime import date
+
 import pytest
+from django.db import connection
+from django.utils.http import http_date
 from rest_framework import status
 
+from task.models import Transaction
+from task.services.aggregates import verify_daily_aggregates
+from task.services.cache import TRANSACTIONS, get_transactions_cache
+from task.services.money import from_minor_units
 from task.tests.factories.transaction_factory import TransactionFactory
+from task.tests.factories.user_factory import UserFactory
 
 
 @pytest.mark.django_db
 def test_create_transaction_success(api_client):
-    pass
+    user = UserFactory.create()
+    api_client.force_authenticate(user=user)
+
+    r = api_client.post("/api/transaction/", {"amount": "12.5"}, format="json")
+    assert r.status_code == status.HTTP_201_CREATED
+    assert r.json()["amount"] == "12.50"
+    assert r.json()["currency"] == "USD"
+    assert r.json()["user"]["id"] == user.pk
+    assert Transaction.objects.get(user=user).amount == 1250
+
+    r = api_client.post(
+        "/api/transaction/", {"amount": "1500", "currency": "JPY"}, format="json"
+    )
+    assert r.json()["amount"] == "1500"
+    assert Transaction.objects.get(pk=r.json()["id"]).amount == 1500
 
 
 @pytest.mark.django_db
 def test_create_transaction_fail(api_client):
-    pass
+    r = api_client.post("/api/transaction/", {"amount": 12.5}, format="json")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=UserFactory.create())
+    r = api_client.post("/api/transaction/", {"amount": "abc"}, format="json")
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+
+    # USD has only 2 decimal places, amounts are never rounded silently
+    r = api_client.post("/api/transaction/", {"amount": "0.001"}, format="json")
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    assert "amount" in r.json()
 
 
 @pytest.mark.django_db
 def test_patch_transaction_success(api_client):
-    pass
+    transaction = TransactionFactory.create(amount=1000)
+    api_client.force_authenticate(user=transaction.user)
+
+    r = api_client.patch(
+        f"/api/transaction/{transaction.pk}/", {"amount": "25.75"}, format="json"
+    )
+
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json()["amount"] == "25.75"
+    assert r.json()["user"]["id"] == transaction.user.pk
+    assert Transaction.objects.get(pk=transaction.pk).amount == 2575
+    assert not verify_daily_aggregates([transaction.user.pk])
 
 
 @pytest.mark.django_db
 def test_patch_transaction_fail(api_client):
-    pass
+    transaction = TransactionFactory.create(amount=1000)
+    r = api_client.patch(
+        f"/api/transaction/{transaction.pk}/", {"amount": "1"}, format="json"
+    )
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=UserFactory.create())
+    r = api_client.patch(
+        f"/api/transaction/{transaction.pk}/", {"amount": "1"}, format="json"
+    )
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=transaction.user)
+    r = api_client.patch(f"/api/transaction/{transaction.pk}/", {}, format="json")
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    r = api_client.patch(
+        f"/api/transaction/{transaction.pk}/", {"amount": "0.001"}, format="json"
+    )
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    r = api_client.patch(
+        f"/api/transaction/{transaction.pk + 1}/", {"amount": "1"}, format="json"
+    )
+    assert r.status_code == status.HTTP_404_NOT_FOUND
+    assert Transaction.objects.get(pk=transaction.pk).amount == 1000
 
 
 @pytest.mark.django_db
 def test_get_transaction_success(api_client):
-    pass
+    transaction = TransactionFactory.create(amount=1250, currency="EUR")
+    api_client.force_authenticate(user=transaction.user)
+
+    r = api_client.get(f"/api/transaction/{transaction.pk}/")
+
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json()["id"] == transaction.pk
+    assert r.json()["amount"] == "12.50"
+    assert r.json()["currency"] == "EUR"
+    assert r.json()["date"] == transaction.date.isoformat()
+    assert r.json()["user"]["id"] == transaction.user.pk
 
 
 @pytest.mark.django_db
 def test_get_transaction_fail(api_client):
-    pass
+    transaction = TransactionFactory.create()
+    r = api_client.get(f"/api/transaction/{transaction.pk}/")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=UserFactory.create())
+    r = api_client.get(f"/api/transaction/{transaction.pk}/")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    r = api_client.get(f"/api/transaction/{transaction.pk + 1}/")
+    assert r.status_code == status.HTTP_404_NOT_FOUND
 
 
 @pytest.mark.django_db
 def test_delete_transaction_success(api_client):
-    pass
+    transaction = TransactionFactory.create()
+    api_client.force_authenticate(user=transaction.user)
+
+    r = api_client.delete(f"/api/transaction/{transaction.pk}/")
+
+    assert r.status_code == status.HTTP_204_NO_CONTENT
+    assert not Transaction.objects.filter(pk=transaction.pk).exists()
 
 
 @pytest.mark.django_db
 def test_delete_transaction_fail(api_client):
-    pass
+    transaction = TransactionFactory.create()
+    api_client.force_authenticate(user=UserFactory.create())
+
+    r = api_client.delete(f"/api/transaction/{transaction.pk}/")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+    assert Transaction.objects.filter(pk=transaction.pk).exists()
+
+    r = api_client.delete(f"/api/transaction/{transaction.pk + 1}/")
+    assert r.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_list_transactions_paginated(api_client):
+    user = UserFactory.create()
+    transactions = TransactionFactory.create_batch(5, user=user)
+    TransactionFactory.create_batch(2)  # transactions of another user
+    Transaction.objects.filter(pk=transactions[0].pk).update(date=date(2021, 5, 2))
+    Transaction.objects.filter(pk=transactions[3].pk).update(date=date(2021, 5, 1))
+    api_client.force_authenticate(user=user)
+
+    ids = []
+    url = "/api/transaction/?page_size=2"
+    while url:
+        r = api_client.get(url)
+        assert r.status_code == status.HTTP_200_OK
+        assert len(r.json()["results"]) <= 2
+        ids.extend(transaction["id"] for transaction in r.json()["results"])
+        url = r.json()["next"]
+
+    expected = Transaction.objects.filter(user=user).order_by("date", "id")
+    assert ids == [transaction.pk for transaction in expected]
+    assert ids[:2] == [transactions[3].pk, transactions[0].pk]
+
+
+@pytest.mark.django_db
+def test_list_transactions_paginated_fail(api_client):
+    user = UserFactory.create()
+    api_client.force_authenticate(user=user)
+
+    r = api_client.get("/api/transaction/?cursor=not-a-cursor")
+    assert r.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_list_transactions_page_size_cap(api_client, settings):
+    settings.TRANSACTION_MAX_PAGE_SIZE = 3
+    user = UserFactory.create()
+    TransactionFactory.create_batch(5, user=user)
+    api_client.force_authenticate(user=user)
+
+    r = api_client.get("/api/transaction/?page_size=100")
+    assert r.status_code == status.HTTP_200_OK
+    assert len(r.json()["results"]) == 3
+    assert r.json()["next"] is not None
+
+
+@pytest.mark.django_db
+def test_sort_transactions_by_date_paginated(api_client):
+    user = UserFactory.create()
+    transactions = TransactionFactory.create_batch(4, user=user)
+    other_transaction = TransactionFactory.create()
+    for day, transaction in enumerate(transactions + [other_transaction], start=1):
+        Transaction.objects.filter(pk=transaction.pk).update(date=date(2021, 5, day))
+    api_client.force_authenticate(user=user)
+
+    data = {"start_date": "2021-05-02", "end_date": "2021-05-05"}
+    r = api_client.post(
+        "/api/transaction/sort_transactions_by_date/?page_size=2", data, format="json"
+    )
+    assert r.status_code == status.HTTP_200_OK
+    assert [t["id"] for t in r.json()["results"]] == [
+        transactions[1].pk,
+        transactions[2].pk,
+    ]
+
+    r = api_client.post(r.json()["next"], data, format="json")
+    assert [t["id"] for t in r.json()["results"]] == [transactions[3].pk]
+    assert r.json()["next"] is None
+
+
+@pytest.mark.django_db
+def test_sort_transactions_by_date_fail(api_client):
+    api_client.force_authenticate(user=UserFactory.create())
+
+    for data, invalid_field in (
+        ({"start_date": "garbage"}, "start_date"),
+        ({"start_date": "2021-05-01", "end_date": "2021-13-01"}, "end_date"),
+    ):
+        r = api_client.post(
+            "/api/transaction/sort_transactions_by_date/", data, format="json"
+        )
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
+        assert list(r.json()) == [invalid_field]
+
+    r = api_client.post(
+        "/api/transaction/sort_transactions_by_date/",
+        {"start_date": "", "end_date": None},
+        format="json",
+    )
+    assert r.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_export_transactions_success(api_client, settings):
+    settings.TRANSACTION_EXPORT_CHUNK_SIZE = 2
+    user = UserFactory.create()
+    transactions = TransactionFactory.create_batch(3, user=user)
+    TransactionFactory.create()  # transaction of another user
+    api_client.force_authenticate(user=user)
+
+    r = api_client.get("/api/transaction/export/")
+    assert r.status_code == status.HTTP_200_OK
+    assert r["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in b"".join(r.streaming_content).splitlines()]
+    assert [row["id"] for row in rows] == [t.pk for t in transactions]
+    assert {row["user_id"] for row in rows} == {user.pk}
+
+    r = api_client.get("/api/transaction/export/?export_format=csv")
+    assert r.status_code == status.HTTP_200_OK
+    assert r["Content-Type"] == "text/csv"
+    rows = list(csv.reader(b"".join(r.streaming_content).decode().splitlines()))
+    assert rows[0] == ["id", "user_id", "amount", "currency", "date"]
+    assert [int(row[0]) for row in rows[1:]] == [t.pk for t in transactions]
+
+
+@pytest.mark.django_db
+def test_export_transactions_without_server_side_cursors(
+    api_client, settings, monkeypatch
+):
+    settings.TRANSACTION_EXPORT_CHUNK_SIZE = 2
+    monkeypatch.setitem(connection.settings_dict, "DISABLE_SERVER_SIDE_CURSORS", True)
+    user = UserFactory.create()
+    transactions = TransactionFactory.create_batch(5, user=user)
+    api_client.force_authenticate(user=user)
+
+    r = api_client.get("/api/transaction/export/")
+    rows = [json.loads(line) for line in b"".join(r.streaming_content).splitlines()]
+    assert [row["id"] for row in rows] == [t.pk for t in transactions]
+
+
+@pytest.mark.django_db
+def test_export_transactions_fail(api_client):
+    r = api_client.get("/api/transaction/export/")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=UserFactory.create())
+    r = api_client.get("/api/transaction/export/?export_format=xml")
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    assert "export_format" in r.json()
+
+    for query in ("start_date=garbage", "end_date=2024-13-01"):
+        r = api_client.get(f"/api/transaction/export/?{query}")
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
+        assert query.split("=")[0] in r.json()
+
+
+@pytest.mark.django_db
+def test_view_sum_of_transactions_by_date_success(api_client):
+    user = UserFactory.create()
+    TransactionFactory.create(user=user, amount=1050)
+    TransactionFactory.create(user=user, amount=2000)
+    TransactionFactory.create(user=user, amount=700, currency="EUR")
+    TransactionFactory.create(amount=100000)  # transaction of another user
+    api_client.force_authenticate(user=user)
+
+    today = date.today().isoformat()
+    r = api_client.post(
+        "/api/transaction/view_sum_of_transactions_by_date/",
+        {"start_date": today, "end_date": today},
+        format="json",
+    )
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json()["sum"] == "30.50"
+    assert r.json()["currency"] == "USD"
+
+    r = api_client.post(
+        "/api/transaction/view_sum_of_transactions_by_date/",
+        {"currency": "EUR"},
+        format="json",
+    )
+    assert r.json()["sum"] == "7.00"
+
+    r = api_client.post(
+        "/api/transaction/view_sum_of_transactions_by_date/",
+        {"end_date": "2021-05-01"},
+        format="json",
+    )
+    assert r.json()["sum"] is None
+
+
+@pytest.mark.django_db
+def test_view_sum_of_transactions_by_date_fail(api_client):
+    r = api_client.post(
+        "/api/transaction/view_sum_of_transactions_by_date/", {}, format="json"
+    )
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=UserFactory.create())
+    for data in ({"currency": "nonsense"}, {"currency": "usd"}, {"start_date": "x"}):
+        r = api_client.post(
+            "/api/transaction/view_sum_of_transactions_by_date/", data, format="json"
+        )
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
+        assert list(r.json()) == list(data)
+
+
+@pytest.mark.django_db
+def test_list_transactions_compact(api_client):
+    user = UserFactory.create()
+    transactions = TransactionFactory.create_batch(2, user=user)
+    api_client.force_authenticate(user=user)
+
+    r = api_client.get("/api/transaction/?compact=true")
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json()["user"]["email"] == user.email
+    assert r.json()["results"] == [
+        {
+            "id": t.pk,
+            "amount": str(from_minor_units(t.amount, t.currency)),
+            "currency": t.currency,
+            "date": t.date.isoformat(),
+        }
+        for t in transactions
+    ]
+
+    r = api_client.get("/api/transaction/")
+    assert "user" not in r.json()
+    assert r.json()["results"][0]["user"]["email"] == user.email
+
+
+@pytest.mark.django_db
+def test_bulk_transactions_success(api_client, django_assert_max_num_queries):
+    user = UserFactory.create()
+    api_client.force_authenticate(user=user)
+
+    with django_assert_max_num_queries(9):
+        r = api_client.post(
+            "/api/transaction/bulk/", [{"amount": i} for i in range(50)], format="json"
+        )
+    assert r.status_code == status.HTTP_201_CREATED
+    ids = list(
+        Transaction.objects.filter(user=user)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    assert [item["id"] for item in r.json()] == ids
+    assert [item["amount"] for item in r.json()] == [f"{i}.00" for i in range(50)]
+    assert len(ids) == 50
+
+    r = api_client.patch(
+        "/api/transaction/bulk/",
+        [{"id": ids[0], "amount": 100}, {"id": ids[1], "amount": 200}],
+        format="json",
+    )
+    assert r.status_code == status.HTTP_200_OK
+    assert Transaction.objects.get(pk=ids[1]).amount == 20000
+
+    r = api_client.delete("/api/transaction/bulk/", {"ids": ids[:10]}, format="json")
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json() == {"deleted": 10}
+    assert Transaction.objects.filter(user=user).count() == 40
+    assert verify_daily_aggregates() == []
+
+
+@pytest.mark.django_db
+def test_bulk_transactions_fail(api_client, settings):
+    settings.TRANSACTION_BULK_MAX_SIZE = 2
+    user = UserFactory.create()
+    other_transaction = TransactionFactory.create()
+    api_client.force_authenticate(user=user)
+
+    r = api_client.post(
+        "/api/transaction/bulk/", [{"amount": 1}, {"amount": "abc"}], format="json"
+    )
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    assert r.json()[0] == {}
+    assert "amount" in r.json()[1]
+    assert not Transaction.objects.filter(user=user).exists()
+
+    r = api_client.post("/api/transaction/bulk/", [{"amount": 1}] * 3, format="json")
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+
+    r = api_client.patch(
+        "/api/transaction/bulk/",
+        [{"id": other_transaction.pk, "amount": 1}],
+        format="json",
+    )
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    assert r.json() == [{"id": ["Transaction not found"]}]
+
+    r = api_client.delete(
+        "/api/transaction/bulk/", {"ids": [other_transaction.pk]}, format="json"
+    )
+    assert r.json() == {"deleted": 0}
+    assert Transaction.objects.filter(pk=other_transaction.pk).exists()
+
+
+@pytest.mark.django_db
+def test_list_transactions_not_modified(
+    api_client, django_assert_num_queries, monkeypatch
+):
+    user = UserFactory.create()
+    transaction = TransactionFactory.create(user=user)
+    api_client.force_authenticate(user=user)
+    future = http_date(time.time() + 60)
+
+    # last change in the current second, a change later in the same second would
+    # get the same Last-Modified, so it isn't sent and clients revalidate by ETag
+    monkeypatch.setattr(
+        "task.decorators.get_last_modified", lambda kind, user_id: time.time()
+    )
+    r = api_client.get("/api/transaction/")
+    etag = r["ETag"]
+    assert "Last-Modified" not in r
+    r = api_client.get("/api/transaction/", HTTP_IF_MODIFIED_SINCE=future)
+    assert r.status_code == status.HTTP_200_OK
+
+    modified = time.time() - 10
+    monkeypatch.setattr(
+        "task.decorators.get_last_modified", lambda kind, user_id: modified
+    )
+    r = api_client.get("/api/transaction/")
+    assert r["ETag"] == etag
+    last_modified = r["Last-Modified"]
+    with django_assert_num_queries(0):
+        r = api_client.get("/api/transaction/", HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == status.HTTP_304_NOT_MODIFIED
+    r = api_client.get("/api/transaction/", HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert r.status_code == status.HTTP_304_NOT_MODIFIED
+    r = api_client.get(f"/api/transaction/{transaction.pk}/")
+    assert r["ETag"] != etag
+    r = api_client.get(
+        f"/api/transaction/{transaction.pk}/", HTTP_IF_NONE_MATCH=r["ETag"]
+    )
+    assert r.status_code == status.HTTP_304_NOT_MODIFIED
+    monkeypatch.undo()
+
+    api_client.post("/api/transaction/", {"amount": 1}, format="json")
+    r = api_client.get("/api/transaction/", HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert r.status_code == status.HTTP_200_OK
+    r = api_client.get("/api/transaction/", HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == status.HTTP_200_OK
+    assert r["ETag"] != etag
+    assert len(r.json()["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_not_modified_follows_version_changed_by_other_process(api_client):
+    user = UserFactory.create()
+    TransactionFactory.create(user=user)
+    api_client.force_authenticate(user=user)
+    r = api_client.get("/api/transaction/")
+    etag = r["ETag"]
+
+    # another server process changed the data, only the shared cache knows it
+    cache = get_transactions_cache()
+    cache.incr(f"{TRANSACTIONS}:version:{user.pk}")
+    r = api_client.get("/api/transaction/", HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == status.HTTP_200_OK
+    assert r["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_get_transaction_not_modified_fail(api_client):
+    other_transaction = TransactionFactory.create()
+    api_client.force_authenticate(user=UserFactory.create())
+    future = http_date(time.time() + 60)
+
+    # conditional headers don't hide permission and existence checks
+    r = api_client.get(
+        f"/api/transaction/{other_transaction.pk}/", HTTP_IF_MODIFIED_SINCE=future
+    )
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+    r = api_client.get(
+        f"/api/transaction/{other_transaction.pk + 1}/", HTTP_IF_MODIFIED_SINCE=future
+    )
+    assert r.status_code == status.HTTP_404_NOT_FOUND
@@ -1,9 +1,13 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.crypto import get_random_string
 from rest_framework import status
 
-from task.models import CustomUser
+from task.models import CustomUser, DailyTransactionAggregate, Transaction
 from task.serializers.user_serializers import UserSerializer
+from task.services.aggregates import verify_daily_aggregates
+from task.tests.factories.transaction_factory import TransactionFactory
 from task.tests.factories.user_factory import UserFactory
 
 
@@ -70,6 +74,31 @@ def test_crete_user_fail(api_client):
     assert r.status_code == status.HTTP_400_BAD_REQUEST
 
 
+@pytest.mark.django_db
+def test_create_user_takes_one_insert(api_client):
+    email = get_random_string() + "@example.com"
+    data = {"email": email, "password": get_random_string()}
+
+    with CaptureQueriesContext(connection) as queries:
+        r = api_client.post(path="/api/user/", data=data, format="json")
+    assert r.status_code == status.HTTP_200_OK
+    # savepoint queries come from the transaction of the test
+    statements = [
+        q["sql"] for q in queries.captured_queries if "SAVEPOINT" not in q["sql"]
+    ]
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT")
+    assert r.json()["first_name"] == r.json()["last_name"] == ""
+
+    # email is unique regardless of case
+    r = api_client.post(
+        path="/api/user/", data={**data, "email": email.upper()}, format="json"
+    )
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    assert r.json() == ["Email has already been taken"]
+    assert CustomUser.objects.count() == 1
+
+
 @pytest.mark.django_db
 def test_patch_user_success(api_client):
     user = UserFactory.create()
@@ -130,6 +159,24 @@ def test_delete_user_success(api_client):
     assert r.status_code == status.HTTP_204_NO_CONTENT
 
 
+@pytest.mark.django_db
+def test_delete_user_with_transactions(api_client, django_assert_max_num_queries):
+    user = UserFactory.create()
+    TransactionFactory.create_batch(200, user=user)
+    other_transaction = TransactionFactory.create()
+    api_client.force_authenticate(user=user)
+
+    # number of queries doesn't depend on the number of transactions
+    with django_assert_max_num_queries(15):
+        r = api_client.delete(path=f"/api/user/{user.pk}/")
+
+    assert r.status_code == status.HTTP_204_NO_CONTENT
+    assert not Transaction.objects.filter(user_id=user.pk).exists()
+    assert not DailyTransactionAggregate.objects.filter(user_id=user.pk).exists()
+    assert Transaction.objects.filter(pk=other_transaction.pk).exists()
+    assert verify_daily_aggregates() == []
+
+
 @pytest.mark.django_db
 def test_delete_user_fail(api_client):
     user = UserFactory.create()
@@ -139,3 +186,80 @@ def test_delete_user_fail(api_client):
     r = api_client.delete(path=f"/api/user/{second_user.pk}/")
 
     assert r.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_get_current_user_not_modified(api_client):
+    user = UserFactory.create()
+    api_client.force_authenticate(user=user)
+
+    r = api_client.get(path="/api/user/get_current_user/")
+    etag = r["ETag"]
+
+    r = api_client.get(path="/api/user/get_current_user/", HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == status.HTTP_304_NOT_MODIFIED
+
+    api_client.patch(path=f"/api/user/{user.pk}/", data={"first_name": "New"})
+    user.refresh_from_db()  # force_authenticate keeps the given instance
+    r = api_client.get(path="/api/user/get_current_user/", HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json()["first_name"] == "New"
+
+
+@pytest.mark.django_db
+def test_bulk_create_users(api_client, settings):
+    items = [
+        {"email": f"user{i}@example.com", "password": f"Secret-{i}-Pass"}
+        for i in range(3)
+    ]
+
+    r = api_client.post(path="/api/user/bulk/", data=items, format="json")
+    assert r.status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(user=UserFactory.create(is_staff=True))
+    r = api_client.post(path="/api/user/bulk/", data=items, format="json")
+    assert r.status_code == status.HTTP_201_CREATED
+    assert [user["email"] for user in r.json()] == [item["email"] for item in items]
+    assert [user["id"] for user in r.json()] == [
+        CustomUser.objects.get(email=item["email"]).pk for item in items
+    ]
+    user = CustomUser.objects.get(email="user2@example.com")
+    assert user.check_password("Secret-2-Pass")
+
+    # nothing is created if any item is invalid
+    r = api_client.post(
+        path="/api/user/bulk/",
+        data=[
+            {"email": "new@example.com", "password": "Secret-Pass"},
+            {"email": "USER1@example.com", "password": "Secret-Pass"},
+            {"email": "other@example.com", "password": "12345678"},
+        ],
+        format="json",
+    )
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    assert r.json()[0] == {}
+    assert r.json()[1] == {"email": ["Email has already been taken"]}
+    assert "password" in r.json()[2]
+    assert not CustomUser.objects.filter(email="new@example.com").exists()
+
+    settings.USER_BULK_MAX_SIZE = 2
+    r = api_client.post(path="/api/user/bulk/", data=items, format="json")
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+    assert "import_users" in r.json()[0]
+
+
+@pytest.mark.django_db
+def test_session_user_is_cached(api_client, django_assert_num_queries):
+    user = UserFactory.create()
+    api_client.force_login(user)
+    api_client.get(path="/api/user/get_current_user/")
+
+    # only the session is read, the user comes from the user cache
+    with django_assert_num_queries(1):
+        r = api_client.get(path="/api/user/get_current_user/")
+    assert r.json()["email"] == user.email
+
+    user.last_name = "Changed"
+    user.save()
+    r = api_client.get(path="/api/user/get_current_user/")
+    assert r.json()["last_name"] == "Changed"
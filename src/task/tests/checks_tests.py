@@ -0,0 +1,17 @@
+from django.core.checks import Warning
+from django.test import override_settings
+
+from task.checks import check_transaction_cache_is_shared
+
+
+def test_process_local_transaction_cache_is_reported():
+    warnings = check_transaction_cache_is_shared(None)
+    assert [warning.id for warning in warnings] == ["task.W001"]
+    assert isinstance(warnings[0], Warning)
+
+    shared = {
+        "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+        "LOCATION": "127.0.0.1:11211",
+    }
+    with override_settings(CACHES={"default": shared}):
+        assert check_transaction_cache_is_shared(None) == []
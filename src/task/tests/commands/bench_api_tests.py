@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from task.management.commands.bench_api import ENDPOINTS, compare_with_baseline
+from task.services.dataset import generate_dataset
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_api(capsys, tmp_path, settings):
+    settings.PASSWORD_SCRYPT_WORK_FACTOR = 2**10
+    with pytest.raises(CommandError):
+        call_command("bench_api")  # no dataset
+
+    generate_dataset(5, 200, days=30, seed=1)
+    baseline = tmp_path / "baseline.json"
+    call_command(
+        "bench_api",
+        "--requests",
+        "4",
+        # in-memory SQLite test database doesn't wait for locks of concurrent writes
+        "--concurrency",
+        "1",
+        "--save-baseline",
+        str(baseline),
+    )
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == len(ENDPOINTS) + 1
+    assert all("requests/s" in line and "p95" in line for line in lines[:-1])
+    results = json.loads(baseline.read_text())
+    assert set(results) == {name for name, _, _ in ENDPOINTS}
+
+    # a baseline nobody can beat
+    baseline.write_text(
+        json.dumps({"transaction-list": {"p50_ms": 0.0001, "requests_per_second": 1}})
+    )
+    with pytest.raises(CommandError, match="1 metrics regressed"):
+        call_command(
+            "bench_api",
+            "--requests",
+            "4",
+            "--endpoints",
+            "transaction-list",
+            "--baseline",
+            str(baseline),
+        )
+
+
+def test_compare_with_baseline():
+    baseline = {"list": {"requests_per_second": 100, "p95_ms": 10, "p99_ms": 20}}
+
+    assert not compare_with_baseline(
+        {"list": {"requests_per_second": 90, "p95_ms": 11, "p99_ms": 10}},
+        baseline,
+        0.2,
+    )
+    assert compare_with_baseline(
+        {"list": {"requests_per_second": 70, "p95_ms": 13, "p99_ms": 20}},
+        baseline,
+        0.2,
+    ) == [
+        "list requests_per_second: 70.0, baseline 100.0",
+        "list p95_ms: 13.0, baseline 10.0",
+    ]
+    # endpoints missing in the baseline aren't compared
+    assert not compare_with_baseline({"other": {"p95_ms": 1000}}, baseline, 0.2)
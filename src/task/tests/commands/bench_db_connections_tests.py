@@ -0,0 +1,16 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+
+# connection is closed and reopened, so the test can't run inside a transaction
+@pytest.mark.django_db(transaction=True)
+def test_bench_db_connections(capsys):
+    call_command("bench_db_connections", "--queries", "5")
+
+    out = capsys.readouterr().out
+    assert "new connection: mean" in out
+    assert "reused connection: mean" in out
+    assert "Connection setup costs" in out
+
+    with pytest.raises(CommandError):
+        call_command("bench_db_connections", "--queries", "1")
@@ -0,0 +1,16 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+
+def test_bench_fibo(capsys):
+    call_command(
+        "bench_fibo", "--n", "10", "1000", "--repeat", "1", "--max-iterative-n", "100"
+    )
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 9  # n=1000 is skipped by iterative method
+    assert "n=10 iterative:" in lines[0]
+    assert lines[-1].startswith("n=1000 hex output:")
+
+    with pytest.raises(CommandError):
+        call_command("bench_fibo", "--n", "-1")
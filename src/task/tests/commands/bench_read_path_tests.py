@@ -0,0 +1,22 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from task.tests.factories.transaction_factory import TransactionFactory
+from task.tests.factories.user_factory import UserFactory
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_read_path(capsys):
+    user = UserFactory.create()
+    TransactionFactory.create_batch(3, user=user)
+
+    call_command(
+        "bench_read_path", str(user.pk), "--requests", "10", "--concurrency", "2"
+    )
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 8  # every endpoint in both modes
+    assert all("requests/s" in line and "p99" in line for line in lines)
+
+    with pytest.raises(CommandError):
+        call_command("bench_read_path", str(user.pk + 1))
@@ -0,0 +1,18 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+
+from task.models import CustomUser
+
+
+@pytest.mark.django_db
+@override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2**10)
+def test_bench_signup(capsys):
+    call_command("bench_signup", "--requests", "3", "--hashers", "scrypt")
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("scrypt: mean")
+    assert not CustomUser.objects.exists()  # created users are rolled back
+
+    with pytest.raises(CommandError):
+        call_command("bench_signup", "--hashers", "unknown")
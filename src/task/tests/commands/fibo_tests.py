@@ -0,0 +1,23 @@
+import pytest
+from django.core.management import call_command
+
+
+def test_fibo(capsys):
+    for number, value in ((0, "0"), (1, "1"), (10, "55")):
+        call_command("fibo", str(number))
+        assert capsys.readouterr().out.splitlines()[-1] == value
+
+    call_command("fibo", "100", "--modulo", "1000")
+    assert capsys.readouterr().out.splitlines()[-1] == "75"
+
+    call_command("fibo", "10", "--output-format", "hex")
+    assert capsys.readouterr().out.splitlines()[-1] == "0x37"
+    call_command("fibo", "10", "--output-format", "binary")
+    assert capsys.readouterr().out.splitlines()[-1] == "0b110111"
+
+
+def test_fibo_fail():
+    with pytest.raises(SystemExit):
+        call_command("fibo", "-1")
+    with pytest.raises(SystemExit):
+        call_command("fibo", "10", "--modulo", "0")
@@ -0,0 +1,15 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+def test_generate_schema(tmp_path, settings):
+    path = tmp_path / "openapi.json"
+    call_command("generate_schema", str(path))
+
+    assert "/transaction/" in json.loads(path.read_text())["paths"]
+
+    settings.OPENAPI_SCHEMA_PATH = ""
+    with pytest.raises(CommandError):
+        call_command("generate_schema")
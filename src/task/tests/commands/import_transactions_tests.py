@@ -0,0 +1,92 @@
+import json
+from contextlib import contextmanager
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import transaction
+
+from task.management.commands import import_transactions
+
+from task.models import Transaction, TransactionImportProgress
+from task.services.aggregates import verify_daily_aggregates
+from task.tests.factories.user_factory import UserFactory
+
+
+@pytest.mark.django_db
+def test_import_transactions_csv(tmp_path):
+    users = UserFactory.create_batch(2)
+    path = tmp_path / "transactions.csv"
+    path.write_text(
+        "user_id,amount,date\n"
+        + "".join(f"{users[i % 2].pk},{i}.5,2021-05-0{i % 3 + 1}\n" for i in range(7))
+    )
+
+    call_command("import_transactions", str(path), "--chunk-size", "3")
+
+    assert Transaction.objects.count() == 7
+    assert Transaction.objects.filter(date=date(2021, 5, 1)).count() == 3
+    assert Transaction.objects.filter(amount=650, currency="USD").exists()
+    assert verify_daily_aggregates() == []
+    assert not TransactionImportProgress.objects.exists()
+
+
+@pytest.mark.django_db
+def test_import_transactions_resume(tmp_path):
+    user = UserFactory.create()
+    rows = [{"user_id": user.pk, "amount": i, "date": "2021-05-01"} for i in range(5)]
+    rows[3]["amount"] = "abc"
+    path = tmp_path / "transactions.ndjson"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+    with pytest.raises(CommandError, match="Invalid row 4"):
+        call_command("import_transactions", str(path), "--chunk-size", "2")
+    assert Transaction.objects.count() == 2  # first chunk is committed
+
+    rows[3]["amount"] = 3
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    call_command("import_transactions", str(path), "--chunk-size", "2", "--resume")
+
+    assert sorted(Transaction.objects.values_list("amount", flat=True)) == [
+        0,
+        100,
+        200,
+        300,
+        400,
+    ]
+    assert verify_daily_aggregates() == []
+
+
+@pytest.mark.django_db
+def test_import_transactions_resume_after_crash_following_commit(tmp_path, monkeypatch):
+    user = UserFactory.create()
+    rows = [{"user_id": user.pk, "amount": i, "date": "2021-05-01"} for i in range(5)]
+    path = tmp_path / "transactions.ndjson"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+    @contextmanager
+    def atomic_then_crash():
+        with transaction.atomic():
+            yield
+        raise KeyboardInterrupt  # process is killed right after the first commit
+
+    monkeypatch.setattr(
+        import_transactions, "transaction", SimpleNamespace(atomic=atomic_then_crash)
+    )
+    with pytest.raises(KeyboardInterrupt):
+        call_command("import_transactions", str(path), "--chunk-size", "2")
+    assert Transaction.objects.count() == 2
+    monkeypatch.undo()
+
+    call_command("import_transactions", str(path), "--chunk-size", "2", "--resume")
+
+    assert sorted(Transaction.objects.values_list("amount", flat=True)) == [
+        0,
+        100,
+        200,
+        300,
+        400,
+    ]
+    assert verify_daily_aggregates() == []
+    assert not TransactionImportProgress.objects.exists()
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+from django.contrib.auth import authenticate
+from django.core.management import call_command
+
+from task.models import CustomUser
+from task.tests.factories.user_factory import UserFactory
+
+
+@pytest.mark.django_db
+def test_import_users(tmp_path, capsys):
+    UserFactory.create(email="taken@example.com")
+    rows = [
+        {"email": f"user{i}@example.com", "password": f"Secret-{i}-Pass"}
+        for i in range(5)
+    ]
+    rows[1]["email"] = "not an email"
+    rows[2]["email"] = "TAKEN@example.com"
+    rows[3]["password"] = "password"
+    rows.append({**rows[0], "email": "USER0@example.com"})  # repeated in the file
+    path = tmp_path / "users.ndjson"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+    call_command("import_users", str(path), "--chunk-size", "5", "--workers", "2")
+
+    out, err = capsys.readouterr()
+    assert "Successfully imported 2 users" in out
+    assert "4 rows failed" in out
+    assert "Row 2: email:" in err
+    assert "Row 3: email: Email has already been taken" in err
+    assert "Row 4: password: This password is too common." in err
+    assert "Row 6: email: Email has already been taken" in err
+
+    assert set(CustomUser.objects.values_list("email", flat=True)) == {
+        "taken@example.com",
+        "user0@example.com",
+        "user4@example.com",
+    }
+    assert authenticate(email="user4@example.com", password="Secret-4-Pass")
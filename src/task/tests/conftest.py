@@ -1,8 +1,20 @@
 import pytest
+from django.core.cache import caches
 from rest_framework.test import APIClient
 
+from task.services.user_cache import get_local_user_cache
+
 
 @pytest.fixture
 def api_client() -> APIClient():
     """function generate APIClient instance"""
     return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """function clears caches after every test, database ids are reused between tests"""
+    yield
+    for cache in caches.all():
+        cache.clear()
+    get_local_user_cache().clear()
@@ -0,0 +1,42 @@
+import pytest
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.contrib.auth.password_validation import get_default_password_validators
+from django.test import override_settings
+
+from task.password_validation import CommonPasswordValidator
+from task.tests.factories.user_factory import UserFactory
+
+
+def test_scrypt_hasher():
+    encoded = make_password("correct horse")
+    assert encoded.startswith("scrypt$16384$")
+    assert check_password("correct horse", encoded)
+    assert not check_password("wrong horse", encoded)
+    assert not identify_hasher(encoded).must_update(encoded)
+
+    with override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2**12):
+        assert identify_hasher(encoded).must_update(encoded)
+
+
+@pytest.mark.django_db
+def test_password_is_rehashed_on_login():
+    user = UserFactory.create(
+        password=make_password("correct horse", hasher="pbkdf2_sha256")
+    )
+
+    assert authenticate(email=user.email, password="correct horse") == user
+    user.refresh_from_db()
+    assert user.password.startswith("scrypt$")
+    assert authenticate(email=user.email, password="correct horse") == user
+
+
+def test_common_password_list_is_shared():
+    validator = next(
+        v
+        for v in get_default_password_validators()
+        if isinstance(v, CommonPasswordValidator)
+    )
+    assert isinstance(validator.passwords, frozenset)
+    assert CommonPasswordValidator().passwords is validator.passwords
+    assert "password" in validator.passwords
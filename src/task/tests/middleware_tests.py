@@ -0,0 +1,72 @@
+import asyncio
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+
+from task.middleware import ServerTimingMiddleware
+from task.tests.factories.transaction_factory import TransactionFactory
+
+
+@pytest.fixture
+def user(api_client):
+    transaction = TransactionFactory.create()
+    api_client.force_authenticate(user=transaction.user)
+    return transaction.user
+
+
+@pytest.mark.django_db
+def test_server_timing_header(api_client, user):
+    r = api_client.get("/api/transaction/")
+
+    metrics = [metric.split(";") for metric in r["Server-Timing"].split(", ")]
+    assert [metric[0] for metric in metrics] == ["db", "serialize", "render", "total"]
+    assert metrics[0][2] == 'desc="1 queries"'
+    assert all(float(metric[1][len("dur=") :]) >= 0 for metric in metrics)
+
+    r = api_client.get("/admin/login/")
+    assert "Server-Timing" not in r
+
+    with override_settings(SERVER_TIMING_HEADER=False):
+        assert "Server-Timing" not in api_client.get("/api/transaction/")
+
+
+@pytest.mark.django_db
+def test_slow_requests_are_logged(api_client, user, caplog):
+    with caplog.at_level(logging.WARNING, logger="task.performance"):
+        api_client.get("/api/transaction/")
+        assert not caplog.records
+
+        with override_settings(SLOW_REQUEST_THRESHOLD_MS=0):
+            api_client.get("/api/transaction/?page_size=5")
+
+    [record] = caplog.records
+    message = record.getMessage()
+    assert "GET /api/transaction/?page_size=5 (TransactionViewSet.list) 200" in message
+    assert "1 queries" in message
+    assert 'FROM "task_transaction"' in message
+
+
+def test_middleware_is_async_in_async_chain():
+    async def get_response(request):
+        pass
+
+    assert asyncio.iscoroutinefunction(ServerTimingMiddleware(get_response))
+    assert not asyncio.iscoroutinefunction(ServerTimingMiddleware(lambda r: None))
+
+
+# async views query the database from pool threads with their own connections
+@pytest.mark.django_db(transaction=True)
+@override_settings(SERVER_TIMING_HEADER=True)
+def test_server_timing_of_async_views():
+    transaction = TransactionFactory.create()
+    client = AsyncClient()
+    client.force_login(transaction.user)
+
+    r = async_to_sync(client.get)("/api/async/transaction/")
+
+    assert r.status_code == 200
+    db = r["Server-Timing"].split(", ")[0]
+    # the queries run in a thread of the database pool, not in the middleware thread
+    assert int(db.split('desc="')[1].split(" ")[0]) >= 1
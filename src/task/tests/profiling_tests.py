@@ -0,0 +1,110 @@
+import os
+import pstats
+import sys
+import threading
+
+import pytest
+from django.test import override_settings
+
+from task import profiling
+from task.profiling import RateLimiter, get_rate_limiter
+from task.tests.factories.user_factory import UserFactory
+from task.views import TransactionViewSet
+
+
+@pytest.fixture
+def profiler_dir(tmp_path):
+    profiling._rate_limiter = None
+    with override_settings(PROFILER_DIR=str(tmp_path)):
+        yield tmp_path
+    profiling._rate_limiter = None
+
+
+@pytest.fixture
+def staff_user(api_client):
+    user = UserFactory.create(is_staff=True)
+    api_client.force_authenticate(user=user)
+    return user
+
+
+@pytest.mark.django_db
+def test_cprofile_profile_is_stored(api_client, staff_user, profiler_dir):
+    r = api_client.get("/api/transaction/", HTTP_X_PROFILE="cprofile")
+
+    assert r.status_code == 200
+    assert r["X-Profile-Id"].endswith(".pstats")
+    assert "TransactionViewSet-list" in r["X-Profile-Id"]
+    stats = pstats.Stats(os.path.join(profiler_dir, r["X-Profile-Id"]))
+    assert stats.total_calls > 0
+
+
+@pytest.mark.django_db
+def test_sampling_profile_is_stored(api_client, staff_user, profiler_dir):
+    with override_settings(PROFILER_SAMPLE_INTERVAL=0.0001):
+        r = api_client.get("/api/fibonacci/100000/?profile=sampling")
+
+    assert r.status_code == 200
+    assert r["X-Profile-Id"].endswith(".collapsed")
+    with open(os.path.join(profiler_dir, r["X-Profile-Id"])) as file:
+        lines = file.read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert ";" in stack
+
+
+@pytest.mark.django_db
+def test_profiling_is_staff_only(api_client, profiler_dir):
+    api_client.force_authenticate(user=UserFactory.create())
+    r = api_client.get("/api/transaction/", HTTP_X_PROFILE="cprofile")
+
+    assert r.status_code == 200
+    assert "X-Profile-Id" not in r
+    assert not os.listdir(profiler_dir)
+
+
+@pytest.mark.django_db
+def test_profiling_is_rate_limited(api_client, staff_user, profiler_dir):
+    with override_settings(PROFILER_MAX_PER_MINUTE=1):
+        assert "X-Profile-Id" in api_client.get("/api/transaction/?profile=cprofile")
+        r = api_client.get("/api/transaction/?profile=cprofile")
+    assert "X-Profile-Id" not in r
+    assert r["X-Profile-Skipped"] == "rate limit"
+
+    with override_settings(PROFILER_ENABLED=False):
+        r = api_client.get("/api/transaction/?profile=cprofile")
+    assert "X-Profile-Id" not in r
+    assert "X-Profile-Skipped" not in r
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("kind", ["cprofile", "sampling"])
+def test_profiling_stops_when_view_raises(
+    api_client, staff_user, profiler_dir, monkeypatch, kind
+):
+    def fail(*args, **kwargs):
+        raise RuntimeError("view failed")
+
+    monkeypatch.setattr(TransactionViewSet, "list", fail)
+    with pytest.raises(RuntimeError):
+        api_client.get("/api/transaction/", HTTP_X_PROFILE=kind)
+
+    assert sys.getprofile() is None
+    assert not any(
+        thread.name == "sampling-profiler" for thread in threading.enumerate()
+    )
+    assert len(os.listdir(profiler_dir)) == 1
+    # the limiter was released
+    assert get_rate_limiter().acquire()
+    get_rate_limiter().release()
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(per_minute=2)
+
+    assert limiter.acquire()
+    assert not limiter.acquire()  # one at a time
+    limiter.release()
+    assert limiter.acquire()
+    limiter.release()
+    assert not limiter.acquire()  # two per minute
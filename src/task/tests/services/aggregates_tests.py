@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+from django.core.management import call_command
+
+from task.models import DailyTransactionAggregate, Transaction
+from task.services.aggregates import rebuild_daily_aggregates, verify_daily_aggregates
+from task.tests.factories.transaction_factory import TransactionFactory
+from task.tests.factories.user_factory import UserFactory
+
+
+def get_rollup(user) -> dict:
+    return DailyTransactionAggregate.objects.values("sum", "count", "min", "max").get(
+        user=user
+    )
+
+
+@pytest.mark.django_db
+def test_daily_aggregate_follows_transactions():
+    user = UserFactory.create()
+    first = TransactionFactory.create(user=user, amount=10)
+    second = TransactionFactory.create(user=user, amount=20)
+    third = TransactionFactory.create(user=user, amount=30)
+    assert get_rollup(user) == {"sum": 60, "count": 3, "min": 10, "max": 30}
+
+    second.amount = 25  # neither min nor max, updated in place
+    second.save()
+    assert get_rollup(user) == {"sum": 65, "count": 3, "min": 10, "max": 30}
+
+    first = Transaction.objects.get(pk=first.pk)
+    first.amount = "15"  # was the min, day is recalculated
+    first.save()
+    assert get_rollup(user) == {"sum": 70, "count": 3, "min": 15, "max": 30}
+
+    third.delete()
+    assert get_rollup(user) == {"sum": 40, "count": 2, "min": 15, "max": 25}
+
+    Transaction.objects.get(pk=second.pk).delete()
+    Transaction.objects.get(pk=first.pk).delete()
+    assert not DailyTransactionAggregate.objects.filter(user=user).exists()
+    assert verify_daily_aggregates() == []
+
+
+@pytest.mark.django_db
+def test_rebuild_daily_aggregates():
+    user = UserFactory.create()
+    transactions = TransactionFactory.create_batch(3, user=user, amount=5)
+    # queryset update doesn't send signals, so rollups become stale
+    Transaction.objects.filter(pk=transactions[0].pk).update(date=date(2021, 5, 1))
+    assert len(verify_daily_aggregates()) == 2
+
+    assert rebuild_daily_aggregates([user.pk]) == 2
+    assert verify_daily_aggregates() == []
+    assert list(
+        DailyTransactionAggregate.objects.filter(user=user)
+        .order_by("date")
+        .values_list("count", flat=True)
+    ) == [1, 2]
+
+
+@pytest.mark.django_db
+def test_rebuild_transaction_aggregates_command():
+    TransactionFactory.create_batch(2)
+    DailyTransactionAggregate.objects.all().delete()
+
+    with pytest.raises(SystemExit):
+        call_command("rebuild_transaction_aggregates", "--verify")
+
+    call_command("rebuild_transaction_aggregates")
+    call_command("rebuild_transaction_aggregates", "--verify")
+    assert DailyTransactionAggregate.objects.count() == 2
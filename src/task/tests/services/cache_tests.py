@@ -0,0 +1,36 @@
+import pytest
+
+from task.services.cache import (
+    bump_transactions_version,
+    get_or_set_transactions_data,
+    get_transactions_cache,
+    get_transactions_version,
+)
+
+
+@pytest.mark.django_db
+def test_transactions_version_bump_invalidates_data():
+    calls = []
+
+    def get_data():
+        calls.append(1)
+        return {"calls": len(calls)}
+
+    assert get_or_set_transactions_data(1, ("list",), get_data) == {"calls": 1}
+    assert get_or_set_transactions_data(1, ("list",), get_data) == {"calls": 1}
+    assert get_or_set_transactions_data(2, ("list",), get_data) == {"calls": 2}
+
+    bump_transactions_version([1])
+    assert get_or_set_transactions_data(1, ("list",), get_data) == {"calls": 3}
+    assert get_or_set_transactions_data(2, ("list",), get_data) == {"calls": 2}
+
+
+@pytest.mark.django_db
+def test_evicted_transactions_version_is_not_reused():
+    version = get_transactions_version(1)
+    bump_transactions_version([1])
+    bumped = get_transactions_version(1)
+    assert bumped > version
+
+    get_transactions_cache().clear()
+    assert get_transactions_version(1) > bumped
@@ -0,0 +1,26 @@
+import pytest
+from django.contrib.auth import authenticate
+
+from task.models import CustomUser, Transaction
+from task.services.aggregates import verify_daily_aggregates
+from task.services.dataset import generate_dataset
+
+
+@pytest.mark.django_db
+def test_generate_dataset():
+    user_ids = generate_dataset(20, 500, days=30, seed=1, chunk_size=120)
+
+    assert len(user_ids) == CustomUser.objects.count() == 20
+    transactions = Transaction.objects.all()
+    assert transactions.count() == 500
+    assert set(transactions.values_list("user_id", flat=True)) <= set(user_ids)
+    assert len(set(transactions.values_list("amount", flat=True))) > 100
+    assert len(set(transactions.values_list("date", flat=True))) > 10
+    assert not verify_daily_aggregates()
+
+    user = CustomUser.objects.get(pk=user_ids[0])
+    assert authenticate(email=user.email, password="loadtest-password") == user
+
+    # every call adds new users
+    assert len(generate_dataset(5, 0)) == 5
+    assert CustomUser.objects.count() == 25
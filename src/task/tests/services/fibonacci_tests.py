@@ -0,0 +1,117 @@
+import sys
+
+import pytest
+
+from task.services.fibonacci import (
+    BoundedLRUCache,
+    fibonacci,
+    fibonacci_iterative,
+    fibonacci_many,
+    fibonacci_matrix,
+    fibonacci_pair,
+    fibonacci_range,
+    get_fibonacci_cache,
+    iter_decimal_digits,
+    to_decimal_string,
+)
+from task.utils import fibo
+
+
+def iterative_fibonacci(n: int) -> int:
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def test_fibonacci():
+    for n in range(200):
+        assert fibonacci(n) == iterative_fibonacci(n)
+        assert fibonacci_pair(n) == (
+            iterative_fibonacci(n),
+            iterative_fibonacci(n + 1),
+        )
+    assert fibo(0) == 0
+    assert fibo(1) == 1
+    assert fibo(100) == 354224848179261915075
+
+
+def test_fibonacci_fail():
+    with pytest.raises(ValueError):
+        fibonacci(-1)
+    with pytest.raises(ValueError):
+        fibo(-1)
+
+
+def test_reference_methods():
+    for n in range(100):
+        assert fibonacci_matrix(n) == fibonacci_iterative(n) == fibonacci(n)
+
+
+def test_iter_decimal_digits():
+    value = 10**200000 + 7
+    chunks = list(iter_decimal_digits(value, chunk_size=65536))
+    assert [len(chunk) for chunk in chunks] == [65536, 65536, 65536, 3393]
+    digits = "".join(chunks)
+    assert digits[0] == "1" and digits[-2:] == "07"
+    assert set(digits[1:-1]) == {"0"}
+
+    value = fibonacci(100000)
+    chunks = list(iter_decimal_digits(value, chunk_size=1000))
+    assert all(len(chunk) == 1000 for chunk in chunks[:-1])
+    assert "".join(chunks) == to_decimal_string(value)
+    assert "".join(iter_decimal_digits(10**5000 - 1, chunk_size=7)) == "9" * 5000
+
+
+def test_to_decimal_string():
+    value = fibonacci(50000)  # ~10000 digits, longer than default str() limit
+    digits = to_decimal_string(value)
+    assert len(digits) == 10450
+    assert int(digits[:100]) == value // 10 ** (len(digits) - 100)
+    assert int(digits[-100:]) == value % 10**100
+    assert to_decimal_string(-value) == "-" + digits
+    assert to_decimal_string(0) == "0"
+
+
+def test_fibonacci_cache_is_reused():
+    cache = get_fibonacci_cache()
+    cache.clear()
+
+    fibonacci_pair(1000)
+    assert len(cache) == 1
+    # 2001 = 1000 * 2 + 1, doubling starts from cached pair of 1000
+    assert fibonacci_pair(2001) == (
+        iterative_fibonacci(2001),
+        iterative_fibonacci(2002),
+    )
+    assert fibonacci(2001) == iterative_fibonacci(2001)
+    assert fibonacci(2001, 1000) == iterative_fibonacci(2001) % 1000
+
+
+def test_bounded_lru_cache():
+    cache = BoundedLRUCache(max_bytes=3 * sys.getsizeof(2**100))
+    for n in range(3):
+        cache.set(n, (2**100 + n,))
+    cache.get(0)  # 1 becomes least recently used
+    cache.set(3, (2**100,))
+
+    assert cache.get(1) is None
+    assert [cache.get(n) for n in (0, 2, 3)] == [(2**100,), (2**100 + 2,), (2**100,)]
+    assert cache.size_bytes <= cache.max_bytes
+
+    cache.set(4, (2**10000,))  # bigger than the whole cache, isn't stored
+    assert cache.get(4) is None
+    assert len(cache) == 3
+
+
+def test_fibonacci_many():
+    indices = [1000, 3, 3, 77, 5000, 10, 1200]
+    assert fibonacci_many(indices) == [iterative_fibonacci(n) for n in indices]
+    assert fibonacci_many(indices, 97) == [iterative_fibonacci(n) % 97 for n in indices]
+    assert fibonacci_range(5, 300) == [iterative_fibonacci(n) for n in range(5, 301)]
+    assert fibonacci_many([]) == []
+
+    with pytest.raises(ValueError):
+        fibonacci_many([1, -1])
+    with pytest.raises(ValueError):
+        fibonacci_range(1, 10, modulus=0)
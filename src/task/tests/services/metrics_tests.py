@@ -0,0 +1,84 @@
+import subprocess
+import sys
+
+from django.test import override_settings
+
+from task.services.metrics import (
+    CACHE_REQUESTS,
+    REQUEST_DURATION,
+    REQUESTS,
+    MetricsRegistry,
+    collect_snapshots,
+    get_registry,
+    render_prometheus,
+)
+
+
+def test_render_prometheus_sums_processes():
+    registries = [MetricsRegistry(), MetricsRegistry()]
+    labels = (("view", "TransactionViewSet"), ("action", "list"))
+    for registry in registries:
+        registry.inc(REQUESTS, labels + (("status", "200"),))
+        registry.observe(REQUEST_DURATION, labels, 0.02)
+    registries[0].observe(REQUEST_DURATION, labels, 20)
+    registries[0].inc(CACHE_REQUESTS, (("cache", "user"), ("result", "hit")), 3)
+    registries[1].inc(CACHE_REQUESTS, (("cache", "user"), ("result", "miss")))
+    registries[1].inc(REQUESTS, (("view", 'a"b'), ("action", "c\\d")))
+
+    text = render_prometheus([registry.snapshot() for registry in registries])
+    lines = text.splitlines()
+
+    assert "# TYPE api_requests_total counter" in lines
+    assert (
+        'api_requests_total{view="TransactionViewSet",action="list",status="200"} 2'
+        in lines
+    )
+    assert 'api_requests_total{view="a\\"b",action="c\\\\d"} 1' in lines
+    bucket = 'api_request_duration_seconds_bucket{view="TransactionViewSet",action="list",le='
+    assert f'{bucket}"0.01"}} 0' in lines
+    assert f'{bucket}"0.025"}} 2' in lines  # buckets are cumulative
+    assert f'{bucket}"10.0"}} 2' in lines
+    assert f'{bucket}"+Inf"}} 3' in lines
+    assert (
+        'api_request_duration_seconds_count{view="TransactionViewSet",action="list"} 3'
+        in lines
+    )
+    assert 'cache_hit_ratio{cache="user"} 0.75' in lines
+
+
+def test_snapshots_of_processes_are_collected_from_directory(tmp_path):
+    with override_settings(METRICS_DIR=str(tmp_path)):
+        finished_worker = MetricsRegistry()
+        finished_worker.inc(REQUESTS, (("view", "UserViewSet"),), 5)
+        finished_worker.flush()
+        get_registry().inc(REQUESTS, (("view", "UserViewSet"),), 1)
+
+        snapshots = collect_snapshots()
+
+    assert len(snapshots) == 2
+    total = sum(
+        value
+        for snapshot in snapshots
+        for name, labels, value in snapshot["counters"]
+        if name == REQUESTS and labels == [["view", "UserViewSet"]]
+    )
+    assert total == 6
+
+
+def test_gauges_of_finished_processes_are_dropped(tmp_path):
+    finished = subprocess.Popen([sys.executable, "-c", ""])
+    finished.wait()
+    with override_settings(METRICS_DIR=str(tmp_path)):
+        finished_worker = MetricsRegistry()
+        # pid in the file name is the pid of the process which wrote it
+        finished_worker._file_name = f"{finished.pid}-finished.json"
+        finished_worker.gauge_callbacks.append(
+            lambda: [("db_pool_connections_in_use", (("database", "/db"),), 3)]
+        )
+        finished_worker.inc(REQUESTS, (("view", "FibonacciView"),), 5)
+        finished_worker.flush()
+
+        text = render_prometheus(collect_snapshots())
+
+    assert 'api_requests_total{view="FibonacciView"} 5' in text.splitlines()
+    assert "db_pool_connections_in_use" not in text
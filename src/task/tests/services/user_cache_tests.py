@@ -0,0 +1,50 @@
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+
+from task.services.user_cache import TTLCache, get_cached_user
+from task.tests.factories.user_factory import UserFactory
+
+
+def test_ttl_cache():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    assert cache.get(1) == "a"
+    cache.set(3, "c")  # least recently used entry is evicted
+    assert cache.get(2) is None
+    assert (cache.get(1), cache.get(3)) == ("a", "c")
+
+    expired = TTLCache(max_size=2, ttl=-1)
+    expired.set(1, "a")
+    assert expired.get(1) is None
+    assert len(expired) == 0
+
+
+@pytest.mark.django_db
+def test_cached_user_is_invalidated_on_save_and_delete(django_assert_num_queries):
+    user = UserFactory.create()
+
+    with django_assert_num_queries(1):
+        assert get_cached_user(user.pk) == user
+        cached = get_cached_user(user.pk)
+    cached.first_name = "Changed"  # every caller gets its own copy
+    assert get_cached_user(user.pk).first_name == user.first_name
+
+    user.first_name = "New"
+    user.save()
+    assert get_cached_user(user.pk).first_name == "New"
+
+    user.delete()
+    assert get_cached_user(cached.pk) is None
+
+
+@pytest.mark.django_db
+@override_settings(USER_CACHE_ALIAS="default")
+def test_cached_user_is_shared(django_assert_num_queries):
+    user = UserFactory.create()
+    get_cached_user(user.pk)
+    assert caches["default"].get(f"user:{user.pk}") == user
+
+    user.save()
+    assert caches["default"].get(f"user:{user.pk}") is None
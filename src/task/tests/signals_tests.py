@@ -0,0 +1,42 @@
+import time
+
+import pytest
+from django.db import connection
+
+from task.signals import check_database_connections, mark_database_connections_used
+
+
+@pytest.mark.django_db
+def test_broken_connection_is_closed_on_request_start(monkeypatch):
+    closed = []
+    connection.ensure_connection()
+    monkeypatch.setitem(connection.settings_dict, "CONN_HEALTH_CHECKS", True)
+    monkeypatch.setattr(connection, "close", lambda: closed.append(True))
+
+    check_database_connections()
+    assert not closed  # working connection is kept
+
+    monkeypatch.setattr(connection, "is_usable", lambda: False)
+    check_database_connections()
+    assert closed
+
+
+@pytest.mark.django_db
+def test_connection_is_checked_only_after_idle_time(monkeypatch):
+    checks = []
+    connection.ensure_connection()
+    monkeypatch.setitem(connection.settings_dict, "CONN_HEALTH_CHECKS", True)
+    monkeypatch.setitem(connection.settings_dict, "CONN_HEALTH_CHECK_IDLE", 60)
+    monkeypatch.setattr(connection, "is_usable", lambda: checks.append(True) or True)
+    monkeypatch.setattr(connection, "last_request_finished", 0, raising=False)
+
+    check_database_connections()
+    assert len(checks) == 1  # not used by a request for long
+
+    mark_database_connections_used()
+    check_database_connections()
+    assert len(checks) == 1  # used by the previous request a moment ago
+
+    monkeypatch.setattr(connection, "last_request_finished", time.monotonic() - 61)
+    check_database_connections()
+    assert len(checks) == 2
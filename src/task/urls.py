@@ -1,39 +1,47 @@
 from django.urls import path
-from drf_yasg import openapi
-from drf_yasg.generators import OpenAPISchemaGenerator
-from drf_yasg.views import get_schema_view
 from rest_framework import routers
-from rest_framework.permissions import IsAuthenticated
 
-from task.views import UserViewSet, TransactionViewSet
+from task.decorators import async_view
+from task.views import UserViewSet, TransactionViewSet, FibonacciViewSet, TokenViewSet, metrics, openapi_schema, \
+    docs
 
 app_name = "task"
 router = routers.SimpleRouter()
 router.register("user", UserViewSet, "user")
 router.register("transaction", TransactionViewSet, 'transaction')
+router.register("fibonacci", FibonacciViewSet, "fibonacci")
+router.register("token", TokenViewSet, "token")
 
+urlpatterns = [
+    # drf_yasg isn't imported until docs are requested, see task.schema
+    path("swagger/", docs("swagger"), name="schema-swagger-ui"),
+    path("redoc/", docs("redoc"), name="schema-redoc"),
+    path("schema.json", openapi_schema, name="schema-json"),
+    path("metrics/", metrics, name="metrics"),
+]
 
-class CustomSchemaGenerator(OpenAPISchemaGenerator):
-    def get_schema(self, request=None, public=False):
-        schema = super().get_schema(request, public)
-        schema.schemes = ["https", "http"]
-        return schema
-
-
-schema_view = get_schema_view(
-    openapi.Info(title="Snippets API", default_version="v1"),
-    public=True,
-    generator_class=CustomSchemaGenerator,
-    permission_classes=(IsAuthenticated,),
-)
+urlpatterns += router.urls
 
-urlpatterns = [
+# async variants of the hot read endpoints, served without blocking when running under ASGI (src/asgi.py)
+urlpatterns += [
+    path(
+        "async/transaction/",
+        async_view(TransactionViewSet.as_view({"get": "list"})),
+        name="async-transaction-list",
+    ),
+    path(
+        "async/transaction/view_sum_of_transactions_by_date/",
+        async_view(TransactionViewSet.as_view({"post": "view_sum_of_transactions_by_date"})),
+        name="async-transaction-sum",
+    ),
     path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
+        "async/transaction/<int:pk>/",
+        async_view(TransactionViewSet.as_view({"get": "retrieve"})),
+        name="async-transaction-detail",
+    ),
+    path(
+        "async/user/get_current_user/",
+        async_view(UserViewSet.as_view({"get": "get_current_user"})),
+        name="async-user-current",
     ),
-    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
 ]
-
-urlpatterns += router.urls
@@ -1,25 +1,14 @@
-import sys
+from task.services.fibonacci import fibonacci
 
 
 def fibo(number: int) -> int:
     """
-    Function to calculate n'th number of fibonacci sequence
-    Function works very fast because it save cached numbers
+    Function to calculate n'th number of fibonacci sequence, fibo(0) = 0, fibo(1) = 1
+    Function works very fast because it uses fast doubling, O(log n) multiplications
+    fibo(3)  # return 2
+    fibo(10)  # return 55
+    fibo(100)  # return 354224848179261915075
     """
-
     if number < 0:
-        print("Invalid number please enter positive int number")
-        sys.exit(-1)
-
-    nums = [0] * number
-    nums[0], nums[1] = 0, 1
-
-    for i in range(2, number):
-        nums[i] = nums[i - 1] + nums[i - 2]
-    return nums[number - 1]
-
-
-fibo(3)  # return 1
-fibo(10)  # return 34
-fibo(100)  # return 218922995834555169026
-
+        raise ValueError("Invalid number please enter positive int number")
+    return fibonacci(number)
@@ -1,28 +1,54 @@
-from django.contrib.auth import logout
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import authenticate, logout
 from django.contrib.auth.models import AnonymousUser
 from django.core.validators import RegexValidator
+from django.db import IntegrityError
 from django.db.models import QuerySet, Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema, no_body
 from rest_framework import status
-from rest_framework.decorators import action
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from rest_framework.mixins import (
     CreateModelMixin,
     RetrieveModelMixin,
     DestroyModelMixin, ListModelMixin,
 )
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import BasePermission, IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from task.models import CustomUser, Transaction
+from task.decorators import conditional_on_version
+from task.models import CustomUser, Transaction, DailyTransactionAggregate
+from task.pagination import TransactionCursorPagination
+from task.profiling import ProfiledViewMixin
 from task.serializers.transaction_serializers import TransactionSerializer, TransactionOutputSerializer, \
-    TransactionSortByDateSerializer, TransactionSortByDateOutputSerializer
-from task.serializers.user_serializers import UserSerializer, CreateUserSerializer
-from task.services.user import validate_create_user_data
+    TransactionSortByDateSerializer, TransactionSortByDateOutputSerializer, TransactionCompactOutputSerializer, \
+    TransactionBulkUpdateSerializer, TransactionBulkDeleteSerializer, TransactionSumByDateSerializer, \
+    TransactionExportSerializer
+from task.serializers.fibonacci_serializers import FibonacciOutputSerializer, FibonacciQuerySerializer, \
+    FibonacciBatchSerializer
+from task.serializers.token_serializers import TokenObtainSerializer, TokenRefreshSerializer, TokenOutputSerializer
+from task.serializers.user_serializers import UserSerializer, CreateUserSerializer, BulkCreateUserSerializer
+from task.services.cache import TRANSACTIONS, USER, get_or_set_transactions_data
+from task.services.fibonacci import fibonacci, fibonacci_many, to_decimal_string
+from task.services.metrics import collect_snapshots, render_prometheus
+from task.services.money import from_minor_units, to_minor_units
+from task.services.tokens import REFRESH, get_token_user, issue_tokens
+from task.services.transaction import EXPORT_FORMATS, filter_by_date, bulk_create_transactions, \
+    bulk_update_transactions, bulk_delete_transactions
+from task.services.user import EMAIL_TAKEN_MESSAGE, create_user, validate_create_user_data, validate_users_data, \
+    bulk_create_users, delete_user
 
 
 class UserViewSet(
+    ProfiledViewMixin,
     GenericViewSet,
 ):
     """Api view with basic CRUD"""
@@ -67,122 +93,390 @@ class UserViewSet(
         if error_messages:
             return Response(error_messages, status=status.HTTP_400_BAD_REQUEST)
 
-        user = CustomUser.objects.create_user(
-            email,
-            password,
-            first_name=request.data.get("first_name"),
-            last_name=request.data.get("last_name"),
-        )
-        user.save()
+        user = create_user(request.data)
+        if user is None:
+            return Response([EMAIL_TAKEN_MESSAGE], status=status.HTTP_400_BAD_REQUEST)
         return Response(self.serializer_class(user, context={"request": request}).data)
 
+    @swagger_auto_schema(request_body=BulkCreateUserSerializer(many=True), responses={201: UserSerializer(many=True)})
+    @action(methods=["POST"], detail=False, url_path="bulk", permission_classes=(IsAdminUser,))
+    def bulk_create(self, request: Request, *args, **kwargs) -> Response:
+        """Create up to USER_BULK_MAX_SIZE users at once, either all of them or none"""
+        max_size = settings.USER_BULK_MAX_SIZE
+        if isinstance(request.data, list) and len(request.data) > max_size:
+            return Response(
+                [f"Batch can't contain more than {max_size} users, import bigger ones with manage.py import_users"],
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = BulkCreateUserSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)  # errors are reported per item
+        items = serializer.validated_data
+
+        errors = validate_users_data(items)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            users = bulk_create_users(items)
+        except IntegrityError:
+            # an email was taken by a concurrent request after validation
+            return Response(validate_users_data(items), status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.serializer_class(users, many=True).data, status=status.HTTP_201_CREATED)
+
     @swagger_auto_schema(operation_id="user_read", request_body=no_body, responses={200: UserSerializer()})
     @action(methods=["GET"], url_path="", detail=False, permission_classes=(IsAuthenticated,))
+    @conditional_on_version(USER)
     def get_current_user(self, request: Request) -> Response:
         return Response(self.serializer_class(self.request.user, context={"request": request}).data)
 
     def destroy(self, request: Request, *args, **kwargs) -> Response:
-        try:
-            if CustomUser.objects.get(pk=request.parser_context["kwargs"]["pk"]) != request.user:
+        if str(request.user.pk) != request.parser_context["kwargs"]["pk"]:
+            # the user isn't loaded only to tell 403 from 404
+            if CustomUser.objects.filter(pk=request.parser_context["kwargs"]["pk"]).exists():
                 return Response(status=status.HTTP_403_FORBIDDEN)
-        except CustomUser.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
-        request.user.delete()
+        delete_user(request.user)
         logout(request)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TransactionViewSet(GenericViewSet, DestroyModelMixin, RetrieveModelMixin):
+compact_parameter = openapi.Parameter(
+    "compact", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+    description="Send owner once in response envelope instead of in every transaction",
+)
+
+
+class TransactionViewSet(ProfiledViewMixin, GenericViewSet, DestroyModelMixin, RetrieveModelMixin):
+    # owners are serialized from the user cache (CachedUserSerializer), so they aren't joined
     queryset = Transaction.objects.all()
     serializer_class = TransactionOutputSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = TransactionCursorPagination
 
     def _get_queryset_by_date(self,
                               user: Request.user,
                               start_date: str = None,
                               end_date: str = None) -> QuerySet:
         """Transactions queryset sorted by date"""
-        if start_date and end_date:
-            transactions = self.queryset.filter(date__range=[start_date, end_date])
-        elif start_date and not end_date:
-            transactions = self.queryset.filter(date__gte=start_date)
-        elif not start_date and end_date:
-            transactions = self.queryset.filter(date__lte=end_date)
-        else:
-            transactions = self.queryset.filter(user=user)
-        return transactions
+        return filter_by_date(self.queryset.filter(user=user), start_date, end_date)
+
+    def _get_paginated_transactions_response(self, transactions: QuerySet, *cache_key) -> Response:
+        """
+        Page of transactions, in compact mode owner is serialized once instead of per transaction.
+        Pages are cached until user transactions change
+        """
+        def get_page() -> dict:
+            if self.request.query_params.get('compact', '').lower() not in ('1', 'true', 'yes'):
+                page = self.paginate_queryset(transactions)
+                return self.get_paginated_response(
+                    TransactionOutputSerializer(page, many=True, context=self.get_serializer_context()).data
+                ).data
+
+            # every transaction belongs to request.user, so the user table isn't touched at all
+            page = self.paginate_queryset(transactions.only('id', 'amount', 'currency', 'date'))
+            data = self.get_paginated_response(TransactionCompactOutputSerializer(page, many=True).data).data
+            data['user'] = UserSerializer(self.request.user).data
+            return data
+
+        cache_key = (self.action, self.request.build_absolute_uri(), *cache_key)
+        return Response(get_or_set_transactions_data(self.request.user.pk, cache_key, get_page))
 
     @swagger_auto_schema(request_body=TransactionSerializer, responses={201: TransactionOutputSerializer()})
     def create(self, request: Request, *args, **kwargs) -> Response:
-        if self.get_object().user != self.request.user:
-            # checking is user trying to check another user transaction
-            return Response(status=status.HTTP_403_FORBIDDEN)
+        serializer = TransactionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        transaction = serializer.save(user=request.user)
 
-        amount = request.data.get('amount')
-        transaction = Transaction.objects.create(user=request.user, amount=amount)
+        return Response(TransactionOutputSerializer(transaction, context=self.get_serializer_context()).data,
+                        status=status.HTTP_201_CREATED)
 
-        return Response(TransactionOutputSerializer(transaction).data)
+    def _check_bulk_size(self, items) -> Optional[Response]:
+        """Error response if batch is bigger than TRANSACTION_BULK_MAX_SIZE"""
+        max_size = settings.TRANSACTION_BULK_MAX_SIZE
+        if isinstance(items, list) and len(items) > max_size:
+            return Response(
+                [f"Batch can't contain more than {max_size} transactions"], status=status.HTTP_400_BAD_REQUEST
+            )
+        return None
+
+    @swagger_auto_schema(request_body=TransactionSerializer(many=True),
+                         responses={201: TransactionCompactOutputSerializer(many=True)})
+    @action(methods=["POST"], detail=False, url_path="bulk")
+    def bulk_create(self, request: Request, *args, **kwargs) -> Response:
+        error_response = self._check_bulk_size(request.data)
+        if error_response:
+            return error_response
+
+        serializer = TransactionSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)  # errors are reported per item
+
+        transactions = bulk_create_transactions(request.user, serializer.validated_data)
+        return Response(TransactionCompactOutputSerializer(transactions, many=True).data,
+                        status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(request_body=TransactionBulkUpdateSerializer(many=True),
+                         responses={200: TransactionCompactOutputSerializer(many=True)})
+    @bulk_create.mapping.patch
+    def bulk_update(self, request: Request, *args, **kwargs) -> Response:
+        error_response = self._check_bulk_size(request.data)
+        if error_response:
+            return error_response
+
+        serializer = TransactionBulkUpdateSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+
+        transactions = Transaction.objects.filter(user=request.user).in_bulk([item['id'] for item in items])
+        errors, seen_ids = [], set()
+        for item in items:
+            if item['id'] not in transactions:
+                errors.append({'id': ["Transaction not found"]})
+            elif item['id'] in seen_ids:
+                errors.append({'id': ["Transaction is updated twice"]})
+            else:
+                # amount precision depends on currency of the stored transaction
+                try:
+                    item['amount'] = to_minor_units(item['amount'], transactions[item['id']].currency)
+                    errors.append({})
+                except ValueError as e:
+                    errors.append({'amount': [str(e)]})
+            seen_ids.add(item['id'])
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = bulk_update_transactions(request.user, [transactions[item['id']] for item in items], items)
+        return Response(TransactionCompactOutputSerializer(updated, many=True).data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(request_body=TransactionBulkDeleteSerializer)
+    @bulk_create.mapping.delete
+    def bulk_delete(self, request: Request, *args, **kwargs) -> Response:
+        serializer = TransactionBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        error_response = self._check_bulk_size(ids)
+        if error_response:
+            return error_response
+
+        deleted = bulk_delete_transactions(request.user, ids)
+        return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
     def destroy(self, request: Request, *args, **kwargs) -> Response:
-        return DestroyModelMixin.destroy(self, request, *args, **kwargs)
+        instance = self.get_object()
+        if instance.user_id != request.user.pk:
+            # checking is user trying to delete another user transaction
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        self.perform_destroy(instance)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @swagger_auto_schema(request_body=no_body)
     def retrieve(self, request: Request, *args, **kwargs) -> Response:
-        if self.get_object().user != self.request.user:
+        instance = self.get_object()
+        if instance.user_id != request.user.pk:
             # checking is user trying to check another user transaction
             return Response(status=status.HTTP_403_FORBIDDEN)
-        return RetrieveModelMixin.retrieve(self, request, *args, **kwargs)
+        # 304 is answered only after the transaction was found and its owner checked
+        return self._get_transaction_response(request, instance)
 
+    @conditional_on_version(TRANSACTIONS)
+    def _get_transaction_response(self, request: Request, instance: Transaction) -> Response:
+        return Response(self.get_serializer(instance).data)
+
+    @swagger_auto_schema(manual_parameters=[compact_parameter])
+    @conditional_on_version(TRANSACTIONS)
     def list(self, request: Request, *args, **kwargs) -> Response:
-        return Response(self.serializer_class(Transaction.objects.filter(user=request.user), many=True).data,
-                        status=status.HTTP_200_OK)
+        return self._get_paginated_transactions_response(self.queryset.filter(user=request.user))
 
     @swagger_auto_schema(request_body=TransactionSerializer, responses={200: TransactionOutputSerializer()})
     def partial_update(self, request: Request, *args, **kwargs):
-        if self.get_object().user != self.request.user:
+        transaction = self.get_object()
+        if transaction.user_id != request.user.pk:
             # checking is user trying to check another user transaction
             return Response(status=status.HTTP_403_FORBIDDEN)
         if not request.data.get('amount'):
             return Response(
                 ["Forgot to enter something!"], status=status.HTTP_400_BAD_REQUEST
             )
-        try:
-            transaction = Transaction.objects.get(pk=request.parser_context["kwargs"]["pk"])
-        except Transaction.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
 
-        transaction.amount = request.data.get('amount')
-        transaction.save()
+        serializer = TransactionSerializer(transaction, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        transaction = serializer.save()
 
-        return Response(TransactionOutputSerializer(transaction).data, status=status.HTTP_200_OK)
+        return Response(TransactionOutputSerializer(transaction, context=self.get_serializer_context()).data,
+                        status=status.HTTP_200_OK)
 
     @swagger_auto_schema(operation_id="sort_transactions_by_date",
+                         manual_parameters=[compact_parameter],
                          request_body=TransactionSortByDateSerializer,
                          responses={200: TransactionOutputSerializer(many=True)})
     @action(methods=["POST"], detail=False)
     def sort_transactions_by_date(self, request: Request, *args, **kwargs) -> Response:
-        start_date = request.data.get('start_date')
-        end_date = request.data.get('end_date')
+        # empty values mean no filter
+        serializer = TransactionSortByDateSerializer(data={
+            key: value for key, value in request.data.items() if value not in ('', None)
+        })
+        serializer.is_valid(raise_exception=True)
+        start_date = serializer.validated_data.get('start_date')
+        end_date = serializer.validated_data.get('end_date')
 
-        # TODO add date validation
         transactions = self._get_queryset_by_date(request.user, start_date, end_date)
-        return Response(TransactionOutputSerializer(transactions, many=True).data)
+        return self._get_paginated_transactions_response(transactions, start_date, end_date)
 
     @swagger_auto_schema(operation_id="view_sum_of_transactions by date",
-                         request_body=TransactionSortByDateSerializer,
+                         request_body=TransactionSumByDateSerializer,
                          responses={200: TransactionSortByDateOutputSerializer()})
     @action(methods=["POST"], detail=False)
     def view_sum_of_transactions_by_date(self, request: Request, *args, **kwargs):
-        start_date = request.data.get('start_date')
-        end_date = request.data.get('end_date')
+        # empty values mean no filter, the currency is a part of the cache key, so it's validated
+        serializer = TransactionSumByDateSerializer(data={
+            key: value for key, value in request.data.items() if value not in ('', None)
+        })
+        serializer.is_valid(raise_exception=True)
+        start_date = serializer.validated_data.get('start_date')
+        end_date = serializer.validated_data.get('end_date')
+        currency = serializer.validated_data.get('currency') or settings.DEFAULT_CURRENCY
+
+        def get_sum() -> dict:
+            # sum of daily rollups, so the query reads one row per day instead of every transaction.
+            # Amounts are integer minor units, so the sum is exact
+            aggregates = filter_by_date(
+                DailyTransactionAggregate.objects.filter(user=request.user, currency=currency), start_date, end_date
+            )
+            summ = aggregates.aggregate(sum=Sum('sum'))['sum']
+
+            serializer = TransactionSortByDateOutputSerializer(data={
+                'start_date': start_date if start_date else None,
+                'end_date': end_date if end_date else None,
+                'sum': str(from_minor_units(summ, currency)) if summ is not None else None,
+                'currency': currency})
+            serializer.is_valid()
+            return serializer.data
+
+        data = get_or_set_transactions_data(request.user.pk, (self.action, start_date, end_date, currency), get_sum)
+        return Response(data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(query_serializer=TransactionExportSerializer)
+    @action(methods=["GET"], detail=False)
+    def export(self, request: Request, *args, **kwargs):
+        """Stream the whole transaction history as NDJSON or CSV"""
+        # empty parameters mean no filter
+        serializer = TransactionExportSerializer(data={
+            key: value for key, value in request.query_params.items() if value
+        })
+        serializer.is_valid(raise_exception=True)  # the response is streamed, so it's checked upfront
+        export_format = serializer.validated_data['export_format']
+        content_type, stream = EXPORT_FORMATS[export_format]
+
+        transactions = self._get_queryset_by_date(
+            request.user, serializer.validated_data.get('start_date'), serializer.validated_data.get('end_date')
+        )
+        response = StreamingHttpResponse(stream(transactions), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="transactions.{export_format}"'
+        return response
 
-        transactions = self._get_queryset_by_date(request.user, start_date, end_date)
-        summ = transactions.values().aggregate(sum=Sum('amount'))['sum']
 
-        serializer = TransactionSortByDateOutputSerializer(data={
-            'start_date': start_date if start_date else None,
-            'end_date': end_date if end_date else None,
-            'sum': summ})
-        serializer.is_valid()
-        return Response(serializer.data, status=status.HTTP_200_OK)
+class FibonacciViewSet(ProfiledViewMixin, GenericViewSet):
+    serializer_class = FibonacciOutputSerializer
+    permission_classes = (IsAuthenticated,)
+    lookup_url_kwarg = 'n'
+    lookup_value_regex = r'\d+'
+
+    @swagger_auto_schema(query_serializer=FibonacciQuerySerializer, responses={200: FibonacciOutputSerializer()})
+    def retrieve(self, request: Request, n: str, *args, **kwargs) -> Response:
+        """n'th Fibonacci number, F(0) = 0, F(1) = 1, with ?modulo=m huge n are cheap"""
+        serializer = FibonacciQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        n = serializer.parse_index(n)  # raises ValidationError, answered with 400
+
+        value = fibonacci(n, serializer.validated_data.get('modulo'))
+        return Response(FibonacciOutputSerializer({'n': n, 'value': to_decimal_string(value)}).data)
+
+    @swagger_auto_schema(query_serializer=FibonacciBatchSerializer,
+                         responses={200: FibonacciOutputSerializer(many=True)})
+    @action(methods=["GET"], detail=False)
+    def batch(self, request: Request, *args, **kwargs) -> Response:
+        """Fibonacci numbers of range start..end or of comma separated indices, computed in one pass"""
+        serializer = FibonacciBatchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        indices = serializer.validated_data['indices']
+
+        values = fibonacci_many(indices, serializer.validated_data.get('modulo'))
+        return Response(FibonacciOutputSerializer(
+            [{'n': n, 'value': to_decimal_string(value)} for n, value in zip(indices, values)], many=True
+        ).data)
+
+
+class TokenViewSet(GenericViewSet):
+    """Stateless API tokens, an alternative to session login (see task.authentication)"""
+    serializer_class = TokenOutputSerializer
+    # credentials are in the body, session authentication would only add CSRF checks
+    authentication_classes = ()
+    permission_classes = ()
+
+    @swagger_auto_schema(request_body=TokenObtainSerializer, responses={200: TokenOutputSerializer()})
+    def create(self, request: Request, *args, **kwargs) -> Response:
+        """Access and refresh tokens for email and password"""
+        serializer = TokenObtainSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        user = authenticate(request, **serializer.validated_data)
+        if user is None:
+            return Response(["Invalid email or password"], status=status.HTTP_401_UNAUTHORIZED)
+        return Response(TokenOutputSerializer(issue_tokens(user)).data)
+
+    @swagger_auto_schema(request_body=TokenRefreshSerializer, responses={200: TokenOutputSerializer()})
+    @action(methods=["POST"], detail=False)
+    def refresh(self, request: Request, *args, **kwargs) -> Response:
+        """New pair of tokens for a valid refresh token"""
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        user = get_token_user(serializer.validated_data['refresh'], REFRESH)
+        if user is None:
+            return Response(["Invalid or expired token"], status=status.HTTP_401_UNAUTHORIZED)
+        return Response(TokenOutputSerializer(issue_tokens(user)).data)
+
+
+class MetricsPermission(BasePermission):
+    """Staff users and scrapers sending "Authorization: Bearer <METRICS_TOKEN>" """
+
+    def has_permission(self, request: Request, view) -> bool:
+        token = settings.METRICS_TOKEN
+        if token and constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+@swagger_auto_schema(method='get', auto_schema=None)
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication])  # METRICS_TOKEN isn't a user token
+@permission_classes([MetricsPermission])
+def metrics(request: Request) -> HttpResponse:
+    """Metrics of all processes in Prometheus text format"""
+    return HttpResponse(render_prometheus(collect_snapshots()), content_type='text/plain; version=0.0.4')
+
+
+@swagger_auto_schema(method='get', auto_schema=None)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def openapi_schema(request: Request) -> HttpResponse:
+    """OpenAPI schema as JSON, built once and revalidated by ETag (see task.schema)"""
+    from task.schema import get_schema  # drf_yasg generators are loaded by the first docs request
+
+    content, etag = get_schema()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE)
+    return response
+
+
+def docs(ui: str):
+    """Swagger UI or ReDoc page, drf_yasg views are loaded by the first docs request"""
+    def view(request, *args, **kwargs):
+        from task.schema import get_ui_view
+
+        return get_ui_view(ui)(request, *args, **kwargs)
 
+    return view